@@ -0,0 +1,108 @@
+"""Content-addressed store for large tool outputs and image attachments."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import zlib
+from pathlib import Path
+
+from nanobot.utils.helpers import ensure_dir
+from nanobot.utils.persistence import PersistenceExecutor, finish_write, get_persistence
+
+_REF = re.compile(r"^[0-9a-f]{64}$")
+# Magic bytes of the image types channels hand us
+_IMAGE_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class BlobStore:
+    """
+    Blobs under ``workspace/blobs``, named by the SHA-256 of their content and
+    zlib-compressed (``blobs/ab/abcd….z``).
+
+    Storing the same content twice writes it once. ``put`` hashes on the
+    caller's thread and queues the compress-and-write on the persistence
+    thread; ``get`` (``aget`` from async code) waits for a queued write of
+    that blob before reading.
+    """
+
+    def __init__(self, workspace: Path, persistence: PersistenceExecutor | None = None):
+        self.blobs_dir = workspace / "blobs"
+        self.persistence = persistence or get_persistence()
+        self._known: set[str] = set()  # Refs stored (or queued) by this process; failed writes are dropped
+
+    @staticmethod
+    def is_ref(ref: str) -> bool:
+        return bool(_REF.match(ref))
+
+    def _path(self, ref: str) -> Path:
+        return self.blobs_dir / ref[:2] / f"{ref}.z"
+
+    def put(self, data: bytes | str) -> str:
+        """Store content and return its ref (the hex SHA-256 of the raw bytes)."""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        ref = hashlib.sha256(raw).hexdigest()
+        if ref not in self._known:
+            self._known.add(ref)
+            path = self._path(ref)
+            self.persistence.submit(path, self._write, ref, path, raw)
+        return ref
+
+    def _write(self, ref: str, path: Path, raw: bytes) -> None:
+        if path.exists():
+            return
+        try:
+            ensure_dir(path.parent)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(raw, 6))
+                finish_write(f, self.persistence.durability)
+            os.replace(tmp, path)
+        except BaseException:
+            self._known.discard(ref)  # So the next put of this content tries again
+            raise
+
+    def get(self, ref: str) -> bytes | None:
+        """Raw content of a blob, or None if it isn't stored."""
+        if not self.is_ref(ref):
+            return None
+        self.persistence.flush(self._path(ref))
+        return self._read(ref)
+
+    async def aget(self, ref: str) -> bytes | None:
+        """``get`` for async callers: awaits the queued write and reads off the event loop."""
+        if not self.is_ref(ref):
+            return None
+        await self.persistence.aflush(self._path(ref))
+        return await asyncio.to_thread(self._read, ref)
+
+    def _read(self, ref: str) -> bytes | None:
+        try:
+            return zlib.decompress(self._path(ref).read_bytes())
+        except (OSError, zlib.error):
+            return None
+
+    def get_text(self, ref: str) -> str | None:
+        data = self.get(ref)
+        return data.decode("utf-8", errors="replace") if data is not None else None
+
+    @staticmethod
+    def sniff_mime(data: bytes) -> str:
+        """Best-effort content type: a known image type, UTF-8 text, or octet-stream."""
+        for magic, mime in _IMAGE_MAGIC:
+            if data.startswith(magic):
+                return mime
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return "image/webp"
+        try:
+            data.decode("utf-8")
+        except UnicodeDecodeError:
+            return "application/octet-stream"
+        return "text/plain; charset=utf-8"
@@ -0,0 +1,154 @@
+"""Token budgeting for LLM prompts."""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+# CJK ideographs, kana and hangul: local Qwen/DeepSeek tokenizers spend roughly
+# one token per character here, versus ~4 characters per token for Latin text.
+_WIDE_CHARS = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+_MESSAGE_OVERHEAD = 4  # Role and separator tokens per chat message
+_IMAGE_TOKENS = 765  # Rough cost of one image part (high-detail tile estimate)
+_TRUNCATION_NOTE = "\n... (truncated to fit the context window)"
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast heuristic token count (no tokenizer download, no model-specific vocab)."""
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def _content_tokens(content: Any) -> int:
+    if isinstance(content, str):
+        return estimate_tokens(content)
+    if isinstance(content, list):
+        total = 0
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "text":
+                total += estimate_tokens(part.get("text", ""))
+            elif isinstance(part, dict) and part.get("type") == "image_url":
+                total += _IMAGE_TOKENS
+        return total
+    return 0
+
+
+def message_tokens(msg: dict[str, Any]) -> int:
+    """Estimate the prompt tokens one chat message costs."""
+    total = _MESSAGE_OVERHEAD + _content_tokens(msg.get("content"))
+    for tc in msg.get("tool_calls") or []:
+        fn = tc.get("function", {})
+        total += estimate_tokens(fn.get("name", "")) + estimate_tokens(fn.get("arguments", ""))
+    if msg.get("reasoning_content"):
+        total += estimate_tokens(msg["reasoning_content"])
+    return total
+
+
+def tools_tokens(tools: list[dict[str, Any]] | None) -> int:
+    """Estimate the prompt tokens spent on tool definitions."""
+    if not tools:
+        return 0
+    return estimate_tokens(json.dumps(tools, ensure_ascii=False))
+
+
+@dataclass
+class BudgetReport:
+    """What one fitting pass produced, for logs and traces."""
+    prompt_tokens: int
+    budget: int
+    truncated_tool_results: int = 0
+    dropped_messages: int = 0
+    dropped_sections: list[str] = field(default_factory=list)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.prompt_tokens > self.budget
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class ContextBudget:
+    """
+    Keep prompts within a model's context window.
+
+    The budget is ``context_window - reserve_tokens`` (room kept for the
+    completion). When a prompt is over budget, ``fit`` first truncates tool
+    results larger than ``tool_result_max_tokens``, then drops the oldest
+    history turns; the current turn is never dropped. Optional system prompt
+    sections are dropped by ContextBuilder, which owns them.
+    """
+
+    def __init__(self, context_window: int, reserve_tokens: int, tool_result_max_tokens: int | None = None):
+        self.context_window = context_window
+        self.reserve_tokens = reserve_tokens
+        # Never let reserving the completion squeeze the prompt below a quarter of the window.
+        self.limit = max(context_window - reserve_tokens, context_window // 4)
+        self.tool_result_max_tokens = tool_result_max_tokens or max(self.limit // 4, 256)
+
+    def measure(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None) -> int:
+        return sum(message_tokens(m) for m in messages) + tools_tokens(tools)
+
+    def fit(
+        self,
+        messages: list[dict[str, Any]],
+        turn_start: int | None = None,
+        tools: list[dict[str, Any]] | None = None,
+    ) -> tuple[list[dict[str, Any]], BudgetReport]:
+        """
+        Return a copy of ``messages`` that fits the budget, plus a report.
+
+        Args:
+            messages: System prompt, history, then the current turn.
+            turn_start: Index of the current turn's first message (defaults to
+                the last user message). History is ``messages[1:turn_start]``.
+            tools: Tool definitions sent alongside the messages.
+        """
+        out = list(messages)
+        if turn_start is None:
+            turn_start = next((i for i in range(len(out) - 1, 0, -1) if out[i].get("role") == "user"), len(out))
+        sizes = [message_tokens(m) for m in out]
+        total = sum(sizes) + tools_tokens(tools)
+        report = BudgetReport(prompt_tokens=total, budget=self.limit)
+        if total <= self.limit:
+            return out, report
+
+        # 1. Truncate oversized tool results, largest first.
+        oversized = sorted(
+            (i for i, m in enumerate(out) if m.get("role") == "tool" and sizes[i] > self.tool_result_max_tokens),
+            key=lambda i: -sizes[i],
+        )
+        for i in oversized:
+            if total <= self.limit:
+                break
+            content = out[i].get("content")
+            if not isinstance(content, str):
+                continue
+            keep = max(0, len(content) * self.tool_result_max_tokens // sizes[i])
+            out[i] = {**out[i], "content": content[:keep] + _TRUNCATION_NOTE}
+            new_size = message_tokens(out[i])
+            total -= sizes[i] - new_size
+            sizes[i] = new_size
+            report.truncated_tool_results += 1
+
+        # 2. Drop the oldest history turns; a turn runs until the next user message
+        # so tool calls and their results always leave together.
+        start = 1 if out and out[0].get("role") == "system" else 0
+        end = start
+        while total > self.limit and end < turn_start:
+            end += 1
+            while end < turn_start and out[end].get("role") != "user":
+                end += 1
+            total -= sum(sizes[start:end])
+            report.dropped_messages += end - start
+            del out[start:end], sizes[start:end]
+            turn_start -= end - start
+            end = start
+
+        report.prompt_tokens = total
+        return out, report
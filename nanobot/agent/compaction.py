@@ -0,0 +1,77 @@
+"""In-turn compaction of older tool results."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from nanobot.agent.blobs import BlobStore
+from nanobot.agent.budget import message_tokens
+
+_DIGEST_HEAD_CHARS = 240
+_DIGEST_TAIL_CHARS = 120
+
+
+@dataclass
+class CompactionReport:
+    """What one compaction pass did, for logs and traces."""
+    compacted: int
+    turn_tokens_before: int
+    turn_tokens_after: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class TurnCompactor:
+    """
+    Keep a long tool-iteration turn from re-sending every earlier tool output.
+
+    Once the current turn (its user message onwards) passes ``threshold_tokens``,
+    every tool result in it except the latest ``keep_recent`` is replaced by a
+    digest: its size, first and last lines, and a ``recall_tool_output`` blob
+    id for the full text. Digests are deterministic (no extra LLM call), and
+    all eligible results are compacted in one pass, so the prompt prefix
+    changes once per threshold crossing rather than on every iteration.
+    """
+
+    def __init__(self, blobs: BlobStore, threshold_tokens: int, keep_recent: int = 3):
+        self.blobs = blobs
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent = max(0, keep_recent)
+
+    def digest(self, name: str, content: str) -> str:
+        """Short stand-in for a tool result; the full text stays recallable."""
+        ref = self.blobs.put(content)
+        lines = content.count("\n") + 1
+        head = content[:_DIGEST_HEAD_CHARS].rstrip()
+        tail = content[-_DIGEST_TAIL_CHARS:].lstrip()
+        return (
+            f"[{name or 'tool'} output compacted: {len(content)} chars, {lines} lines]\n"
+            f"{head}\n...\n{tail}\n"
+            f"(full output: recall_tool_output blob={ref})"
+        )
+
+    def compact(self, messages: list[dict[str, Any]], turn_start: int) -> CompactionReport | None:
+        """Compact older tool results of the turn in place; returns None if nothing was done."""
+        if self.threshold_tokens <= 0:
+            return None
+        sizes = {i: message_tokens(messages[i]) for i in range(turn_start, len(messages))}
+        before = sum(sizes.values())
+        if before <= self.threshold_tokens:
+            return None
+        results = [i for i in sizes if messages[i].get("role") == "tool"]
+        older = results[:len(results) - self.keep_recent] if self.keep_recent else results
+        compacted = 0
+        after = before
+        for i in older:
+            content = messages[i].get("content")
+            # Digests (and short results) are left alone: compacting them saves nothing.
+            if not isinstance(content, str) or len(content) <= 2 * (_DIGEST_HEAD_CHARS + _DIGEST_TAIL_CHARS):
+                continue
+            messages[i] = {**messages[i], "content": self.digest(messages[i].get("name", ""), content)}
+            after -= sizes[i] - message_tokens(messages[i])
+            compacted += 1
+        if not compacted:
+            return None
+        return CompactionReport(compacted=compacted, turn_tokens_before=before, turn_tokens_after=after)
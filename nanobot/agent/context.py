@@ -4,10 +4,15 @@ import base64
 import mimetypes
 import platform
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
+from loguru import logger
+
+from nanobot.agent.budget import BudgetReport, ContextBudget
 from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory_retrieval import MemoryRetriever, render_memory, split_memory
 from nanobot.agent.skills import SkillsLoader
+from nanobot.utils.helpers import file_fingerprint
 
 
 class ContextBuilder:
@@ -19,11 +24,40 @@ class ContextBuilder:
     """
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
+    # System prompt sections that may be dropped to fit the budget, first to go first
+    OPTIONAL_SECTIONS = ("skills", "active_skills", "memory")
+    # Section order per layout. "stable" goes from most static to most volatile and
+    # moves time and session info out of the system prompt, so providers (Anthropic
+    # cache_control, vLLM prefix caching, Ollama KV reuse) can reuse the prefix.
+    LAYOUTS = {
+        "classic": ("identity", "bootstrap", "memory", "active_skills", "skills"),
+        "stable": ("identity", "bootstrap", "active_skills", "skills", "memory"),
+    }
+    RUNTIME_CONTEXT_OPEN = "[Runtime Context]"
+    RUNTIME_CONTEXT_CLOSE = "[/Runtime Context]"
     
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        budget: ContextBudget | None = None,
+        layout: str = "classic",
+        skills_top_k: int = 0,
+        memory_top_k: int = 0,
+    ):
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown prompt layout: {layout!r} (expected one of {sorted(self.LAYOUTS)})")
         self.workspace = workspace
         self.memory = MemoryStore(workspace)
         self.skills = SkillsLoader(workspace)
+        self.budget = budget
+        self.layout = layout
+        self.skills_top_k = skills_top_k  # List only the k most relevant skills per turn (0 = all)
+        self.memory_top_k = memory_top_k  # Inject only the k most relevant memory entries (0 = all)
+        self._memory_retriever = MemoryRetriever()
+        # Section name -> (fingerprint, content); rebuilt only when the fingerprint changes
+        self._section_cache: dict[str, tuple[Any, Any]] = {}
+        self.section_cache_hits = 0
+        self.section_cache_misses = 0
     
     def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
         """
@@ -35,57 +69,144 @@ class ContextBuilder:
         Returns:
             Complete system prompt.
         """
-        parts = []
+        return self._join_sections(self.build_system_sections(skill_names))
+    
+    def build_system_sections(
+        self,
+        skill_names: list[str] | None = None,
+        query: str | None = None,
+    ) -> list[tuple[str, str]]:
+        """
+        Build the system prompt as named (section, content) parts.
+        
+        Args:
+            skill_names: Optional list of skills to include.
+            query: Recent conversation text used to pick relevant skills and
+                memory entries when ``skills_top_k`` / ``memory_top_k`` are set.
+        
+        Returns:
+            Non-empty sections in prompt order.
+        """
+        sections = []
         
         # Core identity
-        parts.append(self._get_identity())
+        sections.append(("identity", self._get_identity(with_time=self.layout == "classic")))
         
         # Bootstrap files
-        bootstrap = self._load_bootstrap_files()
+        bootstrap = self._memoized(
+            "bootstrap",
+            tuple(file_fingerprint(self.workspace / f) for f in self.BOOTSTRAP_FILES),
+            self._load_bootstrap_files,
+        )
         if bootstrap:
-            parts.append(bootstrap)
+            sections.append(("bootstrap", bootstrap))
         
         # Memory context
-        memory = self.memory.get_memory_context()
+        if self.memory_top_k > 0 and query is not None:
+            memory = self._relevant_memory(query)
+        else:
+            memory = self._memoized(
+                "memory", file_fingerprint(self.memory.memory_file), self.memory.get_memory_context,
+            )
         if memory:
-            parts.append(f"# Memory\n\n{memory}")
+            sections.append(("memory", f"# Memory\n\n{memory}"))
         
         # Skills - progressive loading
+        selected = None
+        if self.skills_top_k > 0 and query is not None:
+            ranked = self.skills.rank(query, self.skills_top_k)
+            selected = tuple(sorted(set(ranked) | set(self.skills.get_always_skills())))
+        always_content, skills_summary = self._memoized(
+            "skills", (self.skills.fingerprint(), selected), lambda: self._load_skills_sections(selected),
+        )
         # 1. Always-loaded skills: include full content
-        always_skills = self.skills.get_always_skills()
-        if always_skills:
-            always_content = self.skills.load_skills_for_context(always_skills)
-            if always_content:
-                parts.append(f"# Active Skills\n\n{always_content}")
+        if always_content:
+            sections.append(("active_skills", f"# Active Skills\n\n{always_content}"))
         
         # 2. Available skills: only show summary (agent uses read_file to load)
-        skills_summary = self.skills.build_skills_summary()
-        if skills_summary:
-            parts.append(f"""# Skills
+        if selected is not None:
+            sections.append(("skills", f"""# Skills
+
+Only the skills most relevant to this conversation are listed. Call the list_skills tool to search or browse the full catalogue.
+To use a skill, read its SKILL.md file using the read_file tool.
+Skills with available="false" need dependencies installed first - you can try installing them with apt/brew.
+
+{skills_summary or "(no listed skill matched this message)"}"""))
+        elif skills_summary:
+            sections.append(("skills", f"""# Skills
 
 The following skills extend your capabilities. To use a skill, read its SKILL.md file using the read_file tool.
 Skills with available="false" need dependencies installed first - you can try installing them with apt/brew.
 
-{skills_summary}""")
+{skills_summary}"""))
         
-        return "\n\n---\n\n".join(parts)
+        order = self.LAYOUTS[self.layout]
+        return sorted(sections, key=lambda s: order.index(s[0]))
     
-    def _get_identity(self) -> str:
-        """Get the core identity section."""
+    def _memoized(self, name: str, fingerprint: Any, build: Callable[[], Any]) -> Any:
+        """Return the cached section content, rebuilding it only if its inputs changed."""
+        cached = self._section_cache.get(name)
+        if cached is not None and cached[0] == fingerprint:
+            self.section_cache_hits += 1
+            return cached[1]
+        self.section_cache_misses += 1
+        content = build()
+        self._section_cache[name] = (fingerprint, content)
+        return content
+    
+    def _load_skills_sections(self, selected: tuple[str, ...] | None = None) -> tuple[str, str]:
+        """Load always-on skill content and the summary of all (or only the selected) skills."""
+        always_skills = self.skills.get_always_skills()
+        always_content = self.skills.load_skills_for_context(always_skills) if always_skills else ""
+        summary = self.skills.build_skills_summary(list(selected) if selected is not None else None)
+        return always_content, summary
+    
+    def _relevant_memory(self, query: str) -> str:
+        """Pinned memory plus the ``memory_top_k`` entries most relevant to the query."""
+        def _index() -> tuple[str, int]:
+            pinned, entries = split_memory(self.memory.read_long_term())
+            self._memory_retriever.sync(entries)
+            return pinned, len(entries)
+        
+        pinned, total = self._memoized("memory_index", file_fingerprint(self.memory.memory_file), _index)
+        if total <= self.memory_top_k:
+            selected = self._memory_retriever.entries
+        else:
+            selected = self._memory_retriever.top_k(query, self.memory_top_k)
+        body = render_memory(pinned, selected, total - len(selected))
+        return f"## Long-term Memory\n{body}" if body else ""
+    
+    @staticmethod
+    def _retrieval_query(history: list[dict[str, Any]], current_message: str, turns: int = 2) -> str:
+        """Text to rank skills and memory against: the new message plus the last few user messages."""
+        recent = [
+            m["content"] for m in history
+            if m.get("role") == "user" and isinstance(m.get("content"), str)
+        ][-turns:]
+        return "\n".join([*recent, current_message])
+    
+    @staticmethod
+    def _join_sections(sections: list[tuple[str, str]]) -> str:
+        return "\n\n---\n\n".join(content for _, content in sections)
+    
+    @staticmethod
+    def _current_time() -> str:
         from datetime import datetime
         import time as _time
         now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
         tz = _time.strftime("%Z") or "UTC"
+        return f"{now} ({tz})"
+    
+    def _get_identity(self, with_time: bool = True) -> str:
+        """Get the core identity section."""
+        time_block = f"\n\n## Current Time\n{self._current_time()}" if with_time else ""
         workspace_path = str(self.workspace.expanduser().resolve())
         system = platform.system()
         runtime = f"{'macOS' if system == 'Darwin' else system} {platform.machine()}, Python {platform.python_version()}"
         
         return f"""# nanobot 🐈
 
-You are nanobot, a helpful AI assistant. 
-
-## Current Time
-{now} ({tz})
+You are nanobot, a helpful AI assistant. {time_block}
 
 ## Runtime
 {runtime}
@@ -93,7 +214,7 @@ You are nanobot, a helpful AI assistant.
 ## Workspace
 Your workspace is at: {workspace_path}
 - Long-term memory: {workspace_path}/memory/MEMORY.md
-- History log: {workspace_path}/memory/HISTORY.md (grep-searchable)
+- History log: {workspace_path}/memory/HISTORY.md (searchable with history_search)
 - Custom skills: {workspace_path}/skills/{{skill-name}}/SKILL.md
 
 Reply directly with text for conversations. Only use the 'message' tool to send to a specific chat channel.
@@ -107,7 +228,7 @@ Reply directly with text for conversations. Only use the 'message' tool to send
 
 ## Memory
 - Remember important facts: write to {workspace_path}/memory/MEMORY.md
-- Recall past events: grep {workspace_path}/memory/HISTORY.md"""
+- Recall past events: use the history_search tool (supports date ranges)"""
     
     def _load_bootstrap_files(self) -> str:
         """Load all bootstrap files from workspace."""
@@ -147,10 +268,14 @@ Reply directly with text for conversations. Only use the 'message' tool to send
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
-        if channel and chat_id:
-            system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
-        messages.append({"role": "system", "content": system_prompt})
+        sections = self.build_system_sections(skill_names, query=self._retrieval_query(history, current_message))
+        session_info = ""
+        if self.layout == "stable":
+            # Volatile details ride on the newest message so the prefix stays byte-identical.
+            current_message = self._runtime_context(channel, chat_id) + current_message
+        elif channel and chat_id:
+            session_info = f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
+        messages.append({"role": "system", "content": self._join_sections(sections) + session_info})
 
         # History
         messages.extend(history)
@@ -159,8 +284,87 @@ Reply directly with text for conversations. Only use the 'message' tool to send
         user_content = self._build_user_content(current_message, media)
         messages.append({"role": "user", "content": user_content})
 
+        if self.budget is not None:
+            messages = self._fit_initial_messages(messages, sections, session_info)
         return messages
 
+    def _runtime_context(self, channel: str | None, chat_id: str | None) -> str:
+        """Session and time block prepended to the current user message in the stable layout."""
+        lines = [self.RUNTIME_CONTEXT_OPEN]
+        if channel and chat_id:
+            lines += [f"Channel: {channel}", f"Chat ID: {chat_id}"]
+        lines += [f"Current Time: {self._current_time()}", self.RUNTIME_CONTEXT_CLOSE]
+        return "\n".join(lines) + "\n\n"
+
+    @classmethod
+    def strip_runtime_context(cls, content: Any) -> Any:
+        """Remove the runtime context block from user message content (before saving it)."""
+        def _strip(text: str) -> str:
+            if not text.startswith(cls.RUNTIME_CONTEXT_OPEN):
+                return text
+            _, sep, rest = text.partition(cls.RUNTIME_CONTEXT_CLOSE)
+            return rest.lstrip("\n") if sep else text
+
+        if isinstance(content, str):
+            return _strip(content)
+        if isinstance(content, list):
+            return [
+                {**part, "text": _strip(part.get("text", ""))} if isinstance(part, dict) and part.get("type") == "text" else part
+                for part in content
+            ]
+        return content
+
+    def _fit_initial_messages(
+        self,
+        messages: list[dict[str, Any]],
+        sections: list[tuple[str, str]],
+        session_info: str,
+    ) -> list[dict[str, Any]]:
+        """
+        Trim history until the prompt fits the budget. If even no history is too
+        much, drop optional system sections in priority order, re-fitting the
+        full history after each so the freed room goes back to history.
+        """
+        fitted, report = self.budget.fit(messages)
+        dropped: list[str] = []
+        for name in self.OPTIONAL_SECTIONS:
+            if not report.over_budget:
+                break
+            if not any(n == name for n, _ in sections):
+                continue
+            sections = [(n, c) for n, c in sections if n != name]
+            dropped.append(name)
+            messages = [{"role": "system", "content": self._join_sections(sections) + session_info}, *messages[1:]]
+            fitted, report = self.budget.fit(messages)
+        report.dropped_sections.extend(dropped)
+        if report.dropped_messages or report.dropped_sections or report.truncated_tool_results:
+            logger.info(
+                "Context trimmed to ~{} tokens (budget {}): dropped {} history message(s), sections {}",
+                report.prompt_tokens, report.budget, report.dropped_messages, report.dropped_sections or "none",
+            )
+        return fitted
+
+    def fit_to_budget(
+        self,
+        messages: list[dict[str, Any]],
+        turn_start: int,
+        tools: list[dict[str, Any]] | None = None,
+    ) -> tuple[list[dict[str, Any]], BudgetReport | None]:
+        """
+        Fit one LLM call's messages into the budget without touching the originals.
+
+        Args:
+            messages: Messages accumulated so far in the turn.
+            turn_start: Index of the turn's first user message.
+            tools: Tool definitions sent with the call.
+
+        Returns:
+            Messages to send, and the budget report (None when budgeting is off).
+        """
+        if self.budget is None:
+            return messages, None
+        return self.budget.fit(messages, turn_start=turn_start, tools=tools)
+
     def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
         """Build user message content with optional base64-encoded images."""
         if not media:
@@ -179,6 +383,26 @@ Reply directly with text for conversations. Only use the 'message' tool to send
             return text
         return images + [{"type": "text", "text": text}]
     
+    def add_user_message(
+        self,
+        messages: list[dict[str, Any]],
+        content: str,
+        media: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Add a user message to the message list (e.g. one merged into a running turn).
+        
+        Args:
+            messages: Current message list.
+            content: Message text.
+            media: Optional list of local file paths for images/media.
+        
+        Returns:
+            Updated message list.
+        """
+        messages.append({"role": "user", "content": self._build_user_content(content, media)})
+        return messages
+    
     def add_tool_result(
         self,
         messages: list[dict[str, Any]],
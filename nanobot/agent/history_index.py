@@ -0,0 +1,201 @@
+"""Full-text index over HISTORY.md."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.utils.text import BM25, tokenize
+
+# Consolidation entries start with "[YYYY-MM-DD HH:MM]"; only split before such a line
+# so multi-paragraph entries stay whole.
+_ENTRY_SPLIT = re.compile(r"\n\s*\n(?=\[\d{4}-\d{2}-\d{2})")
+_ENTRY_TS = re.compile(r"^\[(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2})?)")
+_HEAD_BYTES = 256  # Prefix hashed to notice HISTORY.md being replaced rather than appended to
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts TEXT,
+    content TEXT NOT NULL,
+    terms TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+"""
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    terms, content='entries', content_rowid='id', tokenize='unicode61'
+);
+"""
+
+
+@dataclass
+class HistoryHit:
+    """One ranked search result."""
+    ts: str | None
+    content: str
+    score: float
+
+
+class HistoryIndex:
+    """
+    Incrementally maintained inverted index of HISTORY.md entries (SQLite).
+
+    The index lives next to the log (``memory/history.db``) and remembers how
+    many bytes of HISTORY.md it has consumed, so ``sync`` only parses what was
+    appended since. If the file shrinks or its beginning changes (edited or
+    rotated) the index is rebuilt.
+
+    Text is tokenized with ``nanobot.utils.text.tokenize`` before it is stored,
+    so Chinese works with the stock FTS5 tokenizer. When SQLite lacks FTS5,
+    search falls back to BM25 over the stored terms.
+    """
+
+    def __init__(self, history_file: Path, db_path: Path | None = None):
+        self.history_file = history_file
+        self.db_path = db_path or history_file.with_name("history.db")
+        self.fts = True
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit: sync() opens its own write transaction.
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        if not self._ready:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+            except sqlite3.OperationalError:
+                self.fts = False
+                logger.info("SQLite FTS5 unavailable; history search uses in-process BM25")
+            self._ready = True
+        return conn
+
+    def sync(self) -> int:
+        """Index entries appended to HISTORY.md since the last sync. Returns how many were added."""
+        with closing(self._connect()) as conn:
+            # Take the write lock before reading the offset, so two syncs (other
+            # threads or processes) can't both index the same entries.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._sync(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return added
+
+    def _sync(self, conn: sqlite3.Connection) -> int:
+        """Body of ``sync``, run inside its write transaction."""
+        try:
+            size = self.history_file.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        offset = int(meta.get("offset", 0))
+        if size == offset:
+            return 0
+        if size == 0:
+            self._clear(conn)
+            return 0
+        with open(self.history_file, "rb") as f:
+            if size < offset or (offset and meta.get("head") != self._head_hash(f, offset)):
+                logger.info("HISTORY.md was rewritten; rebuilding history index")
+                self._clear(conn)
+                offset = 0
+            f.seek(offset)
+            data = f.read(size - offset)
+            end = self._complete_entries_end(data)
+            head = self._head_hash(f, offset + end)
+        text = data[:end].decode("utf-8", errors="replace").replace("\r\n", "\n")
+        added = 0
+        for entry in _ENTRY_SPLIT.split(text):
+            entry = entry.strip()
+            if not entry:
+                continue
+            m = _ENTRY_TS.match(entry)
+            ts = m.group(1).replace("T", " ") if m else None
+            terms = " ".join(tokenize(entry))
+            cur = conn.execute("INSERT INTO entries (ts, content, terms) VALUES (?, ?, ?)", (ts, entry, terms))
+            if self.fts:
+                conn.execute("INSERT INTO entries_fts (rowid, terms) VALUES (?, ?)", (cur.lastrowid, terms))
+            added += 1
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("offset", str(offset + end)), ("head", head)],
+        )
+        return added
+
+    def _clear(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM meta")
+        if self.fts:
+            conn.execute("INSERT INTO entries_fts(entries_fts) VALUES('delete-all')")
+
+    @staticmethod
+    def _head_hash(f, length: int) -> str:
+        """Hash of the file's first bytes (up to the consumed length)."""
+        f.seek(0)
+        return hashlib.sha1(f.read(min(length, _HEAD_BYTES))).hexdigest()
+
+    @staticmethod
+    def _complete_entries_end(data: bytes) -> int:
+        """Length of the prefix holding complete entries (each one ends with a blank line)."""
+        lf, crlf = data.rfind(b"\n\n"), data.rfind(b"\n\r\n")
+        return max(lf + 2 if lf >= 0 else 0, crlf + 3 if crlf >= 0 else 0)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[HistoryHit]:
+        """
+        Rank entries against a query, optionally within a date range.
+
+        Args:
+            query: Free-text query.
+            limit: Maximum number of hits.
+            since: Earliest date to include (YYYY-MM-DD).
+            until: Latest date to include (YYYY-MM-DD, inclusive).
+        """
+        self.sync()
+        terms = sorted(set(tokenize(query)))
+        where, args = [], []
+        if since:
+            where.append("substr(e.ts, 1, 10) >= ?")
+            args.append(since)
+        if until:
+            where.append("substr(e.ts, 1, 10) <= ?")
+            args.append(until)
+        with closing(self._connect()) as conn:
+            if not terms:
+                # Date-only browse: newest first.
+                sql = "SELECT e.ts, e.content FROM entries e"
+                if where:
+                    sql += " WHERE " + " AND ".join(where)
+                rows = conn.execute(sql + " ORDER BY e.id DESC LIMIT ?", (*args, limit)).fetchall()
+                return [HistoryHit(ts, content, 0.0) for ts, content in rows]
+            if self.fts:
+                match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+                sql = (
+                    "SELECT e.ts, e.content, bm25(entries_fts) AS rank FROM entries_fts "
+                    "JOIN entries e ON e.id = entries_fts.rowid WHERE entries_fts MATCH ?"
+                )
+                if where:
+                    sql += " AND " + " AND ".join(where)
+                rows = conn.execute(sql + " ORDER BY rank LIMIT ?", (match, *args, limit)).fetchall()
+                return [HistoryHit(ts, content, -rank) for ts, content, rank in rows]
+            sql = "SELECT e.ts, e.content, e.terms FROM entries e"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            rows = conn.execute(sql, args).fetchall()
+        bm25 = BM25([r[2].split() for r in rows])
+        return [HistoryHit(rows[i][0], rows[i][1], score) for i, score in bm25.top_k(terms, limit)]
@@ -3,21 +3,28 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import json
 import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
 
 from loguru import logger
 
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.compaction import TurnCompactor
+from nanobot.agent.memory import DEFAULT_CHUNK_TOKENS, MemoryStore
+from nanobot.agent.repeat_guard import ToolRepeatGuard
 from nanobot.agent.tools.cron import CronTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.application.orchestration import AgentOrchestrationEnvironment
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, LLMResponse, StreamAccumulator, ToolCallRequest
+from nanobot.observability.spans import Tracer, make_tracer
 from nanobot.observability.tool_trace import ToolTraceStore
 from nanobot.session.manager import Session, SessionManager
 
@@ -26,6 +33,58 @@ if TYPE_CHECKING:
     from nanobot.cron.service import CronService
 
 
+@dataclass
+class _ActiveTurn:
+    """Control block for the user turn currently running in a session.
+
+    A newer message from the same session either requests cancellation or is
+    queued in ``pending`` to be merged; both are applied at the next iteration
+    boundary of the running turn.
+    """
+
+    cancel_requested: bool = False
+    cancelled: bool = False
+    pending: list[InboundMessage] = field(default_factory=list)
+
+
+class _ThinkFilter:
+    """Incrementally drop <think>…</think> blocks from streamed text.
+
+    A tag may be split across chunks, so any trailing text that could be the
+    start of a tag is held back until the next chunk resolves it.
+    """
+
+    _OPEN, _CLOSE = "<think>", "</think>"
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._in_think = False
+
+    def feed(self, text: str) -> str:
+        self._buf += text
+        out: list[str] = []
+        while self._buf:
+            tag = self._CLOSE if self._in_think else self._OPEN
+            idx = self._buf.find(tag)
+            if idx >= 0:
+                if not self._in_think:
+                    out.append(self._buf[:idx])
+                self._buf = self._buf[idx + len(tag):]
+                self._in_think = not self._in_think
+                continue
+            keep = next((n for n in range(min(len(tag) - 1, len(self._buf)), 0, -1)
+                         if tag.startswith(self._buf[-n:])), 0)
+            if not self._in_think:
+                out.append(self._buf[:len(self._buf) - keep])
+            self._buf = self._buf[len(self._buf) - keep:]
+            break
+        return "".join(out)
+
+    def flush(self) -> str:
+        rest, self._buf = ("" if self._in_think else self._buf), ""
+        return rest
+
+
 class AgentLoop:
     """
     The agent loop is the core processing engine.
@@ -36,6 +95,12 @@ class AgentLoop:
     3. Calls the LLM
     4. Executes tool calls
     5. Sends responses back
+
+    Different sessions are processed concurrently (up to ``max_concurrent_sessions``);
+    messages within one session are processed in arrival order. A message that
+    arrives while its session is busy is queued, cancels the running turn, or is
+    merged into it, depending on the channel's interrupt mode; ``/stop`` cancels
+    the session's running and queued turns immediately.
     """
 
     def __init__(
@@ -55,6 +120,20 @@ class AgentLoop:
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
         channels_config: ChannelsConfig | None = None,
+        max_concurrent_sessions: int = 4,
+        parallel_tool_calls: bool = True,
+        stream: bool = False,
+        tool_cache_size: int = 256,
+        context_window: int = 0,
+        prompt_layout: str = "classic",
+        skills_top_k: int = 0,
+        memory_mode: str = "full",
+        memory_top_k: int = 0,
+        turn_compact_tokens: int = 0,
+        turn_compact_keep: int = 3,
+        repeat_hint_after: int = 0,
+        oscillation_abort_cycles: int = 0,
+        tracer: Tracer | None = None,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.bus = bus
@@ -70,6 +149,12 @@ class AgentLoop:
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
+        self.max_concurrent_sessions = max(1, max_concurrent_sessions)
+        self.parallel_tool_calls = parallel_tool_calls
+        self.stream = stream
+        if memory_mode not in ("full", "structured"):
+            raise ValueError(f"Unknown memory mode: {memory_mode!r} (expected 'full' or 'structured')")
+        self.memory_mode = memory_mode
 
         self.sessions = session_manager or SessionManager(workspace)
         self.env = AgentOrchestrationEnvironment(
@@ -84,15 +169,32 @@ class AgentLoop:
             model=self.model,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
+            tool_cache_size=tool_cache_size,
+            context_window=context_window,
+            prompt_layout=prompt_layout,
+            skills_top_k=skills_top_k,
+            memory_top_k=memory_top_k,
         )
         self.tools = self.env.tools
         self.context = self.env.context
+        self.blobs = self.env.blobs
+        self.compactor = TurnCompactor(self.blobs, turn_compact_tokens, keep_recent=turn_compact_keep)
+        self.repeat_hint_after = repeat_hint_after
+        self.oscillation_abort_cycles = oscillation_abort_cycles
 
         self._running = False
         self._consolidating: set[str] = set()  # Session keys with consolidation in progress
         self._consolidation_tasks: set[asyncio.Task] = set()  # Strong refs to in-flight tasks
         self._consolidation_locks: dict[str, asyncio.Lock] = {}
+        self._turn_semaphore = asyncio.Semaphore(self.max_concurrent_sessions)
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._session_waiters: dict[str, int] = {}  # Turns queued or running per session key
+        self._session_tasks: set[asyncio.Task] = set()  # Strong refs to in-flight turns
+        self._tasks_by_key: dict[str, set[asyncio.Task]] = {}  # Running and queued turns per session key
+        self._active_turns: dict[str, _ActiveTurn] = {}  # User turn currently running per session key
+        self._unsaved: dict[str, Session] = {}  # Sessions with a finished turn not yet written to disk
         self.trace_store = ToolTraceStore()
+        self.tracer = tracer or make_tracer()
 
     def _set_tool_context(self, channel: str, chat_id: str, message_id: str | None = None) -> None:
         """Update context for all tools that need routing info."""
@@ -125,33 +227,138 @@ class AgentLoop:
             return f'{tc.name}("{val[:40]}…")' if len(val) > 40 else f'{tc.name}("{val}")'
         return ", ".join(_fmt(tc) for tc in tool_calls)
 
+    def _plan_tool_batches(self, tool_calls: list[ToolCallRequest]) -> list[list[ToolCallRequest]]:
+        """Group consecutive concurrency-safe calls into batches; every other call runs alone."""
+        batches: list[list[ToolCallRequest]] = []
+        prev_safe = False
+        for tc in tool_calls:
+            safe = self.parallel_tool_calls and self.tools.is_concurrency_safe(tc.name)
+            if safe and prev_safe:
+                batches[-1].append(tc)
+            else:
+                batches.append([tc])
+            prev_safe = safe
+        return batches
+
+    async def _execute_tool_call(self, tool_call: ToolCallRequest) -> str:
+        """Execute a single tool call through the registry."""
+        args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
+        logger.info("Tool call: {}({})", tool_call.name, args_str[:200])
+        with self.tracer.span("tool", tool=tool_call.name) as span:
+            result = await self.tools.execute(tool_call.name, tool_call.arguments)
+            if isinstance(result, str):
+                span.set(result_chars=len(result), error=result.startswith("Error"))
+            return result
+
+    async def _chat_streaming(
+        self,
+        messages: list[dict],
+        tools: list[dict[str, Any]],
+        on_progress: Callable[..., Awaitable[None]],
+    ) -> tuple[LLMResponse, bool]:
+        """Stream one completion, forwarding visible text deltas to on_progress.
+
+        Returns the assembled response and whether any text was forwarded.
+        """
+        acc = StreamAccumulator()
+        think = _ThinkFilter()
+        streamed = False
+        async for chunk in self.provider.chat_stream(
+            messages=messages,
+            tools=tools,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        ):
+            acc.add(chunk)
+            if chunk.content and chunk.finish_reason != "error":
+                if delta := think.feed(chunk.content):
+                    # Leading whitespace before the first visible token is noise.
+                    if not streamed:
+                        delta = delta.lstrip()
+                    if delta:
+                        streamed = True
+                        await on_progress(delta, stream_delta=True)
+        if streamed and (tail := think.flush()):
+            await on_progress(tail, stream_delta=True)
+        return acc.response(), streamed
+
     async def _run_agent_loop(
         self,
         initial_messages: list[dict],
         on_progress: Callable[..., Awaitable[None]] | None = None,
         trace_context: dict[str, Any] | None = None,
+        turn: _ActiveTurn | None = None,
     ) -> tuple[str | None, list[str], list[dict]]:
-        """Run the agent iteration loop. Returns (final_content, tools_used, messages)."""
+        """Run the agent iteration loop. Returns (final_content, tools_used, messages).
+
+        When ``turn`` is given, cancellation requests and merged messages are
+        applied between iterations; a cancelled turn returns no final content.
+        Repeated tool calls are handled by a turn-local ``ToolRepeatGuard``.
+        """
         messages = initial_messages
+        turn_start = len(messages) - 1  # The turn's user message; everything before is history
         iteration = 0
         final_content = None
         tools_used: list[str] = []
+        guard = ToolRepeatGuard(self.repeat_hint_after, self.oscillation_abort_cycles)
 
         while iteration < self.max_iterations:
+            if iteration and turn is not None:
+                if turn.cancel_requested:
+                    logger.info("Turn cancelled after {} iteration(s)", iteration)
+                    turn.cancelled = True
+                    self.trace_store.append({"event": "turn_cancelled", "iteration": iteration, **(trace_context or {})})
+                    return None, tools_used, messages
+                while turn.pending:
+                    extra = turn.pending.pop(0)
+                    messages = self.context.add_user_message(messages, extra.content, extra.media or None)
+                    self.trace_store.append({"event": "message_merged", "iteration": iteration, **(trace_context or {})})
             iteration += 1
 
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            if iteration > 1 and (compaction := self.compactor.compact(messages, turn_start)):
+                logger.debug("Compacted {} earlier tool result(s) in the turn", compaction.compacted)
+                self.trace_store.append({
+                    "event": "turn_compacted", "iteration": iteration, **compaction.as_dict(), **(trace_context or {}),
+                })
+
+            tool_defs = self.tools.get_definitions()
+            call_messages, report = self.context.fit_to_budget(messages, turn_start, tool_defs)
+            if report is not None and report.over_budget:
+                logger.warning("Prompt (~{} tokens) exceeds the context budget ({})", report.prompt_tokens, report.budget)
+
+            streamed = False
+            with self.tracer.span("llm.chat", model=self.model, iteration=iteration, stream=self.stream) as span:
+                if self.stream and on_progress:
+                    response, streamed = await self._chat_streaming(call_messages, tool_defs, on_progress)
+                else:
+                    response = await self.provider.chat(
+                        messages=call_messages,
+                        tools=tool_defs,
+                        model=self.model,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    )
+                usage = response.usage or {}
+                span.set(
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    cached_prompt_tokens=usage.get("cached_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0),
+                    finish_reason=response.finish_reason,
+                    tool_calls=len(response.tool_calls),
+                )
+            self.trace_store.append({
+                "event": "llm_call",
+                "iteration": iteration,
+                **(report.as_dict() if report is not None else {}),
+                **self._cache_usage(usage),
+                **(trace_context or {}),
+            })
 
             if response.has_tool_calls:
                 if on_progress:
                     clean = self._strip_think(response.content)
-                    if clean:
+                    if clean and not streamed:
                         await on_progress(clean)
                     await on_progress(self._tool_hint(response.tool_calls), tool_hint=True)
 
@@ -171,24 +378,56 @@ class AgentLoop:
                     reasoning_content=response.reasoning_content,
                 )
 
-                for tool_call in response.tool_calls:
-                    tools_used.append(tool_call.name)
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info("Tool call: {}({})", tool_call.name, args_str[:200])
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    self.trace_store.append({
-                        "event": "tool_call",
-                        "iteration": iteration,
-                        "tool": tool_call.name,
-                        "arguments": tool_call.arguments,
-                        "result": result[:2000] if isinstance(result, str) else str(result),
-                        **(trace_context or {}),
-                    })
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
+                keys: list[str] = []
+                for batch in self._plan_tool_batches(response.tool_calls):
+                    batch_keys = [guard.fingerprint(tc.name, tc.arguments) for tc in batch]
+                    # Run each distinct call once; exact read-only repeats reuse the turn's earlier result.
+                    todo: dict[str, ToolCallRequest] = {}
+                    for tc, key in zip(batch, batch_keys):
+                        if guard.reuse(key) is None and key not in todo:
+                            todo[key] = tc
+                    if len(todo) > 1:
+                        fresh = await asyncio.gather(*(self._execute_tool_call(tc) for tc in todo.values()))
+                    else:
+                        fresh = [await self._execute_tool_call(tc) for tc in todo.values()]
+                    fresh_by_key = dict(zip(todo, fresh))
+                    # Results are appended in the original call order regardless of completion order.
+                    for tool_call, key in zip(batch, batch_keys):
+                        reused = key not in fresh_by_key or todo[key] is not tool_call
+                        result = guard.record(
+                            tool_call.name, key,
+                            fresh_by_key[key] if key in fresh_by_key else guard.reuse(key),
+                            read_only=self.tools.is_concurrency_safe(tool_call.name),
+                            reused=reused,
+                        )
+                        keys.append(key)
+                        tools_used.append(tool_call.name)
+                        self.trace_store.append({
+                            "event": "tool_call",
+                            "iteration": iteration,
+                            "tool": tool_call.name,
+                            "arguments": tool_call.arguments,
+                            "result": result[:2000] if isinstance(result, str) else str(result),
+                            "batch_size": len(batch),
+                            "repeat": guard.count(key),
+                            "reused": reused,
+                            **(trace_context or {}),
+                        })
+                        messages = self.context.add_tool_result(
+                            messages, tool_call.id, tool_call.name, result
+                        )
+                if guard.end_iteration(keys):
+                    logger.warning("Tool calls are oscillating after {} iteration(s); stopping the turn", iteration)
+                    final_content = (
+                        "I stopped because I kept repeating the same tool calls without making progress. "
+                        "Could you rephrase the request or give me more details?"
                     )
+                    break
             else:
                 final_content = self._strip_think(response.content)
+                messages = self.context.add_assistant_message(
+                    messages, final_content, reasoning_content=response.reasoning_content,
+                )
                 break
 
         if final_content is None and iteration >= self.max_iterations:
@@ -198,14 +437,16 @@ class AgentLoop:
                 "without completing the task. You can try breaking the task into smaller steps."
             )
 
+        if guard.repeated_calls:
+            self.trace_store.append({"event": "tool_repeats", "iteration": iteration, **guard.stats(), **(trace_context or {})})
         self.trace_store.append({"event": "final_answer", "content": final_content or "", **(trace_context or {})})
         return final_content, tools_used, messages
 
     async def run(self) -> None:
-        """Run the agent loop, processing messages from the bus."""
+        """Run the agent loop, dispatching messages from the bus to per-session turns."""
         self._running = True
         await self.env.ensure_mcp_connected()
-        logger.info("Agent loop started")
+        logger.info("Agent loop started (max {} concurrent sessions)", self.max_concurrent_sessions)
 
         while self._running:
             try:
@@ -213,23 +454,126 @@ class AgentLoop:
                     self.bus.consume_inbound(),
                     timeout=1.0
                 )
-                try:
-                    response = await self._process_message(msg)
+            except asyncio.TimeoutError:
+                continue
+            if msg.channel != "system" and msg.content.strip().lower() == "/stop":
+                await self._stop_session(msg)
+                continue
+            self._dispatch(msg)
+
+        # Let turns that were already accepted finish, as the serial loop did.
+        if self._session_tasks:
+            await asyncio.gather(*list(self._session_tasks), return_exceptions=True)
+
+    @staticmethod
+    def _session_key(msg: InboundMessage, session_key: str | None = None) -> str:
+        """Key of the session a message's turn is recorded in."""
+        if msg.channel == "system":
+            return msg.chat_id if ":" in msg.chat_id else f"cli:{msg.chat_id}"
+        return session_key or msg.session_key
+
+    @staticmethod
+    def _dispatch_key(msg: InboundMessage) -> str:
+        """Session key a message is ordered under (system messages follow their origin chat)."""
+        if msg.channel == "system" and ":" in msg.chat_id:
+            return msg.chat_id
+        return msg.session_key
+
+    def _interrupt_mode(self, channel: str) -> str:
+        """How a new message treats a running turn: "queue", "cancel" or "merge"."""
+        return self.channels_config.interrupt_mode_for(channel) if self.channels_config else "queue"
+
+    def _dispatch(self, msg: InboundMessage) -> None:
+        """Schedule a message as its own task; ordering is enforced by the session slot."""
+        key = self._dispatch_key(msg)
+        active = self._active_turns.get(key)
+        # Slash commands always queue; they are never merged into a model turn.
+        if active and msg.channel != "system" and not msg.content.strip().startswith("/"):
+            mode = self._interrupt_mode(msg.channel)
+            if mode == "merge":
+                logger.info("Merging new message into the running turn for {}", key)
+                active.pending.append(msg)
+                return
+            if mode == "cancel":
+                logger.info("Cancelling the running turn for {} in favour of a newer message", key)
+                active.cancel_requested = True
+
+        task = asyncio.create_task(self._handle_inbound(msg))
+        self._session_tasks.add(task)
+        self._tasks_by_key.setdefault(key, set()).add(task)
+        task.add_done_callback(partial(self._forget_task, key))
+
+    def _forget_task(self, key: str, task: asyncio.Task) -> None:
+        self._session_tasks.discard(task)
+        tasks = self._tasks_by_key.get(key)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks_by_key[key]
+
+    async def _stop_session(self, msg: InboundMessage) -> None:
+        """Handle /stop: hard-cancel the running turn and any queued turns for the session."""
+        key = self._dispatch_key(msg)
+        if active := self._active_turns.get(key):
+            active.pending.clear()
+        tasks = [t for t in self._tasks_by_key.get(key, ()) if not t.done()]
+        for task in tasks:
+            task.cancel()
+        logger.info("/stop for {}: cancelled {} task(s)", key, len(tasks))
+        content = "⏹ Stopped the current task." if tasks else "No active task to stop."
+        await self.bus.publish_outbound(OutboundMessage(
+            channel=msg.channel, chat_id=msg.chat_id, content=content, metadata=msg.metadata or {},
+        ))
+
+    @asynccontextmanager
+    async def _session_slot(self, key: str) -> AsyncIterator[None]:
+        """Serialize turns within a session and cap the number of sessions running at once."""
+        lock = self._session_locks.get(key)
+        if lock is None:
+            lock = self._session_locks[key] = asyncio.Lock()
+        self._session_waiters[key] = self._session_waiters.get(key, 0) + 1
+        try:
+            # asyncio.Lock wakes waiters in FIFO order, which preserves per-session ordering.
+            async with lock, self._turn_semaphore:
+                yield
+        finally:
+            self._session_waiters[key] -= 1
+            if not self._session_waiters[key]:
+                del self._session_waiters[key]
+                self._session_locks.pop(key, None)
+
+    async def _handle_inbound(self, msg: InboundMessage) -> None:
+        """Process one bus message inside its session slot and publish the reply."""
+        key = self._dispatch_key(msg)
+        async with self._session_slot(key):
+            turn = None
+            if msg.channel != "system":
+                turn = self._active_turns[key] = _ActiveTurn()
+            try:
+                with self.tracer.span("turn", session_key=key, channel=msg.channel):
+                    response = await self._process_message(msg, turn=turn)
+                    # Reply first; the session write does not hold it up.
                     if response is not None:
                         await self.bus.publish_outbound(response)
                     elif msg.channel == "cli":
                         await self.bus.publish_outbound(OutboundMessage(
                             channel=msg.channel, chat_id=msg.chat_id, content="", metadata=msg.metadata or {},
                         ))
-                except Exception as e:
-                    logger.error("Error processing message: {}", e)
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
-            except asyncio.TimeoutError:
-                continue
+                    await self._save_session(self._session_key(msg))
+            except Exception as e:
+                logger.error("Error processing message: {}", e)
+                await self.bus.publish_outbound(OutboundMessage(
+                    channel=msg.channel,
+                    chat_id=msg.chat_id,
+                    content=f"Sorry, I encountered an error: {str(e)}"
+                ))
+            finally:
+                await self._save_session(self._session_key(msg))  # No-op unless the turn failed after recording
+                if turn is not None:
+                    self._active_turns.pop(key, None)
+                    # Messages merged after the turn's last iteration boundary get their own turns.
+                    for pending in turn.pending:
+                        self._dispatch(pending)
 
     async def close_mcp(self) -> None:
         """Close MCP connections."""
@@ -257,8 +601,26 @@ class AgentLoop:
         msg: InboundMessage,
         session_key: str | None = None,
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        turn: _ActiveTurn | None = None,
+    ) -> OutboundMessage | None:
+        """
+        Process a single inbound message and return the response.
+
+        The turn is recorded in the session but not yet written: callers
+        deliver the response, then await ``_save_session``.
+        """
+        key = self._session_key(msg, session_key)
+        # Keep the session resident in the cache while the turn is in flight.
+        with self.sessions.pinned(key):
+            return await self._process_turn(msg, session_key, on_progress, turn)
+
+    async def _process_turn(
+        self,
+        msg: InboundMessage,
+        session_key: str | None,
+        on_progress: Callable[[str], Awaitable[None]] | None,
+        turn: _ActiveTurn | None,
     ) -> OutboundMessage | None:
-        """Process a single inbound message and return the response."""
         # System messages: parse origin from chat_id ("channel:chat_id")
         if msg.channel == "system":
             channel, chat_id = (msg.chat_id.split(":", 1) if ":" in msg.chat_id
@@ -268,16 +630,18 @@ class AgentLoop:
             session = self.sessions.get_or_create(key)
             self._set_tool_context(channel, chat_id, msg.metadata.get("message_id"))
             history = session.get_history(max_messages=self.memory_window)
-            messages = self.context.build_messages(
-                history=history,
-                current_message=msg.content, channel=channel, chat_id=chat_id,
-            )
+            with self.tracer.span("build_messages", history=len(history)):
+                messages = self.context.build_messages(
+                    history=history,
+                    current_message=msg.content, channel=channel, chat_id=chat_id,
+                )
+            # The budget may have trimmed history: the turn starts at the last built message.
+            turn_start = len(messages) - 1
             final_content, _, all_msgs = await self._run_agent_loop(
                 messages,
                 trace_context={"channel": channel, "chat_id": chat_id, "session_key": key, "sender_id": msg.sender_id},
             )
-            self._save_turn(session, all_msgs, 1 + len(history))
-            self.sessions.save(session)
+            self._record_turn(session, all_msgs, turn_start)
             return OutboundMessage(channel=channel, chat_id=chat_id,
                                   content=final_content or "Background task completed.")
 
@@ -314,13 +678,17 @@ class AgentLoop:
                 self._prune_consolidation_lock(session.key, lock)
 
             session.clear()
-            self.sessions.save(session)
+            await self.sessions.save_async(session)
             self.sessions.invalidate(session.key)
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="New session started.")
         if cmd == "/help":
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
-                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n/help — Show available commands")
+                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n/stop — Stop the current task\n/help — Show available commands")
+        if cmd == "/stop":
+            # Reached only when nothing was running; live turns are stopped in run().
+            return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
+                                  content="No active task to stop.")
 
         unconsolidated = len(session.messages) - session.last_consolidated
         if (unconsolidated >= self.memory_window and session.key not in self._consolidating):
@@ -330,7 +698,10 @@ class AgentLoop:
             async def _consolidate_and_unlock():
                 try:
                     async with lock:
-                        await self._consolidate_memory(session)
+                        with self.sessions.pinned(session.key):
+                            if await self._consolidate_memory(session):
+                                # Persist the new offset before the session can be evicted.
+                                await self.sessions.save_async(session)
                 finally:
                     self._consolidating.discard(session.key)
                     self._prune_consolidation_lock(session.key, lock)
@@ -347,17 +718,21 @@ class AgentLoop:
                 message_tool.start_turn()
 
         history = session.get_history(max_messages=self.memory_window)
-        initial_messages = self.context.build_messages(
-            history=history,
-            current_message=msg.content,
-            media=msg.media if msg.media else None,
-            channel=msg.channel, chat_id=msg.chat_id,
-        )
+        with self.tracer.span("build_messages", history=len(history)):
+            initial_messages = self.context.build_messages(
+                history=history,
+                current_message=msg.content,
+                media=msg.media if msg.media else None,
+                channel=msg.channel, chat_id=msg.chat_id,
+            )
+        # The budget may have trimmed history: the turn starts at the last built message.
+        turn_start = len(initial_messages) - 1
 
-        async def _bus_progress(content: str, *, tool_hint: bool = False) -> None:
+        async def _bus_progress(content: str, *, tool_hint: bool = False, stream_delta: bool = False) -> None:
             meta = dict(msg.metadata or {})
             meta["_progress"] = True
             meta["_tool_hint"] = tool_hint
+            meta["_stream_delta"] = stream_delta
             await self.bus.publish_outbound(OutboundMessage(
                 channel=msg.channel, chat_id=msg.chat_id, content=content, metadata=meta,
             ))
@@ -366,16 +741,21 @@ class AgentLoop:
             initial_messages,
             on_progress=on_progress or _bus_progress,
             trace_context={"channel": msg.channel, "chat_id": msg.chat_id, "session_key": key, "sender_id": msg.sender_id},
+            turn=turn,
         )
 
+        if turn is not None and turn.cancelled:
+            # Keep the partial work in history; the newer message gets the reply.
+            self._record_turn(session, all_msgs, turn_start)
+            return None
+
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
 
         preview = final_content[:120] + "..." if len(final_content) > 120 else final_content
         logger.info("Response to {}:{}: {}", msg.channel, msg.sender_id, preview)
 
-        self._save_turn(session, all_msgs, 1 + len(history))
-        self.sessions.save(session)
+        self._record_turn(session, all_msgs, turn_start)
 
         if message_tool := self.tools.get("message"):
             if isinstance(message_tool, MessageTool) and message_tool._sent_in_turn:
@@ -388,25 +768,92 @@ class AgentLoop:
 
     _TOOL_RESULT_MAX_CHARS = 500
 
+    @staticmethod
+    def _cache_usage(usage: dict[str, int]) -> dict[str, int | None]:
+        """Split reported prompt tokens into prefix-cache hits and freshly processed tokens."""
+        if "prompt_tokens" not in usage:
+            return {"usage_prompt_tokens": None, "cached_prompt_tokens": None, "uncached_prompt_tokens": None}
+        prompt = usage["prompt_tokens"]
+        cached = usage.get("cached_tokens")
+        return {
+            "usage_prompt_tokens": prompt,
+            "cached_prompt_tokens": cached,
+            "uncached_prompt_tokens": prompt - cached if cached is not None else None,
+        }
+
+    def _record_turn(self, session: Session, messages: list[dict], skip: int) -> None:
+        """Append the turn's new messages to the session; ``_save_session`` writes it later."""
+        self._save_turn(session, messages, skip)
+        self._unsaved[session.key] = session
+
+    async def _save_session(self, key: str) -> None:
+        """Write a session recorded by ``_record_turn`` to disk (off the event loop)."""
+        session = self._unsaved.pop(key, None)
+        if session is None:
+            return
+        with self.sessions.pinned(key), self.tracer.span("session.save", messages=len(session.messages)):
+            try:
+                await self.sessions.save_async(session)
+            except Exception:
+                logger.exception("Failed to save session {}", key)
+
     def _save_turn(self, session: Session, messages: list[dict], skip: int) -> None:
-        """Save new-turn messages into session, truncating large tool results."""
+        """
+        Save new-turn messages into session.
+
+        Large tool results are kept in the blob store; the session holds a
+        preview, and the blob id under ``blob`` (not sent to the model).
+        Inline images are moved to the blob store too, leaving a text marker.
+        """
         from datetime import datetime
         for m in messages[skip:]:
             entry = {k: v for k, v in m.items() if k != "reasoning_content"}
+            if entry.get("role") == "user":
+                entry["content"] = self._stash_images(self.context.strip_runtime_context(entry.get("content")))
             if entry.get("role") == "tool" and isinstance(entry.get("content"), str):
                 content = entry["content"]
                 if len(content) > self._TOOL_RESULT_MAX_CHARS:
-                    entry["content"] = content[:self._TOOL_RESULT_MAX_CHARS] + "\n... (truncated)"
+                    ref = self.blobs.put(content)
+                    entry["content"] = (
+                        content[:self._TOOL_RESULT_MAX_CHARS]
+                        + f"\n... (truncated from {len(content)} chars; full output: recall_tool_output blob={ref})"
+                    )
+                    entry["blob"] = ref
             entry.setdefault("timestamp", datetime.now().isoformat())
             session.messages.append(entry)
         session.updated_at = datetime.now()
 
+    def _stash_images(self, content: Any) -> Any:
+        """Replace inline base64 images in user content with blob markers."""
+        if not isinstance(content, list):
+            return content
+        out = []
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                url = (part.get("image_url") or {}).get("url", "")
+                header, sep, b64 = url.partition(";base64,")
+                if sep and header.startswith("data:"):
+                    try:
+                        ref = self.blobs.put(base64.b64decode(b64))
+                        part = {"type": "text", "text": f"[image {header[5:]} blob={ref}]"}
+                    except ValueError:
+                        pass
+            out.append(part)
+        return out
+
     async def _consolidate_memory(self, session, archive_all: bool = False) -> bool:
         """Delegate to MemoryStore.consolidate(). Returns True on success."""
-        return await MemoryStore(self.workspace).consolidate(
-            session, self.provider, self.model,
-            archive_all=archive_all, memory_window=self.memory_window,
-        )
+        with self.tracer.span("memory.consolidate", session_key=session.key, archive_all=archive_all) as span:
+            # Keep each consolidation call to half the prompt budget; larger backlogs are chunked.
+            budget = self.context.budget
+            ok = await MemoryStore(self.workspace).consolidate(
+                session, self.provider, self.model,
+                archive_all=archive_all, memory_window=self.memory_window,
+                chunk_tokens=max(1000, budget.limit // 2) if budget else DEFAULT_CHUNK_TOKENS,
+                structured=self.memory_mode == "structured",
+            )
+            span.set(ok=ok)
+            return ok
 
     async def process_direct(
         self,
@@ -419,5 +866,10 @@ class AgentLoop:
         """Process a message directly (for CLI or cron usage)."""
         await self.env.ensure_mcp_connected()
         msg = InboundMessage(channel=channel, sender_id="user", chat_id=chat_id, content=content)
-        response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
+        async with self._session_slot(session_key):
+            with self.tracer.span("turn", session_key=session_key, channel=channel):
+                try:
+                    response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
+                finally:
+                    await self._save_session(self._session_key(msg, session_key))
         return response.content if response else ""
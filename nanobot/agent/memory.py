@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import os
+import re
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
-from nanobot.utils.helpers import ensure_dir
+from nanobot.agent.budget import estimate_tokens
+from nanobot.agent.history_index import HistoryIndex
+from nanobot.utils.helpers import ensure_dir, safe_filename
+from nanobot.utils.persistence import PersistenceExecutor, finish_write, get_persistence
 
 if TYPE_CHECKING:
     from nanobot.providers.base import LLMProvider
@@ -41,14 +48,217 @@ _SAVE_MEMORY_TOOL = [
     }
 ]
 
+# Map step of chunked consolidation: one part of a long backlog.
+_SAVE_CHUNK_TOOL = [
+    {
+        "type": "function",
+        "function": {
+            "name": "save_chunk_summary",
+            "description": "Save the summary of one part of a long conversation.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "history_entry": {
+                        "type": "string",
+                        "description": "A paragraph (2-5 sentences) summarizing key events/decisions/topics "
+                        "in this part. Start with [YYYY-MM-DD HH:MM] of its first message. Include detail useful for search.",
+                    },
+                    "facts": {
+                        "type": "string",
+                        "description": "New long-term facts from this part as markdown bullet points "
+                        "(preferences, project context, relationships). Empty if none.",
+                    },
+                },
+                "required": ["history_entry", "facts"],
+            },
+        },
+    }
+]
+
+# Reduce step: fold the facts from every part into MEMORY.md.
+_SAVE_MEMORY_UPDATE_TOOL = [
+    {
+        "type": "function",
+        "function": {
+            "name": "save_memory_update",
+            "description": "Save the merged long-term memory.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "memory_update": {
+                        "type": "string",
+                        "description": "Full updated long-term memory as markdown. Include all existing "
+                        "facts plus new ones; resolve contradictions in favour of newer facts.",
+                    },
+                },
+                "required": ["memory_update"],
+            },
+        },
+    }
+]
+
+# Structured memory mode: patch keyed entries instead of returning the whole file.
+_MEMORY_OPS_PARAM = {
+    "type": "array",
+    "description": "Changes to long-term memory. Only list what changed; return [] if nothing is new. "
+    "add: new fact; replace: update the fact with this key; delete: remove an outdated fact.",
+    "items": {
+        "type": "object",
+        "properties": {
+            "op": {"type": "string", "enum": ["add", "replace", "delete"]},
+            "key": {"type": "string", "description": "Short stable id, e.g. 'editor-preference'"},
+            "section": {"type": "string", "description": "Section heading for new facts, e.g. 'Preferences'"},
+            "text": {"type": "string", "description": "The fact, one line (not needed for delete)"},
+        },
+        "required": ["op", "key"],
+    },
+}
+
+_SAVE_MEMORY_OPS_TOOL = [
+    {
+        "type": "function",
+        "function": {
+            "name": "save_memory",
+            "description": "Save the memory consolidation result to persistent storage.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "history_entry": _SAVE_MEMORY_TOOL[0]["function"]["parameters"]["properties"]["history_entry"],
+                    "memory_ops": _MEMORY_OPS_PARAM,
+                },
+                "required": ["history_entry", "memory_ops"],
+            },
+        },
+    }
+]
+
+_SAVE_MEMORY_OPS_UPDATE_TOOL = [
+    {
+        "type": "function",
+        "function": {
+            "name": "save_memory_update",
+            "description": "Save the changes to long-term memory.",
+            "parameters": {
+                "type": "object",
+                "properties": {"memory_ops": _MEMORY_OPS_PARAM},
+                "required": ["memory_ops"],
+            },
+        },
+    }
+]
+
+_CONSOLIDATION_SYSTEM = "You are a memory consolidation agent. Call the {tool} tool with your consolidation of the conversation."
+_STRUCTURED_HINT = """
+Long-term memory is a list of keyed facts ("- [key] fact") under "## Section" headings.
+Do not repeat unchanged facts: only add new facts, replace changed ones by key, and delete outdated ones."""
+DEFAULT_CHUNK_TOKENS = 6000  # Backlog per consolidation call; larger backlogs are map-reduced
+DEFAULT_MAX_PARALLEL_CHUNKS = 2  # Chunk summaries requested concurrently
+
+
+class MemoryDocument:
+    """
+    MEMORY.md as keyed entries grouped under ``## Section`` headings.
+
+    Entries are lines of the form ``- [key] fact``. Any other line (free-form
+    notes, a pre-existing unstructured memory) is kept verbatim, so converting
+    an existing file is lossless.
+    """
+
+    DEFAULT_SECTION = "General"
+    _SECTION_RE = re.compile(r"^##\s+(.+?)\s*$")
+    _ENTRY_RE = re.compile(r"^- \[([^\]]+)\]\s*(.*)$")
+
+    def __init__(self) -> None:
+        self.preamble: list[str] = []
+        # Section -> items; an item is (key, text) for entries or (None, line) for verbatim lines
+        self.sections: dict[str, list[tuple[str | None, str]]] = {}
+
+    @classmethod
+    def parse(cls, text: str) -> MemoryDocument:
+        doc = cls()
+        current: list[tuple[str | None, str]] | None = None
+        for line in text.splitlines():
+            if m := cls._SECTION_RE.match(line):
+                current = doc.sections.setdefault(m.group(1), [])
+            elif current is None:
+                doc.preamble.append(line)
+            elif m := cls._ENTRY_RE.match(line):
+                current.append((m.group(1).strip(), m.group(2).strip()))
+            else:
+                current.append((None, line))
+        return doc
+
+    def render(self) -> str:
+        blocks = []
+        preamble = "\n".join(self.preamble).strip()
+        if preamble:
+            blocks.append(preamble)
+        for name, items in self.sections.items():
+            lines = [f"- [{key}] {text}" if key is not None else text for key, text in items]
+            body = "\n".join(lines).strip("\n")
+            blocks.append(f"## {name}\n{body}" if body else f"## {name}")
+        return "\n\n".join(blocks) + "\n" if blocks else ""
+
+    def keys(self) -> list[str]:
+        return [key for items in self.sections.values() for key, _ in items if key is not None]
+
+    def _find(self, key: str) -> tuple[str, int] | None:
+        for name, items in self.sections.items():
+            for i, (k, _) in enumerate(items):
+                if k == key:
+                    return name, i
+        return None
+
+    def apply(self, ops: list[dict[str, Any]]) -> int:
+        """Apply add/replace/delete operations. Returns how many changed the document."""
+        changed = 0
+        for op in ops:
+            if not isinstance(op, dict):
+                continue
+            kind = op.get("op")
+            key = str(op.get("key") or "").strip().replace("]", ")")
+            text = " ".join(str(op.get("text") or "").split())
+            if not key or kind not in ("add", "replace", "delete"):
+                logger.warning("Memory: ignoring malformed operation {}", op)
+                continue
+            found = self._find(key)
+            if kind == "delete":
+                if found:
+                    name, i = found
+                    del self.sections[name][i]
+                    if not any(k is not None or t.strip() for k, t in self.sections[name]):
+                        del self.sections[name]
+                    changed += 1
+                continue
+            if not text:
+                continue
+            if found:
+                # add on an existing key behaves as replace so retries stay idempotent
+                name, i = found
+                if self.sections[name][i][1] != text:
+                    self.sections[name][i] = (key, text)
+                    changed += 1
+                continue
+            section = " ".join(str(op.get("section") or "").split()) or self.DEFAULT_SECTION
+            self.sections.setdefault(section, []).append((key, text))
+            changed += 1
+        return changed
+
 
 class MemoryStore:
-    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
+    """
+    Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log).
+
+    The write methods are synchronous; ``consolidate`` runs them on the shared
+    persistence thread, queued per file, so MEMORY.md patches stay serialized.
+    """
 
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, persistence: PersistenceExecutor | None = None):
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self.history_index = HistoryIndex(self.history_file)
+        self.persistence = persistence or get_persistence()
 
     def read_long_term(self) -> str:
         if self.memory_file.exists():
@@ -56,11 +266,37 @@ class MemoryStore:
         return ""
 
     def write_long_term(self, content: str) -> None:
-        self.memory_file.write_text(content, encoding="utf-8")
+        # Write a temp file and rename it over MEMORY.md so readers never see a partial file.
+        tmp = self.memory_file.with_suffix(".md.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+            finish_write(f, self.persistence.durability)
+        os.replace(tmp, self.memory_file)
+
+    def apply_memory_ops(self, ops: list[dict[str, Any]]) -> int:
+        """
+        Patch MEMORY.md with keyed add/replace/delete operations.
+
+        The file is re-read right before patching, and ``consolidate`` queues
+        this behind every other MEMORY.md write, so concurrent consolidations
+        never overwrite each other's changes.
+        Returns the number of entries changed.
+        """
+        doc = MemoryDocument.parse(self.read_long_term())
+        changed = doc.apply(ops)
+        if changed:
+            self.write_long_term(doc.render())
+        return changed
 
     def append_history(self, entry: str) -> None:
         with open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
+            finish_write(f, self.persistence.durability)
+        try:
+            self.history_index.sync()
+        except Exception as e:
+            # The log is the source of truth; the index catches up on the next sync.
+            logger.warning("History index update failed: {}", e)
 
     def get_memory_context(self) -> str:
         long_term = self.read_long_term()
@@ -74,9 +310,22 @@ class MemoryStore:
         *,
         archive_all: bool = False,
         memory_window: int = 50,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        max_parallel: int = DEFAULT_MAX_PARALLEL_CHUNKS,
+        structured: bool = False,
     ) -> bool:
         """Consolidate old messages into MEMORY.md + HISTORY.md via LLM tool call.
 
+        Backlogs larger than ``chunk_tokens`` are map-reduced: each chunk is
+        summarized separately (``max_parallel`` at a time), then the extracted
+        facts are merged into MEMORY.md in batches of up to ``chunk_tokens``.
+        Finished chunk summaries and merged batches are checkpointed, so a
+        retry after a failure only redoes the missing ones.
+
+        With ``structured`` the model returns keyed add/replace/delete
+        operations (see MemoryDocument) instead of the whole memory, so the
+        output size depends on what changed rather than on MEMORY.md's size.
+
         Returns True on success (including no-op), False on failure.
         """
         if archive_all:
@@ -102,7 +351,31 @@ class MemoryStore:
             lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
 
         current_memory = self.read_long_term()
-        prompt = f"""Process this conversation and call the save_memory tool with your consolidation.
+        try:
+            chunks = self._chunk_lines(lines, chunk_tokens)
+            backlog_tokens = sum(estimate_tokens(line) for line in lines) + estimate_tokens(current_memory)
+            if backlog_tokens > chunk_tokens:
+                ok = await self._consolidate_chunked(
+                    session.key, chunks, current_memory, provider, model, max_parallel, structured,
+                    chunk_tokens=chunk_tokens,
+                )
+            else:
+                ok = await self._consolidate_single(lines, current_memory, provider, model, structured)
+            if not ok:
+                return False
+
+            session.last_consolidated = 0 if archive_all else len(session.messages) - keep_count
+            logger.info("Memory consolidation done: {} messages, last_consolidated={}", len(session.messages), session.last_consolidated)
+            return True
+        except Exception:
+            logger.exception("Memory consolidation failed")
+            return False
+
+    async def _consolidate_single(
+        self, lines: list[str], current_memory: str, provider: LLMProvider, model: str, structured: bool = False,
+    ) -> bool:
+        """Consolidate a backlog that fits in one call."""
+        prompt = f"""Process this conversation and call the save_memory tool with your consolidation.{_STRUCTURED_HINT if structured else ""}
 
 ## Current Long-term Memory
 {current_memory or "(empty)"}
@@ -110,34 +383,181 @@ class MemoryStore:
 ## Conversation to Process
 {chr(10).join(lines)}"""
 
-        try:
-            response = await provider.chat(
-                messages=[
-                    {"role": "system", "content": "You are a memory consolidation agent. Call the save_memory tool with your consolidation of the conversation."},
-                    {"role": "user", "content": prompt},
-                ],
-                tools=_SAVE_MEMORY_TOOL,
-                model=model,
+        args = await self._call_tool(provider, model, prompt, _SAVE_MEMORY_OPS_TOOL if structured else _SAVE_MEMORY_TOOL)
+        if args is None:
+            return False
+        if entry := self._as_text(args.get("history_entry")):
+            await self.persistence.run(self.history_file, self.append_history, entry)
+        if structured:
+            await self._apply_ops_arg(args.get("memory_ops"))
+        elif update := self._as_text(args.get("memory_update")):
+            if update != current_memory:
+                await self.persistence.run(self.memory_file, self.write_long_term, update)
+        return True
+
+    async def _consolidate_chunked(
+        self,
+        session_key: str,
+        chunks: list[list[str]],
+        current_memory: str,
+        provider: LLMProvider,
+        model: str,
+        max_parallel: int,
+        structured: bool = False,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    ) -> bool:
+        """
+        Map: summarize chunks concurrently (checkpointed). Reduce: merge their
+        facts into MEMORY.md a ``chunk_tokens`` batch at a time, each batch
+        against the memory the previous one produced (also checkpointed).
+        """
+        checkpoint_file = self._checkpoint_file(session_key)
+        done: dict[str, dict[str, str]] = self._load_checkpoint(checkpoint_file)
+        keys = [hashlib.sha1("\n".join(chunk).encode("utf-8")).hexdigest() for chunk in chunks]
+        pending = [(i, key) for i, key in enumerate(keys) if key not in done]
+        logger.info(
+            "Memory consolidation: {} chunks ({} from checkpoint), up to {} in parallel",
+            len(chunks), len(chunks) - len(pending), max_parallel,
+        )
+
+        semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+        async def _map(i: int, key: str) -> bool:
+            async with semaphore:
+                prompt = (
+                    f"This is part {i + 1} of {len(chunks)} of a long conversation. Summarize it and "
+                    f"call the save_chunk_summary tool.\n\n## Conversation Part\n" + "\n".join(chunks[i])
+                )
+                try:
+                    args = await self._call_tool(provider, model, prompt, _SAVE_CHUNK_TOOL)
+                except Exception:
+                    logger.exception("Memory consolidation: chunk {} failed", i + 1)
+                    return False
+                if args is None:
+                    return False
+                done[key] = {
+                    "history_entry": self._as_text(args.get("history_entry")),
+                    "facts": self._as_text(args.get("facts")),
+                }
+                await self.persistence.run(checkpoint_file, self._save_checkpoint, checkpoint_file, dict(done))
+                return True
+
+        results = await asyncio.gather(*(_map(i, key) for i, key in pending))
+        if not all(results):
+            logger.warning(
+                "Memory consolidation: {}/{} chunks failed; finished chunks are checkpointed",
+                results.count(False), len(chunks),
             )
+            return False
+
+        unmerged = [(i, key) for i, key in enumerate(keys) if done[key]["facts"].strip() and not done[key].get("merged")]
+        batches = self._chunk_lines([f"### Part {i + 1}\n{done[key]['facts']}" for i, key in unmerged], chunk_tokens)
+        tool = _SAVE_MEMORY_OPS_UPDATE_TOOL if structured else _SAVE_MEMORY_UPDATE_TOOL
+        memory = current_memory
+        start = 0
+        for n, batch in enumerate(batches, 1):
+            prompt = f"""Merge the new facts below into the long-term memory and call the save_memory_update tool.{_STRUCTURED_HINT if structured else ""}
 
-            if not response.has_tool_calls:
-                logger.warning("Memory consolidation: LLM did not call save_memory, skipping")
+## Current Long-term Memory
+{memory or "(empty)"}
+
+## New Facts (oldest part first)
+{chr(10).join(batch)}"""
+            args = await self._call_tool(provider, model, prompt, tool)
+            if args is None:
                 return False
+            if structured:
+                await self._apply_ops_arg(args.get("memory_ops"))
+                memory = self.read_long_term()
+            else:
+                update = self._as_text(args.get("memory_update"))
+                if update and update != memory:
+                    await self.persistence.run(self.memory_file, self.write_long_term, update)
+                    memory = update
+            for _, key in unmerged[start:start + len(batch)]:
+                done[key]["merged"] = "1"
+            start += len(batch)
+            await self.persistence.run(checkpoint_file, self._save_checkpoint, checkpoint_file, dict(done))
+            logger.info("Memory consolidation: merged fact batch {}/{}", n, len(batches))
 
-            args = response.tool_calls[0].arguments
-            if entry := args.get("history_entry"):
-                if not isinstance(entry, str):
-                    entry = json.dumps(entry, ensure_ascii=False)
-                self.append_history(entry)
-            if update := args.get("memory_update"):
-                if not isinstance(update, str):
-                    update = json.dumps(update, ensure_ascii=False)
-                if update != current_memory:
-                    self.write_long_term(update)
+        for key in keys:
+            if entry := done[key]["history_entry"]:
+                await self.persistence.run(self.history_file, self.append_history, entry)
+        checkpoint_file.unlink(missing_ok=True)
+        return True
 
-            session.last_consolidated = 0 if archive_all else len(session.messages) - keep_count
-            logger.info("Memory consolidation done: {} messages, last_consolidated={}", len(session.messages), session.last_consolidated)
-            return True
-        except Exception:
-            logger.exception("Memory consolidation failed")
-            return False
+    @staticmethod
+    async def _call_tool(
+        provider: LLMProvider, model: str, prompt: str, tool: list[dict[str, Any]],
+    ) -> dict[str, Any] | None:
+        """Ask for one consolidation tool call; returns its arguments, or None if the model did not call it."""
+        name = tool[0]["function"]["name"]
+        response = await provider.chat(
+            messages=[
+                {"role": "system", "content": _CONSOLIDATION_SYSTEM.format(tool=name)},
+                {"role": "user", "content": prompt},
+            ],
+            tools=tool,
+            model=model,
+        )
+        if not response.has_tool_calls:
+            logger.warning("Memory consolidation: LLM did not call {}, skipping", name)
+            return None
+        return response.tool_calls[0].arguments
+
+    async def _apply_ops_arg(self, ops: Any) -> None:
+        if isinstance(ops, str):
+            try:
+                ops = json.loads(ops)
+            except json.JSONDecodeError:
+                ops = None
+        if not isinstance(ops, list):
+            if ops is not None:
+                logger.warning("Memory consolidation: memory_ops is not a list, skipping")
+            return
+        changed = await self.persistence.run(self.memory_file, self.apply_memory_ops, ops)
+        logger.info("Memory consolidation: {} of {} memory operation(s) changed MEMORY.md", changed, len(ops))
+
+    @staticmethod
+    def _as_text(value: Any) -> str:
+        if value is None:
+            return ""
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    @staticmethod
+    def _chunk_lines(lines: list[str], chunk_tokens: int) -> list[list[str]]:
+        """Group lines into chunks of at most ``chunk_tokens`` (a single oversized line is cut)."""
+        chunks: list[list[str]] = []
+        current: list[str] = []
+        size = 0
+        for line in lines:
+            tokens = estimate_tokens(line)
+            if tokens > chunk_tokens:
+                line = line[:len(line) * chunk_tokens // tokens] + " ... (truncated)"
+                tokens = chunk_tokens
+            if current and size + tokens > chunk_tokens:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(line)
+            size += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _checkpoint_file(self, session_key: str) -> Path:
+        return self.memory_dir / ".consolidation" / f"{safe_filename(session_key.replace(':', '_'))}.json"
+
+    @staticmethod
+    def _load_checkpoint(path: Path) -> dict[str, dict[str, str]]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return data.get("chunks", {}) if isinstance(data, dict) else {}
+
+    @staticmethod
+    def _save_checkpoint(path: Path, chunks: dict[str, dict[str, str]]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"chunks": chunks}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,140 @@
+"""Query-relevant retrieval of long-term memory entries."""
+
+from __future__ import annotations
+
+import math
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+from nanobot.agent.memory import MemoryDocument
+from nanobot.utils.text import tokenize
+
+# Sections that are always injected in full, whatever the query
+PINNED_SECTIONS = ("core", "pinned")
+_HASH_DIM = 1 << 18  # Feature space for hashed terms; collisions are rare at this size
+
+
+@dataclass(frozen=True)
+class MemoryEntry:
+    """One retrievable unit of MEMORY.md (a keyed fact, bullet or paragraph)."""
+    section: str
+    text: str  # As written in MEMORY.md (e.g. "- [editor] Prefers Vim")
+    order: int  # Position in the file, to render hits in their original order
+
+
+def split_memory(text: str) -> tuple[str, list[MemoryEntry]]:
+    """
+    Split MEMORY.md into a pinned part and retrievable entries.
+
+    The preamble (text before the first ``##`` heading) and sections named
+    "Core" or "Pinned" are pinned. Elsewhere each keyed entry or bullet line is
+    one entry, and other consecutive lines form a paragraph entry.
+    """
+    doc = MemoryDocument.parse(text)
+    pinned = ["\n".join(doc.preamble).strip()]
+    entries: list[MemoryEntry] = []
+    for name, items in doc.sections.items():
+        lines = [f"- [{key}] {value}" if key is not None else value for key, value in items]
+        if name.strip().lower() in PINNED_SECTIONS:
+            pinned.append(f"## {name}\n" + "\n".join(lines).strip())
+            continue
+        paragraph: list[str] = []
+
+        def _flush() -> None:
+            if paragraph:
+                entries.append(MemoryEntry(name, "\n".join(paragraph), len(entries)))
+                paragraph.clear()
+
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                _flush()
+            elif stripped.startswith(("- ", "* ")):
+                _flush()
+                entries.append(MemoryEntry(name, line, len(entries)))
+            else:
+                paragraph.append(line)
+        _flush()
+    return "\n\n".join(p for p in pinned if p), entries
+
+
+def _features(text: str) -> Counter[int]:
+    return Counter(zlib.crc32(t.encode("utf-8")) % _HASH_DIM for t in tokenize(text))
+
+
+class MemoryRetriever:
+    """
+    TF-IDF over hashed terms, maintained incrementally.
+
+    ``sync`` only vectorizes entries it has not seen and drops vanished ones,
+    updating document frequencies as it goes, so an edit to MEMORY.md costs
+    work proportional to the change. Pure Python; no NumPy needed.
+    """
+
+    def __init__(self) -> None:
+        # Keyed by (section, text) rather than position, so inserting an entry
+        # doesn't re-vectorize everything after it.
+        self._vectors: dict[tuple[str, str], Counter[int]] = {}
+        self._df: Counter[int] = Counter()
+        self._entries: list[MemoryEntry] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def entries(self) -> list[MemoryEntry]:
+        return list(self._entries)
+
+    def sync(self, entries: list[MemoryEntry]) -> None:
+        current = {(e.section, e.text) for e in entries}
+        for key in [k for k in self._vectors if k not in current]:
+            self._df.subtract(self._vectors.pop(key).keys())
+        for entry in entries:
+            key = (entry.section, entry.text)
+            if key not in self._vectors:
+                vec = _features(f"{entry.section} {entry.text}")
+                self._vectors[key] = vec
+                self._df.update(vec.keys())
+        self._df = +self._df  # Drop zero counts
+        self._entries = list(entries)
+
+    def _weights(self, vec: Counter[int]) -> dict[int, float]:
+        n = len(self._entries)
+        return {f: (1 + math.log(tf)) * math.log(1 + n / (1 + self._df.get(f, 0))) for f, tf in vec.items()}
+
+    def top_k(self, query: str, k: int) -> list[MemoryEntry]:
+        """The ``k`` entries most similar to the query (cosine), best first; non-matching entries are left out."""
+        q = self._weights(_features(query))
+        q_norm = math.sqrt(sum(w * w for w in q.values()))
+        if not q_norm:
+            return []
+        scored = []
+        for entry in self._entries:
+            vec = self._vectors[(entry.section, entry.text)]
+            if not any(f in q for f in vec):
+                continue
+            d = self._weights(vec)
+            d_norm = math.sqrt(sum(w * w for w in d.values()))
+            score = sum(w * d.get(f, 0.0) for f, w in q.items()) / (q_norm * d_norm)
+            if score > 0:
+                scored.append((score, entry))
+        scored.sort(key=lambda item: (-item[0], item[1].order))
+        return [entry for _, entry in scored[:k]]
+
+
+def render_memory(pinned: str, entries: list[MemoryEntry], omitted: int) -> str:
+    """Render the pinned part plus selected entries (in file order, grouped by section)."""
+    parts = [pinned] if pinned else []
+    section = None
+    lines: list[str] = []
+    for entry in sorted(entries, key=lambda e: e.order):
+        if entry.section != section:
+            section = entry.section
+            lines.append(f"## {section}")
+        lines.append(entry.text)
+    if lines:
+        parts.append("\n".join(lines))
+    if omitted:
+        parts.append(f"({omitted} less relevant entries omitted; read MEMORY.md for everything)")
+    return "\n\n".join(parts)
@@ -0,0 +1,109 @@
+"""Detect repeated and oscillating tool calls within one agent turn."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+
+class ToolRepeatGuard:
+    """
+    Turn-local bookkeeping of tool calls, fingerprinted by (tool, arguments).
+
+    - An exact repeat of a read-only call is answered with the earlier result
+      (``reuse``) instead of running the tool again. Any call to a tool that
+      isn't read-only may change what reads return, so it clears those results.
+    - From the ``hint_after``-th identical call in a row that also returned an
+      identical result, the result carries a note telling the model it is
+      repeating itself.
+    - When the per-iteration pattern of calls and their results cycles with
+      period 1 or 2 (A A A …, or A B A B …) for ``abort_cycles`` cycles,
+      ``end_iteration`` reports an oscillation so the loop can stop early.
+
+    Results are part of both checks, so polling a tool whose output keeps
+    changing (a job's status, a growing log) is not mistaken for a loop.
+
+    ``hint_after`` / ``abort_cycles`` of 0 turn the respective check off.
+    """
+
+    def __init__(self, hint_after: int = 3, abort_cycles: int = 4):
+        self.hint_after = hint_after
+        self.abort_cycles = abort_cycles
+        self._counts: dict[str, int] = {}
+        self._results: dict[str, str] = {}  # Read-only results, valid until the next non-read-only call
+        self._digests: dict[str, str] = {}  # Fingerprint of each call's latest result
+        self._unchanged: dict[str, int] = {}  # Consecutive calls with that same result
+        self._pattern: list[tuple[tuple[str, str], ...]] = []  # (call, result) fingerprints per iteration
+        self.repeated_calls = 0
+        self.reused_results = 0
+        self.hints = 0
+        self.wasted_iterations = 0
+        self.aborted = False
+
+    @staticmethod
+    def fingerprint(name: str, arguments: dict[str, Any]) -> str:
+        return name + ":" + json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _digest(result: Any) -> str:
+        text = result if isinstance(result, str) else repr(result)
+        return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+    def reuse(self, key: str) -> str | None:
+        """Result of an earlier identical read-only call, still valid, if any."""
+        return self._results.get(key)
+
+    def record(self, name: str, key: str, result: str, read_only: bool, reused: bool) -> str:
+        """Count a completed call; returns the result to hand to the model."""
+        count = self._counts[key] = self._counts.get(key, 0) + 1
+        if count > 1:
+            self.repeated_calls += 1
+        if reused:
+            self.reused_results += 1
+        digest = self._digest(result)
+        same = self._digests.get(key) == digest
+        unchanged = self._unchanged[key] = self._unchanged.get(key, 0) + 1 if same else 1
+        self._digests[key] = digest
+        if not read_only:
+            self._results.clear()
+        elif isinstance(result, str) and not result.startswith("Error"):
+            self._results[key] = result
+        if self.hint_after and unchanged >= self.hint_after and isinstance(result, str):
+            self.hints += 1
+            result += (
+                f"\n\n[Note: this is call #{count} to {name} with exactly these arguments in this turn, "
+                "and the result has not changed. Use it, or try a different approach.]"
+            )
+        return result
+
+    def count(self, key: str) -> int:
+        return self._counts.get(key, 0)
+
+    def end_iteration(self, keys: list[str]) -> bool:
+        """Record one iteration's calls; returns True once the pattern is oscillating."""
+        if keys and all(self._unchanged.get(k, 0) > 1 for k in keys):
+            self.wasted_iterations += 1
+        self._pattern.append(tuple((k, self._digests.get(k, "")) for k in keys))
+        if not self.abort_cycles:
+            return False
+        for period in (1, 2):
+            span = period * self.abort_cycles
+            if len(self._pattern) < span:
+                continue
+            recent = self._pattern[-span:]
+            if period == 2 and recent[-1] == recent[-2]:
+                continue
+            if all(recent[i] == recent[i % period] for i in range(span)):
+                self.aborted = True
+                return True
+        return False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "repeated_calls": self.repeated_calls,
+            "reused_results": self.reused_results,
+            "repeat_hints": self.hints,
+            "wasted_iterations": self.wasted_iterations,
+            "oscillation_aborted": self.aborted,
+        }
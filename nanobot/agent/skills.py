@@ -4,11 +4,39 @@ import json
 import os
 import re
 import shutil
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
+
+from nanobot.utils.helpers import file_fingerprint
+from nanobot.utils.text import BM25, tokenize
 
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
+# How long a `shutil.which` result is trusted before probing PATH again
+WHICH_TTL_S = 60.0
+# How long SKILL.md fingerprints are trusted while no skills root changed
+SKILL_STAT_TTL_S = 2.0
+
+
+@dataclass
+class _SkillEntry:
+    """One parsed SKILL.md, kept until its file changes."""
+    name: str
+    path: Path
+    source: str  # "workspace" or "builtin"
+    fingerprint: tuple[int, int] | None
+    content: str
+    body: str  # Content without frontmatter
+    metadata: dict[str, str] = field(default_factory=dict)  # Frontmatter key/values
+    nanobot_meta: dict[str, Any] = field(default_factory=dict)  # Parsed `metadata` JSON
+
+    @property
+    def always(self) -> bool:
+        return bool(self.nanobot_meta.get("always") or self.metadata.get("always"))
+
 
 class SkillsLoader:
     """
@@ -16,12 +44,148 @@ class SkillsLoader:
     
     Skills are markdown files (SKILL.md) that teach the agent how to use
     specific tools or perform certain tasks.
+    
+    Skills are kept in an in-memory index: each SKILL.md is read and parsed
+    once, and re-parsed only when its (mtime, size) fingerprint changes. Each
+    refresh stats only the skills roots; a root is re-listed when its
+    directory mtime changes. The SKILL.md files are re-stated after that, or
+    when ``SKILL_STAT_TTL_S`` seconds have passed, since an in-place edit of
+    a SKILL.md doesn't touch the root. Binary lookups for requirements are
+    memoized for ``WHICH_TTL_S`` seconds.
     """
     
     def __init__(self, workspace: Path, builtin_skills_dir: Path | None = None):
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        self._root_fingerprints: dict[Path, tuple[int, int] | None] = {}
+        self._root_dirs: dict[Path, list[Path]] = {}
+        self._files_checked_at = float("-inf")  # time.monotonic() of the last SKILL.md stat pass
+        self._entries: dict[Path, _SkillEntry] = {}  # SKILL.md path -> entry
+        self._index: dict[str, _SkillEntry] = {}  # Name -> winning entry (workspace over builtin)
+        self._which_cache: dict[str, tuple[bool, float]] = {}
+        self._ranker: tuple[int, list[str], BM25] | None = None  # (generation, names, BM25)
+        self.generation = 0  # Bumped whenever the index changes
+    
+    def _roots(self) -> list[tuple[Path, str]]:
+        roots = [(self.workspace_skills, "workspace")]
+        if self.builtin_skills:
+            roots.append((self.builtin_skills, "builtin"))
+        return roots
+    
+    def _refresh(self) -> dict[str, _SkillEntry]:
+        """Bring the index up to date, re-reading only what changed on disk."""
+        changed = False
+        for root, _ in self._roots():
+            fp = file_fingerprint(root)
+            if fp != self._root_fingerprints.get(root, ()):
+                self._root_fingerprints[root] = fp
+                self._root_dirs[root] = sorted(d for d in root.iterdir() if d.is_dir()) if fp else []
+                changed = True
+        now = time.monotonic()
+        if not changed and now - self._files_checked_at < SKILL_STAT_TTL_S:
+            return self._index
+        self._files_checked_at = now
+
+        index: dict[str, _SkillEntry] = {}
+        seen: set[Path] = set()
+        for root, source in self._roots():
+            for skill_dir in self._root_dirs[root]:
+                skill_file = skill_dir / "SKILL.md"
+                seen.add(skill_file)
+                entry = self._entries.get(skill_file)
+                fp = file_fingerprint(skill_file)
+                if entry is None and fp is None:
+                    continue  # Not a skill (no SKILL.md)
+                if entry is None or entry.fingerprint != fp:
+                    entry = self._parse(skill_dir.name, skill_file, source, fp) if fp else None
+                    if entry is None:
+                        self._entries.pop(skill_file, None)
+                    else:
+                        self._entries[skill_file] = entry
+                    changed = True
+                if entry is not None and entry.name not in index:
+                    index[entry.name] = entry
+        for stale in set(self._entries) - seen:
+            del self._entries[stale]
+            changed = True
+        if changed:
+            self._index = index
+            self.generation += 1
+        return self._index
+    
+    def _parse(self, name: str, path: Path, source: str, fingerprint: tuple[int, int]) -> _SkillEntry | None:
+        """Read and parse one SKILL.md in a single pass."""
+        try:
+            content = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+        metadata: dict[str, str] = {}
+        body = content
+        if content.startswith("---"):
+            match = re.match(r"^---\n(.*?)\n---\n?", content, re.DOTALL)
+            if match:
+                # Simple YAML parsing
+                for line in match.group(1).split("\n"):
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        metadata[key.strip()] = value.strip().strip('"\'')
+                body = content[match.end():].strip()
+        return _SkillEntry(
+            name=name,
+            path=path,
+            source=source,
+            fingerprint=fingerprint,
+            content=content,
+            body=body,
+            metadata=metadata,
+            nanobot_meta=self._parse_nanobot_metadata(metadata.get("metadata", "")),
+        )
+    
+    def _which(self, binary: str) -> bool:
+        """Memoized ``shutil.which`` probe."""
+        now = time.monotonic()
+        cached = self._which_cache.get(binary)
+        if cached is not None and now - cached[1] < WHICH_TTL_S:
+            return cached[0]
+        found = shutil.which(binary) is not None
+        self._which_cache[binary] = (found, now)
+        return found
+    
+    def fingerprint(self) -> tuple:
+        """
+        Cheap token that changes whenever the skills prompt sections may change.
+        
+        Covers the index itself plus the current outcome of every requirement
+        check, so a newly installed binary or exported env var is picked up.
+        """
+        index = self._refresh()
+        bins = sorted({b for e in index.values() for b in e.nanobot_meta.get("requires", {}).get("bins", [])})
+        envs = sorted({v for e in index.values() for v in e.nanobot_meta.get("requires", {}).get("env", [])})
+        return (
+            self.generation,
+            tuple(self._which(b) for b in bins),
+            tuple(bool(os.environ.get(v)) for v in envs),
+        )
+    
+    def rank(self, query: str, k: int) -> list[str]:
+        """
+        Names of the ``k`` skills most relevant to a query (BM25).
+        
+        Each skill is indexed by its name (weighted double), description and
+        markdown headings. Skills that share no terms with the query are left out.
+        """
+        index = self._refresh()
+        if self._ranker is None or self._ranker[0] != self.generation:
+            names = sorted(index)
+            docs = []
+            for name in names:
+                entry = index[name]
+                headings = " ".join(line.lstrip("#") for line in entry.body.splitlines() if line.startswith("#"))
+                docs.append(tokenize(f"{name} {name} {entry.metadata.get('description', '')} {headings}"))
+            self._ranker = (self.generation, names, BM25(docs))
+        _, names, bm25 = self._ranker
+        return [names[i] for i, _ in bm25.top_k(tokenize(query), k)]
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -33,28 +197,13 @@ class SkillsLoader:
         Returns:
             List of skill info dicts with 'name', 'path', 'source'.
         """
-        skills = []
-        
-        # Workspace skills (highest priority)
-        if self.workspace_skills.exists():
-            for skill_dir in self.workspace_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists():
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "workspace"})
-        
-        # Built-in skills
-        if self.builtin_skills and self.builtin_skills.exists():
-            for skill_dir in self.builtin_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists() and not any(s["name"] == skill_dir.name for s in skills):
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "builtin"})
-        
-        # Filter by requirements
-        if filter_unavailable:
-            return [s for s in skills if self._check_requirements(self._get_skill_meta(s["name"]))]
-        return skills
+        # Workspace skills come first (highest priority), then built-in ones
+        entries = sorted(self._refresh().values(), key=lambda e: e.source != "workspace")
+        return [
+            {"name": e.name, "path": str(e.path), "source": e.source}
+            for e in entries
+            if not filter_unavailable or self._check_requirements(e.nanobot_meta)
+        ]
     
     def load_skill(self, name: str) -> str | None:
         """
@@ -66,18 +215,8 @@ class SkillsLoader:
         Returns:
             Skill content or None if not found.
         """
-        # Check workspace first
-        workspace_skill = self.workspace_skills / name / "SKILL.md"
-        if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
-        
-        # Check built-in
-        if self.builtin_skills:
-            builtin_skill = self.builtin_skills / name / "SKILL.md"
-            if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
-        
-        return None
+        entry = self._refresh().get(name)
+        return entry.content if entry else None
     
     def load_skills_for_context(self, skill_names: list[str]) -> str:
         """
@@ -89,48 +228,49 @@ class SkillsLoader:
         Returns:
             Formatted skills content.
         """
+        index = self._refresh()
         parts = []
         for name in skill_names:
-            content = self.load_skill(name)
-            if content:
-                content = self._strip_frontmatter(content)
-                parts.append(f"### Skill: {name}\n\n{content}")
+            entry = index.get(name)
+            if entry:
+                parts.append(f"### Skill: {name}\n\n{entry.body}")
         
         return "\n\n---\n\n".join(parts) if parts else ""
     
-    def build_skills_summary(self) -> str:
+    def build_skills_summary(self, names: list[str] | None = None) -> str:
         """
         Build a summary of all skills (name, description, path, availability).
         
         This is used for progressive loading - the agent can read the full
         skill content using read_file when needed.
         
+        Args:
+            names: Only include these skills (default: all).
+        
         Returns:
             XML-formatted skills summary.
         """
-        all_skills = self.list_skills(filter_unavailable=False)
-        if not all_skills:
+        entries = sorted(self._refresh().values(), key=lambda e: e.source != "workspace")
+        if names is not None:
+            entries = [e for e in entries if e.name in names]
+        if not entries:
             return ""
         
         def escape_xml(s: str) -> str:
             return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
         
         lines = ["<skills>"]
-        for s in all_skills:
-            name = escape_xml(s["name"])
-            path = s["path"]
-            desc = escape_xml(self._get_skill_description(s["name"]))
-            skill_meta = self._get_skill_meta(s["name"])
-            available = self._check_requirements(skill_meta)
+        for e in entries:
+            available = self._check_requirements(e.nanobot_meta)
             
             lines.append(f"  <skill available=\"{str(available).lower()}\">")
-            lines.append(f"    <name>{name}</name>")
-            lines.append(f"    <description>{desc}</description>")
-            lines.append(f"    <location>{path}</location>")
+            lines.append(f"    <name>{escape_xml(e.name)}</name>")
+            lines.append(f"    <description>{escape_xml(e.metadata.get('description') or e.name)}</description>")
+            lines.append(f"    <location>{e.path}</location>")
             
             # Show missing requirements for unavailable skills
             if not available:
-                missing = self._get_missing_requirements(skill_meta)
+                missing = self._get_missing_requirements(e.nanobot_meta)
                 if missing:
                     lines.append(f"    <requires>{escape_xml(missing)}</requires>")
             
@@ -144,28 +284,13 @@ class SkillsLoader:
         missing = []
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self._which(b):
                 missing.append(f"CLI: {b}")
         for env in requires.get("env", []):
             if not os.environ.get(env):
                 missing.append(f"ENV: {env}")
         return ", ".join(missing)
     
-    def _get_skill_description(self, name: str) -> str:
-        """Get the description of a skill from its frontmatter."""
-        meta = self.get_skill_metadata(name)
-        if meta and meta.get("description"):
-            return meta["description"]
-        return name  # Fallback to skill name
-    
-    def _strip_frontmatter(self, content: str) -> str:
-        """Remove YAML frontmatter from markdown content."""
-        if content.startswith("---"):
-            match = re.match(r"^---\n.*?\n---\n", content, re.DOTALL)
-            if match:
-                return content[match.end():].strip()
-        return content
-    
     def _parse_nanobot_metadata(self, raw: str) -> dict:
         """Parse skill metadata JSON from frontmatter (supports nanobot and openclaw keys)."""
         try:
@@ -178,27 +303,19 @@ class SkillsLoader:
         """Check if skill requirements are met (bins, env vars)."""
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self._which(b):
                 return False
         for env in requires.get("env", []):
             if not os.environ.get(env):
                 return False
         return True
     
-    def _get_skill_meta(self, name: str) -> dict:
-        """Get nanobot metadata for a skill (cached in frontmatter)."""
-        meta = self.get_skill_metadata(name) or {}
-        return self._parse_nanobot_metadata(meta.get("metadata", ""))
-    
     def get_always_skills(self) -> list[str]:
         """Get skills marked as always=true that meet requirements."""
-        result = []
-        for s in self.list_skills(filter_unavailable=True):
-            meta = self.get_skill_metadata(s["name"]) or {}
-            skill_meta = self._parse_nanobot_metadata(meta.get("metadata", ""))
-            if skill_meta.get("always") or meta.get("always"):
-                result.append(s["name"])
-        return result
+        return [
+            e.name for e in sorted(self._refresh().values(), key=lambda e: e.source != "workspace")
+            if e.always and self._check_requirements(e.nanobot_meta)
+        ]
     
     def get_skill_metadata(self, name: str) -> dict | None:
         """
@@ -210,19 +327,7 @@ class SkillsLoader:
         Returns:
             Metadata dict or None.
         """
-        content = self.load_skill(name)
-        if not content:
+        entry = self._refresh().get(name)
+        if entry is None or not entry.metadata:
             return None
-        
-        if content.startswith("---"):
-            match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
-            if match:
-                # Simple YAML parsing
-                metadata = {}
-                for line in match.group(1).split("\n"):
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        metadata[key.strip()] = value.strip().strip('"\'')
-                return metadata
-        
-        return None
+        return dict(entry.metadata)
@@ -39,6 +39,44 @@ class Tool(ABC):
         """JSON Schema for tool parameters."""
         pass
     
+    @property
+    def concurrency_safe(self) -> bool:
+        """
+        Whether calls to this tool may run concurrently with other safe calls.
+
+        Only side-effect-free tools (pure reads) should return True.
+        """
+        return False
+
+    @property
+    def cacheable(self) -> bool:
+        """
+        Whether results may be served from the registry's result cache.
+
+        Cacheable tools must be pure reads whose result depends only on their
+        arguments and on the state described by cache_fingerprint().
+        """
+        return False
+
+    @property
+    def cache_ttl(self) -> float | None:
+        """Seconds a cached result stays valid (None = until the fingerprint changes)."""
+        return None
+
+    @property
+    def cache_invalidates(self) -> tuple[str, ...]:
+        """Names of cacheable tools whose entries are dropped after this tool runs."""
+        return ()
+
+    def cache_fingerprint(self, params: dict[str, Any]) -> Any:
+        """
+        Token describing the state a result depends on (e.g. file mtime and size).
+
+        A cached result is reused only while the fingerprint is unchanged.
+        Returning None skips the cache for this call.
+        """
+        return ""
+
     @abstractmethod
     async def execute(self, **kwargs: Any) -> str:
         """
@@ -0,0 +1,89 @@
+"""LRU cache for results of read-only tools."""
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class _CacheEntry:
+    fingerprint: Any
+    result: str
+    expires_at: float | None
+
+
+class ToolResultCache:
+    """
+    Bounded LRU cache of tool results.
+
+    Entries are keyed by tool name and canonical (sorted-key JSON) arguments.
+    Each entry stores the fingerprint the tool reported when it was filled
+    (e.g. file mtime and size); a lookup with a different fingerprint, or
+    after the entry's TTL, is a miss.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(name: str, params: dict[str, Any]) -> tuple[str, str]:
+        return name, json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, name: str, params: dict[str, Any], fingerprint: Any) -> str | None:
+        """Return the cached result if it is still valid, counting a hit or miss."""
+        key = self.make_key(name, params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expired = entry.expires_at is not None and time.monotonic() >= entry.expires_at
+            if expired or entry.fingerprint != fingerprint:
+                del self._entries[key]
+                self.invalidations += 1
+                entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.result
+
+    def put(self, name: str, params: dict[str, Any], fingerprint: Any, result: str, ttl: float | None = None) -> None:
+        """Store a result, evicting the least recently used entries beyond the bound."""
+        if self.max_entries <= 0:
+            return
+        key = self.make_key(name, params)
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = _CacheEntry(fingerprint, result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, name: str | None = None) -> int:
+        """Drop all entries for a tool (or every entry). Returns how many were dropped."""
+        keys = [k for k in self._entries if name is None or k[0] == name]
+        for key in keys:
+            del self._entries[key]
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.utils.helpers import file_fingerprint
 
 
 def _resolve_path(path: str, workspace: Path | None = None, allowed_dir: Path | None = None) -> Path:
@@ -49,6 +50,20 @@ class ReadFileTool(Tool):
             "required": ["path"]
         }
     
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+    
+    @property
+    def cacheable(self) -> bool:
+        return True
+    
+    def cache_fingerprint(self, params: dict[str, Any]) -> Any:
+        try:
+            return file_fingerprint(_resolve_path(params["path"], self._workspace, self._allowed_dir))
+        except (KeyError, PermissionError):
+            return None
+    
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             file_path = _resolve_path(path, self._workspace, self._allowed_dir)
@@ -221,6 +236,21 @@ class ListDirTool(Tool):
             "required": ["path"]
         }
     
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+    
+    @property
+    def cacheable(self) -> bool:
+        return True
+    
+    def cache_fingerprint(self, params: dict[str, Any]) -> Any:
+        # A directory's mtime changes whenever an entry is added, removed or renamed.
+        try:
+            return file_fingerprint(_resolve_path(params["path"], self._workspace, self._allowed_dir))
+        except (KeyError, PermissionError):
+            return None
+    
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             dir_path = _resolve_path(path, self._workspace, self._allowed_dir)
@@ -0,0 +1,98 @@
+"""History search tool."""
+
+import re
+from typing import Any
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.base import Tool
+from nanobot.utils.helpers import file_fingerprint
+
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class HistorySearchTool(Tool):
+    """Ranked full-text search over memory/HISTORY.md."""
+
+    _MAX_ENTRY_CHARS = 1000
+
+    def __init__(self, store: MemoryStore):
+        self._store = store
+
+    @property
+    def name(self) -> str:
+        return "history_search"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search past conversation summaries in memory/HISTORY.md. Returns the best-matching "
+            "entries, most relevant first. Use since/until (YYYY-MM-DD) to restrict by date; "
+            "omit query to list the newest entries in that range."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords to search for"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Earliest date to include (YYYY-MM-DD)"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Latest date to include (YYYY-MM-DD, inclusive)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of entries to return",
+                    "minimum": 1,
+                    "maximum": 50
+                }
+            }
+        }
+
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+    def cache_fingerprint(self, params: dict[str, Any]) -> Any:
+        return file_fingerprint(self._store.history_file)
+
+    async def execute(
+        self,
+        query: str = "",
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 10,
+        **kwargs: Any,
+    ) -> str:
+        for label, value in (("since", since), ("until", until)):
+            if value and not _DATE.match(value):
+                return f"Error: {label} must be a date in YYYY-MM-DD format"
+        if not query.strip() and not (since or until):
+            return "Error: provide a query, a date range, or both"
+        try:
+            # On the persistence thread, in line with HISTORY.md appends (and off the event loop).
+            hits = await self._store.persistence.run(
+                self._store.history_file, self._store.history_index.search, query, limit, since, until,
+            )
+        except Exception as e:
+            return f"Error searching history: {e}"
+        if not hits:
+            return "No matching history entries"
+        parts = []
+        for hit in hits:
+            content = hit.content
+            if len(content) > self._MAX_ENTRY_CHARS:
+                content = content[:self._MAX_ENTRY_CHARS] + "..."
+            parts.append(content)
+        return "\n\n".join(parts)
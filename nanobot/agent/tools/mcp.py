@@ -21,6 +21,8 @@ class MCPToolWrapper(Tool):
         self._description = tool_def.description or tool_def.name
         self._parameters = tool_def.inputSchema or {"type": "object", "properties": {}}
         self._tool_timeout = tool_timeout
+        annotations = getattr(tool_def, "annotations", None)
+        self._read_only = bool(getattr(annotations, "readOnlyHint", False))
 
     @property
     def name(self) -> str:
@@ -34,6 +36,11 @@ class MCPToolWrapper(Tool):
     def parameters(self) -> dict[str, Any]:
         return self._parameters
 
+    @property
+    def concurrency_safe(self) -> bool:
+        # Trust the server's readOnlyHint annotation; unannotated tools run serially.
+        return self._read_only
+
     async def execute(self, **kwargs: Any) -> str:
         from mcp import types
         try:
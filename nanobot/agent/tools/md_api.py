@@ -11,6 +11,8 @@ from nanobot.agent.tools.base import Tool
 MD_API_BASE_URL = "http://0.0.0.0:18081"
 # Get token from environment, with a fallback default
 MD_API_TOKEN = os.getenv("MD_API_TOKEN") or "replace-with-strong-token"
+# Remote files have no cheap validator, so cached reads simply expire
+MD_READ_CACHE_TTL_S = 30.0
 
 
 class MDReadTool(Tool):
@@ -50,6 +52,18 @@ class MDReadTool(Tool):
             "required": ["path"]
         }
 
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return MD_READ_CACHE_TTL_S
+
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             client = await self._get_client()
@@ -111,6 +125,10 @@ class MDWriteTool(Tool):
             "required": ["path", "content"]
         }
 
+    @property
+    def cache_invalidates(self) -> tuple[str, ...]:
+        return ("md_read",)
+
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
         try:
             client = await self._get_client()
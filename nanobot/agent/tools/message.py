@@ -1,5 +1,6 @@
 """Message tool for sending messages to users."""
 
+from contextvars import ContextVar
 from typing import Any, Awaitable, Callable
 
 from nanobot.agent.tools.base import Tool
@@ -17,16 +18,19 @@ class MessageTool(Tool):
         default_message_id: str | None = None,
     ):
         self._send_callback = send_callback
-        self._default_channel = default_channel
-        self._default_chat_id = default_chat_id
-        self._default_message_id = default_message_id
-        self._sent_in_turn: bool = False
+        # Routing context and per-turn state live in context variables so that
+        # concurrently running turns (one asyncio task per session) don't clobber each other.
+        self._context: ContextVar[tuple[str, str, str | None]] = ContextVar(
+            f"message_tool_context_{id(self)}",
+            default=(default_channel, default_chat_id, default_message_id),
+        )
+        self._turn: ContextVar[dict[str, bool] | None] = ContextVar(
+            f"message_tool_turn_{id(self)}", default=None
+        )
 
     def set_context(self, channel: str, chat_id: str, message_id: str | None = None) -> None:
-        """Set the current message context."""
-        self._default_channel = channel
-        self._default_chat_id = chat_id
-        self._default_message_id = message_id
+        """Set the current message context (scoped to the calling task)."""
+        self._context.set((channel, chat_id, message_id))
 
     def set_send_callback(self, callback: Callable[[OutboundMessage], Awaitable[None]]) -> None:
         """Set the callback for sending messages."""
@@ -34,7 +38,13 @@ class MessageTool(Tool):
 
     def start_turn(self) -> None:
         """Reset per-turn send tracking."""
-        self._sent_in_turn = False
+        self._turn.set({"sent": False})
+
+    @property
+    def _sent_in_turn(self) -> bool:
+        """Whether the message tool already sent something in the current turn."""
+        turn = self._turn.get()
+        return bool(turn and turn["sent"])
 
     @property
     def name(self) -> str:
@@ -79,9 +89,10 @@ class MessageTool(Tool):
         media: list[str] | None = None,
         **kwargs: Any
     ) -> str:
-        channel = channel or self._default_channel
-        chat_id = chat_id or self._default_chat_id
-        message_id = message_id or self._default_message_id
+        default_channel, default_chat_id, default_message_id = self._context.get()
+        channel = channel or default_channel
+        chat_id = chat_id or default_chat_id
+        message_id = message_id or default_message_id
 
         if not channel or not chat_id:
             return "Error: No target channel/chat specified"
@@ -101,7 +112,8 @@ class MessageTool(Tool):
 
         try:
             await self._send_callback(msg)
-            self._sent_in_turn = True
+            if (turn := self._turn.get()) is not None:
+                turn["sent"] = True
             media_info = f" with {len(media)} attachments" if media else ""
             return f"Message sent to {channel}:{chat_id}{media_info}"
         except Exception as e:
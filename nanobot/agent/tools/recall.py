@@ -0,0 +1,71 @@
+"""Tool output recall tool."""
+
+from typing import Any
+
+from nanobot.agent.blobs import BlobStore
+from nanobot.agent.tools.base import Tool
+
+
+class RecallToolOutputTool(Tool):
+    """Read back a full tool output that the session history only keeps a preview of."""
+
+    _MAX_CHARS = 20000
+
+    def __init__(self, blobs: BlobStore):
+        self._blobs = blobs
+
+    @property
+    def name(self) -> str:
+        return "recall_tool_output"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Read the full output of an earlier tool call. Long tool results in the conversation "
+            "history are cut to a preview ending in 'recall_tool_output blob=<id>'; pass that id "
+            "here. Use offset to page through outputs longer than one response."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "blob": {
+                    "type": "string",
+                    "description": "Blob id from the truncated tool result"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Character offset to start reading from",
+                    "minimum": 0
+                }
+            },
+            "required": ["blob"]
+        }
+
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+
+    @property
+    def cacheable(self) -> bool:
+        # Blobs never change once written.
+        return True
+
+    async def execute(self, blob: str, offset: int = 0, **kwargs: Any) -> str:
+        blob = blob.strip().lower()
+        if not self._blobs.is_ref(blob):
+            return "Error: blob must be the 64-character id from a truncated tool result"
+        data = await self._blobs.aget(blob)
+        if data is None:
+            return f"Error: no stored output with blob id {blob}"
+        mime = self._blobs.sniff_mime(data)
+        if not mime.startswith("text/"):
+            return f"Blob {blob} is binary ({mime}, {len(data)} bytes) and cannot be shown as text"
+        text = data.decode("utf-8")
+        chunk = text[offset:offset + self._MAX_CHARS]
+        end = offset + len(chunk)
+        if end < len(text):
+            chunk += f"\n... ({len(text) - end} more chars; call again with offset={end})"
+        return chunk
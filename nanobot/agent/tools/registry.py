@@ -3,17 +3,21 @@
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.cache import ToolResultCache
 
 
 class ToolRegistry:
     """
     Registry for agent tools.
     
-    Allows dynamic registration and execution of tools.
+    Allows dynamic registration and execution of tools. When a result cache
+    is given, results of cacheable tools are served from it while their
+    fingerprint is unchanged and their TTL has not expired.
     """
     
-    def __init__(self):
+    def __init__(self, cache: ToolResultCache | None = None):
         self._tools: dict[str, Tool] = {}
+        self.cache = cache
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
@@ -31,6 +35,11 @@ class ToolRegistry:
         """Check if a tool is registered."""
         return name in self._tools
     
+    def is_concurrency_safe(self, name: str) -> bool:
+        """Check if a tool may run concurrently with other safe calls."""
+        tool = self._tools.get(name)
+        return tool is not None and tool.concurrency_safe
+
     def get_definitions(self) -> list[dict[str, Any]]:
         """Get all tool definitions in OpenAI format."""
         return [tool.to_schema() for tool in self._tools.values()]
@@ -59,9 +68,23 @@ class ToolRegistry:
             errors = tool.validate_params(params)
             if errors:
                 return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors) + _HINT
+
+            fingerprint = None
+            if self.cache is not None and tool.cacheable:
+                fingerprint = tool.cache_fingerprint(params)
+                if fingerprint is not None:
+                    cached = self.cache.get(name, params, fingerprint)
+                    if cached is not None:
+                        return cached
+
             result = await tool.execute(**params)
+            if self.cache is not None:
+                for other in tool.cache_invalidates:
+                    self.cache.invalidate(other)
             if isinstance(result, str) and result.startswith("Error"):
                 return result + _HINT
+            if fingerprint is not None and isinstance(result, str):
+                self.cache.put(name, params, fingerprint, result, ttl=tool.cache_ttl)
             return result
         except Exception as e:
             return f"Error executing {name}: {str(e)}" + _HINT
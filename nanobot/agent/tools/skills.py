@@ -0,0 +1,62 @@
+"""Skill catalogue tool."""
+
+from typing import Any
+
+from nanobot.agent.skills import SkillsLoader
+from nanobot.agent.tools.base import Tool
+
+
+class ListSkillsTool(Tool):
+    """List installed skills, optionally ranked against a search query."""
+
+    def __init__(self, loader: SkillsLoader):
+        self._loader = loader
+
+    @property
+    def name(self) -> str:
+        return "list_skills"
+
+    @property
+    def description(self) -> str:
+        return (
+            "List installed skills (name, description, SKILL.md location, availability). "
+            "The system prompt only shows the most relevant skills; use this to see the full "
+            "catalogue, or pass a query to search it."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords to rank skills by relevance (omit to list all skills)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of skills to return when a query is given",
+                    "minimum": 1,
+                    "maximum": 50
+                }
+            }
+        }
+
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+    def cache_fingerprint(self, params: dict[str, Any]) -> Any:
+        return self._loader.fingerprint()
+
+    async def execute(self, query: str | None = None, limit: int = 10, **kwargs: Any) -> str:
+        if query and query.strip():
+            names = self._loader.rank(query, limit)
+            if not names:
+                return f"No skills match: {query}"
+            return self._loader.build_skills_summary(names)
+        return self._loader.build_skills_summary() or "No skills installed"
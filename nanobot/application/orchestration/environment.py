@@ -15,14 +15,20 @@ from pathlib import Path
 
 from loguru import logger
 
+from nanobot.agent.blobs import BlobStore
+from nanobot.agent.budget import ContextBudget
 from nanobot.agent.context import ContextBuilder
 from nanobot.agent.subagent import SubagentManager
 from nanobot.agent.tools.cron import CronTool
 from nanobot.agent.tools.filesystem import EditFileTool, ListDirTool, ReadFileTool, WriteFileTool
+from nanobot.agent.tools.history import HistorySearchTool
+from nanobot.agent.tools.cache import ToolResultCache
 from nanobot.agent.tools.md_api import MDReadTool, MDWriteTool
 from nanobot.agent.tools.message import MessageTool
+from nanobot.agent.tools.recall import RecallToolOutputTool
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.skills import ListSkillsTool
 from nanobot.agent.tools.spawn import SpawnTool
 # Network tools disabled for offline deployment
 # from nanobot.agent.tools.web import WebFetchTool, WebSearchTool
@@ -47,6 +53,11 @@ class AgentOrchestrationEnvironment:
         model: str,
         temperature: float,
         max_tokens: int,
+        tool_cache_size: int = 256,
+        context_window: int = 0,
+        prompt_layout: str = "classic",
+        skills_top_k: int = 0,
+        memory_top_k: int = 0,
     ) -> None:
         self.bus = bus
         self.provider = provider
@@ -57,8 +68,16 @@ class AgentOrchestrationEnvironment:
         self.restrict_to_workspace = restrict_to_workspace
         self.mcp_servers = mcp_servers or {}
 
-        self.context = ContextBuilder(workspace)
-        self.tools = ToolRegistry()
+        budget = ContextBudget(context_window, reserve_tokens=max_tokens) if context_window > 0 else None
+        self.context = ContextBuilder(
+            workspace,
+            budget=budget,
+            layout=prompt_layout,
+            skills_top_k=skills_top_k,
+            memory_top_k=memory_top_k,
+        )
+        self.blobs = BlobStore(workspace)
+        self.tools = ToolRegistry(cache=ToolResultCache(tool_cache_size) if tool_cache_size > 0 else None)
         self.subagents = SubagentManager(
             provider=provider,
             workspace=workspace,
@@ -97,6 +116,11 @@ class AgentOrchestrationEnvironment:
         # Register md-api tools
         self.tools.register(MDReadTool())
         self.tools.register(MDWriteTool())
+        self.tools.register(HistorySearchTool(self.context.memory))
+        self.tools.register(RecallToolOutputTool(self.blobs))
+        if self.context.skills_top_k > 0:
+            # The prompt lists only the top-k skills; keep the full catalogue reachable.
+            self.tools.register(ListSkillsTool(self.context.skills))
 
     async def ensure_mcp_connected(self) -> None:
         """Connect to configured MCP servers once (lazy, retry-on-failure)."""
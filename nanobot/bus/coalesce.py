@@ -0,0 +1,175 @@
+"""Burst coalescing: merge messages that arrive close together into one."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from loguru import logger
+
+from nanobot.bus.events import InboundMessage
+
+T = TypeVar("T")
+
+
+@dataclass
+class _KeyState(Generic[T]):
+    """Buffered items and the pending flush timer for one key."""
+    items: list[T] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    timer: asyncio.Task | None = None
+    first_at: float = 0.0
+
+
+class Debouncer(Generic[T]):
+    """
+    Keyed debounce buffer.
+
+    Items added under a key are held until the key has been quiet for
+    ``delay_s`` seconds, then handed to ``on_flush(key, items, reason)`` in
+    arrival order. ``max_items`` and ``max_wait_s`` (0 = unlimited) bound how
+    much and how long a continuous burst is held before it is flushed anyway.
+    """
+
+    def __init__(
+        self,
+        delay_s: float,
+        on_flush: Callable[[str, list[T], str], Awaitable[None]],
+        max_items: int = 0,
+        max_wait_s: float = 0,
+    ):
+        self.delay_s = max(0.0, delay_s)
+        self.max_items = max_items
+        self.max_wait_s = max_wait_s
+        self._on_flush = on_flush
+        self._states: dict[str, _KeyState[T]] = {}
+
+    async def add(self, key: str, item: T) -> None:
+        """Buffer an item and (re)start the key's quiet-period timer."""
+        while True:
+            state = self._states.setdefault(key, _KeyState())
+            async with state.lock:
+                if self._states.get(key) is not state:
+                    continue  # Flushed and retired while we waited for the lock
+                if not state.items:
+                    state.first_at = time.monotonic()
+                state.items.append(item)
+                if state.timer:
+                    state.timer.cancel()
+                    state.timer = None
+                full = self.max_items > 0 and len(state.items) >= self.max_items
+                overdue = self.max_wait_s > 0 and time.monotonic() - state.first_at >= self.max_wait_s
+                if not (full or overdue):
+                    state.timer = asyncio.create_task(self._flush_after(key))
+                    return
+                break
+        await self.flush(key, reason="limit")
+
+    async def flush(self, key: str, item: T | None = None, reason: str = "flush") -> None:
+        """Flush the key now, optionally appending one last item first."""
+        while True:
+            state = self._states.get(key)
+            if state is None:
+                items = [item] if item is not None else []
+                break
+            async with state.lock:
+                if self._states.get(key) is not state:
+                    continue
+                if item is not None:
+                    state.items.append(item)
+                if state.timer and state.timer is not asyncio.current_task():
+                    state.timer.cancel()
+                state.timer = None
+                items = state.items[:]
+                # Retire the key so long-running processes don't accumulate idle state.
+                del self._states[key]
+                break
+        if items:
+            await self._on_flush(key, items, reason)
+
+    async def flush_all(self) -> None:
+        """Flush every key that has buffered items."""
+        for key in list(self._states):
+            await self.flush(key)
+
+    def cancel_all(self) -> None:
+        """Drop all buffered items without flushing them."""
+        for state in self._states.values():
+            if state.timer:
+                state.timer.cancel()
+        self._states.clear()
+
+    def pending(self, key: str) -> int:
+        """Number of items currently buffered for a key."""
+        state = self._states.get(key)
+        return len(state.items) if state else 0
+
+    async def _flush_after(self, key: str) -> None:
+        await asyncio.sleep(self.delay_s)
+        try:
+            await self.flush(key, reason="timer")
+        except Exception as e:
+            logger.error("Debounced flush for {} failed: {}", key, e)
+
+
+class InboundCoalescer:
+    """
+    Merge bursts of inbound messages per session into a single InboundMessage.
+
+    Messages with the same ``session_key`` that arrive within ``window_s`` of
+    each other are published as one turn. Slash commands are never merged:
+    they flush anything pending for the session and are published as-is.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[InboundMessage], Awaitable[None]],
+        window_s: float,
+        max_messages: int = 10,
+        max_wait_s: float = 0,
+    ):
+        self._publish = publish
+        self._debouncer: Debouncer[InboundMessage] = Debouncer(
+            window_s, self._on_flush, max_items=max_messages, max_wait_s=max_wait_s,
+        )
+
+    async def submit(self, msg: InboundMessage) -> None:
+        """Buffer a message, or publish it immediately if it is a command."""
+        if msg.content.strip().startswith("/"):
+            await self._debouncer.flush(msg.session_key)
+            await self._publish(msg)
+            return
+        await self._debouncer.add(msg.session_key, msg)
+
+    async def flush_all(self) -> None:
+        """Publish everything still buffered (e.g. on shutdown)."""
+        await self._debouncer.flush_all()
+
+    async def _on_flush(self, key: str, messages: list[InboundMessage], reason: str) -> None:
+        if len(messages) > 1:
+            logger.debug("Coalesced {} messages for {} ({})", len(messages), key, reason)
+        await self._publish(merge_inbound(messages))
+
+
+def merge_inbound(messages: list[InboundMessage]) -> InboundMessage:
+    """Combine consecutive messages from one session into one, keeping the latest routing info."""
+    if len(messages) == 1:
+        return messages[0]
+    last = messages[-1]
+    multi_sender = len({m.sender_id for m in messages}) > 1
+    lines = [
+        f"{m.sender_id}: {m.content}" if multi_sender else m.content
+        for m in messages if m.content
+    ]
+    return InboundMessage(
+        channel=last.channel,
+        sender_id=last.sender_id,
+        chat_id=last.chat_id,
+        content="\n".join(lines),
+        timestamp=last.timestamp,
+        media=[path for m in messages for path in m.media],
+        metadata={**last.metadata, "coalesced_count": len(messages)},
+        session_key_override=last.session_key_override,
+    )
@@ -1,9 +1,103 @@
 """Async message queue for decoupled channel-agent communication."""
 
 import asyncio
+from collections import deque
+from collections.abc import Callable, Hashable
+from itertools import count
+from typing import Generic, TypeVar
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 
+T = TypeVar("T")
+
+# Relative dequeue shares per lane when several lanes have messages waiting.
+INBOUND_WEIGHTS = {"interactive": 8, "system": 2}
+OUTBOUND_WEIGHTS = {"reply": 8, "progress": 1}
+
+
+class PriorityLanes(Generic[T]):
+    """
+    Unbounded queue split into weighted lanes.
+
+    Each lane is FIFO. ``get`` picks among non-empty lanes by smooth weighted
+    round-robin, so a lane with weight w gets w of every sum(weights)
+    dequeues while others are busy, and every non-empty lane is served at
+    least once per round (no starvation).
+
+    With ``order_key``, items sharing a key keep their relative order across
+    lanes: when the picked item has an earlier same-key item waiting in
+    another lane, that earlier item is returned first.
+    """
+
+    def __init__(self, weights: dict[str, int], order_key: Callable[[T], Hashable] | None = None):
+        if not weights or any(w < 1 for w in weights.values()):
+            raise ValueError("Lane weights must be positive integers")
+        self.weights = dict(weights)
+        self._order_key = order_key
+        self._lanes: dict[str, deque[tuple[int, T]]] = {lane: deque() for lane in weights}
+        self._credit = dict.fromkeys(weights, 0)
+        self._by_key: dict[Hashable, deque[tuple[int, str]]] = {}  # Waiting (seq, lane) per order key
+        self._seq = count()
+        self._available = asyncio.Semaphore(0)
+
+    def put_nowait(self, item: T, lane: str) -> None:
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown lane: {lane!r} (expected one of {', '.join(self._lanes)})")
+        seq = next(self._seq)
+        self._lanes[lane].append((seq, item))
+        if self._order_key is not None:
+            self._by_key.setdefault(self._order_key(item), deque()).append((seq, lane))
+        self._available.release()
+
+    async def put(self, item: T, lane: str) -> None:
+        self.put_nowait(item, lane)
+
+    async def get(self) -> T:
+        """Remove and return the next item (blocks until one is available)."""
+        await self._available.acquire()
+        return self._pop(self._pick())
+
+    def _pick(self) -> str:
+        busy = []
+        for lane, queue in self._lanes.items():
+            if queue:
+                self._credit[lane] += self.weights[lane]
+                busy.append(lane)
+            else:
+                self._credit[lane] = 0  # Idle lanes don't bank credit
+        total = sum(self.weights[lane] for lane in busy)
+        lane = max(busy, key=self._credit.__getitem__)
+        self._credit[lane] -= total
+        return lane
+
+    def _pop(self, lane: str) -> T:
+        seq, item = self._lanes[lane][0]
+        if self._order_key is None:
+            self._lanes[lane].popleft()
+            return item
+        key = self._order_key(item)
+        waiting = self._by_key[key]
+        first_seq, first_lane = waiting.popleft()
+        if not waiting:
+            del self._by_key[key]
+        if first_seq == seq:
+            self._lanes[lane].popleft()
+            return item
+        # An earlier item with the same key is waiting in another lane; it goes first.
+        queue = self._lanes[first_lane]
+        for i, (s, earlier) in enumerate(queue):
+            if s == first_seq:
+                del queue[i]
+                return earlier
+        raise RuntimeError("Lane bookkeeping out of sync")
+
+    def qsize(self) -> int:
+        return sum(len(q) for q in self._lanes.values())
+
+    def sizes(self) -> dict[str, int]:
+        """Queue depth per lane."""
+        return {lane: len(q) for lane, q in self._lanes.items()}
+
 
 class MessageBus:
     """
@@ -11,15 +105,37 @@ class MessageBus:
 
     Channels push messages to the inbound queue, and the agent processes
     them and pushes responses to the outbound queue.
+
+    Both queues are split into priority lanes (see ``PriorityLanes``).
+    Inbound: ``interactive`` (users) ahead of ``system`` (subagent
+    announcements). Outbound: final ``reply`` messages ahead of ``progress`` updates; a
+    chat's progress updates are still delivered before its later reply.
     """
 
-    def __init__(self):
-        self.inbound: asyncio.Queue[InboundMessage] = asyncio.Queue()
-        self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+    def __init__(
+        self,
+        inbound_weights: dict[str, int] | None = None,
+        outbound_weights: dict[str, int] | None = None,
+    ):
+        self.inbound: PriorityLanes[InboundMessage] = PriorityLanes(inbound_weights or INBOUND_WEIGHTS)
+        self.outbound: PriorityLanes[OutboundMessage] = PriorityLanes(
+            outbound_weights or OUTBOUND_WEIGHTS,
+            order_key=lambda m: (m.channel, m.chat_id),
+        )
+
+    @staticmethod
+    def inbound_lane(msg: InboundMessage) -> str:
+        """Lane an inbound message is queued in."""
+        return "system" if msg.channel == "system" else "interactive"
+
+    @staticmethod
+    def outbound_lane(msg: OutboundMessage) -> str:
+        """Lane an outbound message is queued in."""
+        return "progress" if msg.metadata.get("_progress") else "reply"
 
     async def publish_inbound(self, msg: InboundMessage) -> None:
         """Publish a message from a channel to the agent."""
-        await self.inbound.put(msg)
+        await self.inbound.put(msg, self.inbound_lane(msg))
 
     async def consume_inbound(self) -> InboundMessage:
         """Consume the next inbound message (blocks until available)."""
@@ -27,7 +143,7 @@ class MessageBus:
 
     async def publish_outbound(self, msg: OutboundMessage) -> None:
         """Publish a response from the agent to channels."""
-        await self.outbound.put(msg)
+        await self.outbound.put(msg, self.outbound_lane(msg))
 
     async def consume_outbound(self) -> OutboundMessage:
         """Consume the next outbound message (blocks until available)."""
@@ -42,3 +158,7 @@ class MessageBus:
     def outbound_size(self) -> int:
         """Number of pending outbound messages."""
         return self.outbound.qsize()
+
+    def lane_sizes(self) -> dict[str, dict[str, int]]:
+        """Pending messages per lane."""
+        return {"inbound": self.inbound.sizes(), "outbound": self.outbound.sizes()}
@@ -5,6 +5,7 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.bus.coalesce import InboundCoalescer
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 
@@ -18,6 +19,7 @@ class BaseChannel(ABC):
     """
     
     name: str = "base"
+    supports_streaming: bool = False  # Whether send() can render incremental text deltas
     
     def __init__(self, config: Any, bus: MessageBus):
         """
@@ -30,6 +32,7 @@ class BaseChannel(ABC):
         self.config = config
         self.bus = bus
         self._running = False
+        self.coalescer: InboundCoalescer | None = None  # Set by ChannelManager when burst coalescing is on
     
     @abstractmethod
     async def start(self) -> None:
@@ -95,7 +98,8 @@ class BaseChannel(ABC):
         """
         Handle an incoming message from the chat platform.
         
-        This method checks permissions and forwards to the bus.
+        This method checks permissions and forwards to the bus, merging
+        bursts from the same session first when a coalescer is attached.
         
         Args:
             sender_id: The sender's identifier.
@@ -123,7 +127,10 @@ class BaseChannel(ABC):
             session_key_override=session_key,
         )
         
-        await self.bus.publish_inbound(msg)
+        if self.coalescer:
+            await self.coalescer.submit(msg)
+        else:
+            await self.bus.publish_inbound(msg)
     
     @property
     def is_running(self) -> bool:
@@ -7,6 +7,7 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.bus.coalesce import InboundCoalescer
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
@@ -136,6 +137,23 @@ class ChannelManager:
                 logger.info("QQ channel enabled")
             except ImportError as e:
                 logger.warning("QQ channel not available: {}", e)
+
+        self._attach_coalescers()
+
+    def _attach_coalescers(self) -> None:
+        """Give each channel a burst coalescer when a coalescing window is configured."""
+        cfg = self.config.channels
+        for name, channel in self.channels.items():
+            window_ms = cfg.coalesce_windows_ms.get(name, cfg.coalesce_window_ms)
+            if window_ms <= 0:
+                continue
+            channel.coalescer = InboundCoalescer(
+                self.bus.publish_inbound,
+                window_ms / 1000.0,
+                max_messages=cfg.coalesce_max_messages,
+                max_wait_s=cfg.coalesce_max_wait_ms / 1000.0,
+            )
+            logger.info("Coalescing inbound bursts on {} ({} ms window)", name, window_ms)
     
     async def _start_channel(self, name: str, channel: BaseChannel) -> None:
         """Start a channel and log any exceptions."""
@@ -177,6 +195,8 @@ class ChannelManager:
         # Stop all channels
         for name, channel in self.channels.items():
             try:
+                if channel.coalescer:
+                    await channel.coalescer.flush_all()
                 await channel.stop()
                 logger.info("Stopped {} channel", name)
             except Exception as e:
@@ -200,6 +220,8 @@ class ChannelManager:
                         continue
                 
                 channel = self.channels.get(msg.channel)
+                if channel and msg.metadata.get("_stream_delta") and not channel.supports_streaming:
+                    continue
                 if channel:
                     try:
                         await channel.send(msg)
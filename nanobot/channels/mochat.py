@@ -5,13 +5,14 @@ from __future__ import annotations
 import asyncio
 import json
 from collections import deque
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
 import httpx
 from loguru import logger
 
+from nanobot.bus.coalesce import Debouncer
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
@@ -51,14 +52,6 @@ class MochatBufferedEntry:
     group_id: str = ""
 
 
-@dataclass
-class DelayState:
-    """Per-target delayed message state."""
-    entries: list[MochatBufferedEntry] = field(default_factory=list)
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
-    timer: asyncio.Task | None = None
-
-
 @dataclass
 class MochatTarget:
     """Outbound target resolution result."""
@@ -238,7 +231,9 @@ class MochatChannel(BaseChannel):
 
         self._seen_set: dict[str, set[str]] = {}
         self._seen_queue: dict[str, deque[str]] = {}
-        self._delay_states: dict[str, DelayState] = {}
+        self._delay: Debouncer[MochatBufferedEntry] = Debouncer(
+            max(0, config.reply_delay_ms) / 1000.0, self._on_delay_flush,
+        )
 
         self._fallback_mode = False
         self._session_fallback_tasks: dict[str, asyncio.Task] = {}
@@ -276,7 +271,7 @@ class MochatChannel(BaseChannel):
             self._refresh_task = None
 
         await self._stop_fallback_workers()
-        await self._cancel_delay_timers()
+        self._delay.cancel_all()
 
         if self._socket:
             try:
@@ -697,11 +692,10 @@ class MochatChannel(BaseChannel):
         )
 
         if use_delay:
-            delay_key = seen_key
             if was_mentioned:
-                await self._flush_delayed_entries(delay_key, target_id, target_kind, "mention", entry)
+                await self._delay.flush(seen_key, entry, reason="mention")
             else:
-                await self._enqueue_delayed_entry(delay_key, target_id, target_kind, entry)
+                await self._delay.add(seen_key, entry)
             return
 
         await self._dispatch_entries(target_id, target_kind, [entry], was_mentioned)
@@ -719,31 +713,10 @@ class MochatChannel(BaseChannel):
             seen_set.discard(seen_queue.popleft())
         return False
 
-    async def _enqueue_delayed_entry(self, key: str, target_id: str, target_kind: str, entry: MochatBufferedEntry) -> None:
-        state = self._delay_states.setdefault(key, DelayState())
-        async with state.lock:
-            state.entries.append(entry)
-            if state.timer:
-                state.timer.cancel()
-            state.timer = asyncio.create_task(self._delay_flush_after(key, target_id, target_kind))
-
-    async def _delay_flush_after(self, key: str, target_id: str, target_kind: str) -> None:
-        await asyncio.sleep(max(0, self.config.reply_delay_ms) / 1000.0)
-        await self._flush_delayed_entries(key, target_id, target_kind, "timer", None)
-
-    async def _flush_delayed_entries(self, key: str, target_id: str, target_kind: str, reason: str, entry: MochatBufferedEntry | None) -> None:
-        state = self._delay_states.setdefault(key, DelayState())
-        async with state.lock:
-            if entry:
-                state.entries.append(entry)
-            current = asyncio.current_task()
-            if state.timer and state.timer is not current:
-                state.timer.cancel()
-            state.timer = None
-            entries = state.entries[:]
-            state.entries.clear()
-        if entries:
-            await self._dispatch_entries(target_id, target_kind, entries, reason == "mention")
+    async def _on_delay_flush(self, key: str, entries: list[MochatBufferedEntry], reason: str) -> None:
+        # Keys are "<target_kind>:<target_id>", the same as the dedup keys.
+        target_kind, target_id = key.split(":", 1)
+        await self._dispatch_entries(target_id, target_kind, entries, reason == "mention")
 
     async def _dispatch_entries(self, target_id: str, target_kind: str, entries: list[MochatBufferedEntry], was_mentioned: bool) -> None:
         if not entries:
@@ -762,12 +735,6 @@ class MochatChannel(BaseChannel):
             },
         )
 
-    async def _cancel_delay_timers(self) -> None:
-        for state in self._delay_states.values():
-            if state.timer:
-                state.timer.cancel()
-        self._delay_states.clear()
-
     # ---- notify handlers ---------------------------------------------------
 
     async def _handle_notify_chat_message(self, payload: Any) -> None:
@@ -6,6 +6,7 @@ import signal
 from pathlib import Path
 import select
 import sys
+from typing import Any
 
 import typer
 from rich.console import Console
@@ -107,6 +108,44 @@ def _print_agent_response(response: str, render_markdown: bool) -> None:
     console.print()
 
 
+class _StreamPrinter:
+    """Render streamed response text live under a single nanobot header per turn."""
+
+    def __init__(self) -> None:
+        self.status: Any = None  # Spinner to stop once the first token arrives
+        self.streamed = False  # Any delta printed during the current turn
+        self.text = ""  # Text streamed by the latest LLM call
+        self._mid_line = False
+
+    def reset(self, status: Any = None) -> None:
+        self.status = status
+        self.streamed = False
+        self.text = ""
+        self._mid_line = False
+
+    def delta(self, text: str) -> None:
+        if self.status is not None:
+            self.status.stop()
+            self.status = None
+        if not self.streamed:
+            console.print()
+            console.print(f"[cyan]{__logo__} nanobot[/cyan]")
+            self.streamed = True
+        console.print(text, end="", markup=False, highlight=False, soft_wrap=True)
+        self.text += text
+        self._mid_line = True
+
+    def end_line(self) -> None:
+        """Terminate a partially printed line before other output."""
+        if self._mid_line:
+            console.print()
+            self._mid_line = False
+
+    def shows(self, response: str) -> bool:
+        """Whether the last streamed text already is this final response."""
+        return self.streamed and self.text.strip() == (response or "").strip()
+
+
 def _is_exit_command(command: str) -> bool:
     """Return True when input should end interactive chat."""
     return command.lower() in EXIT_COMMANDS
@@ -281,10 +320,12 @@ def gateway(
     from nanobot.config.loader import load_config, get_data_dir
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
+    from nanobot.observability.spans import make_tracer
     from nanobot.channels.manager import ChannelManager
     from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
+    from nanobot.utils.persistence import get_persistence
     from nanobot.heartbeat.service import HeartbeatService
     
     if verbose:
@@ -294,9 +335,16 @@ def gateway(
     console.print(f"{__logo__} Starting nanobot gateway on port {port}...")
     
     config = load_config()
+    get_persistence().set_durability(config.persistence.durability)
     bus = MessageBus()
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = SessionManager(
+        config.workspace_path,
+        backend=config.sessions.backend,
+        max_entries=config.sessions.cache_max_entries,
+        max_bytes=config.sessions.cache_max_bytes,
+        lazy_load=config.sessions.lazy_load,
+    )
     
     # Create cron service first (callback set after agent creation)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -312,13 +360,26 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        prompt_layout=config.agents.defaults.prompt_layout,
+        skills_top_k=config.agents.defaults.skills_top_k,
+        memory_mode=config.agents.defaults.memory_mode,
+        memory_top_k=config.agents.defaults.memory_top_k,
+        turn_compact_tokens=config.agents.defaults.turn_compact_tokens,
+        turn_compact_keep=config.agents.defaults.turn_compact_keep,
+        repeat_hint_after=config.agents.defaults.repeat_hint_after,
+        oscillation_abort_cycles=config.agents.defaults.oscillation_abort_cycles,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        tool_cache_size=config.tools.result_cache_size,
+        tracer=make_tracer(config.observability),
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        parallel_tool_calls=config.agents.defaults.parallel_tool_calls,
     )
     
     # Set cron callback (needs agent)
@@ -345,17 +406,12 @@ def gateway(
 
     def _pick_heartbeat_target() -> tuple[str, str]:
         """Pick a routable channel/chat target for heartbeat-triggered messages."""
-        enabled = set(channels.enabled_channels)
+        enabled = set(channels.enabled_channels) - {"cli", "system"}
         # Prefer the most recently updated non-internal session on an enabled channel.
-        for item in session_manager.list_sessions():
-            key = item.get("key") or ""
-            if ":" not in key:
-                continue
+        key = session_manager.most_recent_session(enabled)
+        if key:
             channel, chat_id = key.split(":", 1)
-            if channel in {"cli", "system"}:
-                continue
-            if channel in enabled and chat_id:
-                return channel, chat_id
+            return channel, chat_id
         # Fallback keeps prior behavior but remains explicit.
         return "cli", "direct"
 
@@ -421,6 +477,7 @@ def gateway(
             cron.stop()
             agent.stop()
             await channels.stop_all()
+            await get_persistence().aflush()
     
     asyncio.run(run())
 
@@ -443,10 +500,13 @@ def agent(
     from nanobot.config.loader import load_config, get_data_dir
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
+    from nanobot.observability.spans import make_tracer
     from nanobot.cron.service import CronService
+    from nanobot.utils.persistence import get_persistence
     from loguru import logger
     
     config = load_config()
+    get_persistence().set_durability(config.persistence.durability)
     
     bus = MessageBus()
     provider = _make_provider(config)
@@ -469,13 +529,28 @@ def agent(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        prompt_layout=config.agents.defaults.prompt_layout,
+        skills_top_k=config.agents.defaults.skills_top_k,
+        memory_mode=config.agents.defaults.memory_mode,
+        memory_top_k=config.agents.defaults.memory_top_k,
+        turn_compact_tokens=config.agents.defaults.turn_compact_tokens,
+        turn_compact_keep=config.agents.defaults.turn_compact_keep,
+        repeat_hint_after=config.agents.defaults.repeat_hint_after,
+        oscillation_abort_cycles=config.agents.defaults.oscillation_abort_cycles,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        tool_cache_size=config.tools.result_cache_size,
+        tracer=make_tracer(config.observability),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        parallel_tool_calls=config.agents.defaults.parallel_tool_calls,
+        stream=config.agents.defaults.stream,
     )
+    printer = _StreamPrinter()
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
     def _thinking_ctx():
@@ -485,20 +560,41 @@ def agent(
         # Animated spinner is safe to use with prompt_toolkit input handling
         return console.status("[dim]nanobot is thinking...[/dim]", spinner="dots")
 
-    async def _cli_progress(content: str, *, tool_hint: bool = False) -> None:
+    def _show_progress(content: str, *, tool_hint: bool = False, stream_delta: bool = False) -> None:
         ch = agent_loop.channels_config
+        if not stream_delta:
+            printer.text = ""  # Whatever streamed before belonged to an earlier LLM call
         if ch and tool_hint and not ch.send_tool_hints:
             return
         if ch and not tool_hint and not ch.send_progress:
             return
+        if stream_delta:
+            printer.delta(content)
+            return
+        printer.end_line()
         console.print(f"  [dim]↳ {content}[/dim]")
 
+    async def _cli_progress(content: str, *, tool_hint: bool = False, stream_delta: bool = False) -> None:
+        _show_progress(content, tool_hint=tool_hint, stream_delta=stream_delta)
+
+    def _finish_turn(response: str) -> None:
+        if printer.shows(response) or (printer.streamed and not response):
+            # The answer has already been rendered token by token.
+            printer.end_line()
+            console.print()
+        else:
+            # Nothing streamed, or the reply isn't what streamed (an error after a
+            # partial stream, the max-iterations or loop-abort notice, ...).
+            printer.end_line()
+            _print_agent_response(response, render_markdown=markdown)
+
     if message:
         # Single message mode — direct call, no bus needed
         async def run_once():
-            with _thinking_ctx():
+            with _thinking_ctx() as status:
+                printer.reset(status)
                 response = await agent_loop.process_direct(message, session_id, on_progress=_cli_progress)
-            _print_agent_response(response, render_markdown=markdown)
+            _finish_turn(response)
             await agent_loop.close_mcp()
 
         asyncio.run(run_once())
@@ -531,14 +627,11 @@ def agent(
                     try:
                         msg = await asyncio.wait_for(bus.consume_outbound(), timeout=1.0)
                         if msg.metadata.get("_progress"):
-                            is_tool_hint = msg.metadata.get("_tool_hint", False)
-                            ch = agent_loop.channels_config
-                            if ch and is_tool_hint and not ch.send_tool_hints:
-                                pass
-                            elif ch and not is_tool_hint and not ch.send_progress:
-                                pass
-                            else:
-                                console.print(f"  [dim]↳ {msg.content}[/dim]")
+                            _show_progress(
+                                msg.content,
+                                tool_hint=msg.metadata.get("_tool_hint", False),
+                                stream_delta=msg.metadata.get("_stream_delta", False),
+                            )
                         elif not turn_done.is_set():
                             if msg.content:
                                 turn_response.append(msg.content)
@@ -577,11 +670,12 @@ def agent(
                             content=user_input,
                         ))
 
-                        with _thinking_ctx():
+                        with _thinking_ctx() as status:
+                            printer.reset(status)
                             await turn_done.wait()
 
                         if turn_response:
-                            _print_agent_response(turn_response[0], render_markdown=markdown)
+                            _finish_turn(turn_response[0])
                     except KeyboardInterrupt:
                         _restore_terminal()
                         console.print("\nGoodbye!")
@@ -946,6 +1040,7 @@ def cron_run(
     from nanobot.cron.types import CronJob
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
+    from nanobot.observability.spans import make_tracer
     logger.disable("nanobot")
 
     config = load_config()
@@ -960,11 +1055,24 @@ def cron_run(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        prompt_layout=config.agents.defaults.prompt_layout,
+        skills_top_k=config.agents.defaults.skills_top_k,
+        memory_mode=config.agents.defaults.memory_mode,
+        memory_top_k=config.agents.defaults.memory_top_k,
+        turn_compact_tokens=config.agents.defaults.turn_compact_tokens,
+        turn_compact_keep=config.agents.defaults.turn_compact_keep,
+        repeat_hint_after=config.agents.defaults.repeat_hint_after,
+        oscillation_abort_cycles=config.agents.defaults.oscillation_abort_cycles,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        tool_cache_size=config.tools.result_cache_size,
+        tracer=make_tracer(config.observability),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        parallel_tool_calls=config.agents.defaults.parallel_tool_calls,
     )
 
     store_path = get_data_dir() / "cron" / "jobs.json"
@@ -995,6 +1103,39 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("migrate")
+def sessions_migrate(
+    overwrite: bool = typer.Option(False, "--overwrite", help="Replace sessions already in the SQLite store"),
+):
+    """Import JSONL session files into the SQLite session store."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.base import migrate_sessions
+    from nanobot.session.jsonl_store import JsonlSessionStore
+    from nanobot.session.sqlite_store import SqliteSessionStore
+
+    config = load_config()
+    sessions_dir = config.workspace_path / "sessions"
+    source = JsonlSessionStore(sessions_dir, lazy_load=False)
+    target = SqliteSessionStore(sessions_dir / "sessions.db", lazy_load=False)
+    try:
+        imported, skipped = migrate_sessions(source, target, overwrite=overwrite)
+    finally:
+        target.close()
+
+    console.print(f"[green]✓[/green] Imported {imported} sessions into {sessions_dir / 'sessions.db'}"
+                  + (f" ({skipped} skipped)" if skipped else ""))
+    if config.sessions.backend != "sqlite":
+        console.print('Set [cyan]sessions.backend[/cyan] to "sqlite" in config.json to use it.')
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
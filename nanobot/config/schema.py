@@ -1,6 +1,8 @@
 """Configuration schema using Pydantic."""
 
 from pathlib import Path
+from typing import Literal
+
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.alias_generators import to_camel
 from pydantic_settings import BaseSettings
@@ -165,11 +167,20 @@ class QQConfig(Base):
     allow_from: list[str] = Field(default_factory=list)  # Allowed user openids (empty = public access)
 
 
+InterruptMode = Literal["queue", "cancel", "merge"]
+
+
 class ChannelsConfig(Base):
     """Configuration for chat channels."""
 
     send_progress: bool = True    # stream agent's text progress to the channel
     send_tool_hints: bool = False  # stream tool-call hints (e.g. read_file("…"))
+    interrupt_mode: InterruptMode = "queue"  # New message during a running turn: "queue", "cancel" or "merge"
+    interrupt_modes: dict[str, InterruptMode] = Field(default_factory=dict)  # Per-channel overrides, e.g. {"telegram": "merge"}
+    coalesce_window_ms: int = 0  # Merge messages from one chat arriving within this window into one turn (0 = off)
+    coalesce_windows_ms: dict[str, int] = Field(default_factory=dict)  # Per-channel overrides, e.g. {"mochat": 0}
+    coalesce_max_messages: int = 10  # Flush a burst once it reaches this many messages
+    coalesce_max_wait_ms: int = 10000  # Flush a burst that keeps growing after this long (0 = no limit)
     whatsapp: WhatsAppConfig = Field(default_factory=WhatsAppConfig)
     telegram: TelegramConfig = Field(default_factory=TelegramConfig)
     discord: DiscordConfig = Field(default_factory=DiscordConfig)
@@ -180,6 +191,14 @@ class ChannelsConfig(Base):
     slack: SlackConfig = Field(default_factory=SlackConfig)
     qq: QQConfig = Field(default_factory=QQConfig)
 
+    def interrupt_mode_for(self, channel: str) -> InterruptMode:
+        """Interrupt mode for a channel, falling back to the global default."""
+        return self.interrupt_modes.get(channel, self.interrupt_mode)
+
+
+PromptLayout = Literal["classic", "stable"]
+MemoryMode = Literal["full", "structured"]
+
 
 class AgentDefaults(Base):
     """Default agent configuration."""
@@ -190,6 +209,18 @@ class AgentDefaults(Base):
     temperature: float = 0.1
     max_tool_iterations: int = 40
     memory_window: int = 100
+    context_window: int = 0  # Model context size in tokens; prompts are trimmed to fit (0 = no budgeting)
+    max_concurrent_sessions: int = 4  # Sessions processed in parallel; messages within a session stay ordered
+    parallel_tool_calls: bool = True  # Run independent read-only tool calls from one response concurrently
+    stream: bool = False  # Render responses token by token in `nanobot agent`
+    prompt_layout: PromptLayout = "classic"  # "stable" orders the prompt static-first and moves time/session into the user message (prefix-cache friendly)
+    skills_top_k: int = 0  # List only the k skills most relevant to the conversation in the prompt (0 = all); adds a list_skills tool
+    memory_mode: MemoryMode = "full"  # "structured": consolidation patches keyed MEMORY.md entries instead of rewriting the file
+    memory_top_k: int = 0  # Inject only the k MEMORY.md entries most relevant to the conversation, plus "## Core"/"## Pinned" sections (0 = all)
+    turn_compact_tokens: int = 0  # Once one turn's messages pass this many tokens, replace older tool results with digests (0 = off)
+    turn_compact_keep: int = 3  # Latest tool results kept verbatim when compacting a turn
+    repeat_hint_after: int = 0  # Tell the model it is repeating itself from the n-th identical tool call in a turn (0 = off)
+    oscillation_abort_cycles: int = 0  # End the turn once tool calls cycle (A A … or A B A B …) this many times (0 = off)
 
 
 class AgentsConfig(Base):
@@ -264,9 +295,37 @@ class ToolsConfig(Base):
     web: WebToolsConfig = Field(default_factory=WebToolsConfig)
     exec: ExecToolConfig = Field(default_factory=ExecToolConfig)
     restrict_to_workspace: bool = False  # If true, restrict all tool access to workspace directory
+    result_cache_size: int = 256  # LRU entries for cached read-only tool results (0 = disabled)
     mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
 
 
+SessionBackend = Literal["jsonl", "sqlite"]
+Durability = Literal["none", "flush", "fsync"]
+
+
+class SessionsConfig(Base):
+    """Session storage and in-memory session cache."""
+
+    backend: SessionBackend = "jsonl"  # "jsonl" (one file per session) or "sqlite" (sessions/sessions.db, WAL); see `nanobot sessions migrate`
+    cache_max_entries: int = 256  # Sessions kept in memory (sessions with a turn in flight are never evicted)
+    cache_max_bytes: int = 64 * 1024 * 1024  # Approximate JSON size of cached messages
+    lazy_load: bool = True  # Decode only the unconsolidated tail of a session file on load
+
+
+class PersistenceConfig(Base):
+    """Background writer thread for sessions, memory, cron jobs and tool traces."""
+
+    durability: Durability = "flush"  # "none" (OS buffers only), "flush" (survives a process crash) or "fsync" (survives power loss)
+
+
+class ObservabilityConfig(Base):
+    """Phase-timing spans for agent turns."""
+
+    span_buffer_size: int = 2000  # Recent spans kept in memory for the dashboard (0 = off)
+    spans_jsonl: str = ""  # Also append spans as JSON lines to this file
+    spans_otlp_json: str = ""  # Also write OTLP/JSON lines here (for an OTel Collector otlpjsonfile receiver)
+
+
 class Config(BaseSettings):
     """Root configuration for nanobot."""
 
@@ -275,6 +334,9 @@ class Config(BaseSettings):
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
+    persistence: PersistenceConfig = Field(default_factory=PersistenceConfig)
+    observability: ObservabilityConfig = Field(default_factory=ObservabilityConfig)
 
     @property
     def workspace_path(self) -> Path:
@@ -11,6 +11,7 @@ from typing import Any, Callable, Coroutine
 from loguru import logger
 
 from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
+from nanobot.utils.persistence import PersistenceExecutor, get_persistence
 
 
 def _now_ms() -> int:
@@ -65,10 +66,12 @@ class CronService:
     def __init__(
         self,
         store_path: Path,
-        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None
+        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None,
+        persistence: PersistenceExecutor | None = None,
     ):
         self.store_path = store_path
         self.on_job = on_job  # Callback to execute job, returns response text
+        self.persistence = persistence or get_persistence()
         self._store: CronStore | None = None
         self._timer_task: asyncio.Task | None = None
         self._running = False
@@ -78,6 +81,7 @@ class CronService:
         if self._store:
             return self._store
         
+        self.persistence.flush(self.store_path)  # A queued save from another instance lands first
         if self.store_path.exists():
             try:
                 data = json.loads(self.store_path.read_text(encoding="utf-8"))
@@ -121,12 +125,10 @@ class CronService:
         return self._store
     
     def _save_store(self) -> None:
-        """Save jobs to disk."""
+        """Queue a save of the jobs (encoded and written atomically on the persistence thread)."""
         if not self._store:
             return
         
-        self.store_path.parent.mkdir(parents=True, exist_ok=True)
-        
         data = {
             "version": self._store.version,
             "jobs": [
@@ -162,7 +164,7 @@ class CronService:
             ]
         }
         
-        self.store_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        self.persistence.write_atomic(self.store_path, lambda: json.dumps(data, indent=2, ensure_ascii=False))
     
     async def start(self) -> None:
         """Start the cron service."""
@@ -4,14 +4,17 @@ from __future__ import annotations
 
 from contextlib import suppress
 
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel
 
 from nanobot.agent.loop import AgentLoop
 from nanobot.bus.queue import MessageBus
 from nanobot.config.loader import load_config
+from nanobot.observability.spans import make_tracer
 from nanobot.observability.tool_trace import ToolTraceStore
+from nanobot.session.manager import SessionManager
+from nanobot.utils.persistence import get_persistence
 
 
 class ChatRequest(BaseModel):
@@ -55,6 +58,7 @@ def _make_provider(config):
 
 def _build_agent_loop() -> AgentLoop:
     config = load_config()
+    get_persistence().set_durability(config.persistence.durability)
     provider = _make_provider(config)
     bus = MessageBus()
 
@@ -67,11 +71,31 @@ def _build_agent_loop() -> AgentLoop:
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        prompt_layout=config.agents.defaults.prompt_layout,
+        skills_top_k=config.agents.defaults.skills_top_k,
+        memory_mode=config.agents.defaults.memory_mode,
+        memory_top_k=config.agents.defaults.memory_top_k,
+        turn_compact_tokens=config.agents.defaults.turn_compact_tokens,
+        turn_compact_keep=config.agents.defaults.turn_compact_keep,
+        repeat_hint_after=config.agents.defaults.repeat_hint_after,
+        oscillation_abort_cycles=config.agents.defaults.oscillation_abort_cycles,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        tool_cache_size=config.tools.result_cache_size,
+        tracer=make_tracer(config.observability),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        parallel_tool_calls=config.agents.defaults.parallel_tool_calls,
+        session_manager=SessionManager(
+            config.workspace_path,
+            backend=config.sessions.backend,
+            max_entries=config.sessions.cache_max_entries,
+            max_bytes=config.sessions.cache_max_bytes,
+            lazy_load=config.sessions.lazy_load,
+        ),
     )
 
 
@@ -85,6 +109,7 @@ def create_app(agent_loop: AgentLoop | None = None) -> FastAPI:
     async def _shutdown() -> None:
         with suppress(Exception):
             await loop.close_mcp()
+        await get_persistence().aflush()
 
     @app.get("/healthz")
     async def healthz() -> dict[str, str]:
@@ -92,7 +117,38 @@ def create_app(agent_loop: AgentLoop | None = None) -> FastAPI:
 
     @app.get("/api/v1/traces")
     async def traces(limit: int = 200) -> dict:
-        return {"items": trace_store.tail(limit=max(1, min(limit, 1000)))}
+        return {"items": await trace_store.atail(limit=max(1, min(limit, 1000)))}
+
+    @app.get("/api/v1/spans")
+    async def spans(limit: int = 200, trace_id: str | None = None) -> dict:
+        ring = loop.tracer.ring
+        if ring is None:
+            return {"items": []}
+        return {"items": ring.recent(limit=max(1, min(limit, 2000)), trace_id=trace_id)}
+
+    @app.get("/api/v1/tool-cache")
+    async def tool_cache() -> dict:
+        cache = loop.tools.cache
+        return {"enabled": cache is not None, **(cache.stats() if cache is not None else {})}
+
+    @app.get("/api/v1/sessions/cache")
+    async def session_cache() -> dict:
+        return loop.sessions.stats()
+
+    @app.get("/api/v1/bus")
+    async def bus_lanes() -> dict:
+        return loop.bus.lane_sizes()
+
+    @app.get("/api/v1/persistence")
+    async def persistence() -> dict:
+        return get_persistence().stats()
+
+    @app.get("/api/v1/blobs/{ref}")
+    async def blob(ref: str) -> Response:
+        data = await loop.blobs.aget(ref)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Blob not found")
+        return Response(content=data, media_type=loop.blobs.sniff_mime(data))
 
     @app.post("/api/v1/chat")
     async def chat(request: ChatRequest) -> dict[str, str]:
@@ -26,7 +26,7 @@ def create_app(agent: InternalToolAgent | None = None) -> FastAPI:
 
     @app.get("/api/v1/traces")
     async def traces(limit: int = 200) -> dict:
-        return {"items": trace_store.tail(limit=max(1, min(limit, 1000)))}
+        return {"items": await trace_store.atail(limit=max(1, min(limit, 1000)))}
 
     @app.get("/", response_class=HTMLResponse)
     async def index() -> str:
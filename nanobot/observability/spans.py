@@ -0,0 +1,203 @@
+"""Lightweight phase-timing spans with pluggable sinks.
+
+Spans nest through a ContextVar, so concurrent turns (and the tasks they
+spawn) each keep their own trace without any explicit plumbing.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from loguru import logger
+
+from nanobot.utils.persistence import PersistenceExecutor, get_persistence
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import ObservabilityConfig
+
+_current_span: ContextVar["Span | None"] = ContextVar("nanobot_current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed phase of work."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int  # Unix epoch nanoseconds
+    end_ns: int = 0
+    status: str = "ok"  # "ok" or "error"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    _t0: int = field(default=0, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes (e.g. token counts) to the span."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class SpanSink:
+    """Receives finished spans. Implementations must be fast and must not raise."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class RingBufferSink(SpanSink):
+    """Keep the most recent spans in memory (O(1) per span; safe to leave on)."""
+
+    def __init__(self, max_spans: int = 2000):
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def recent(self, limit: int = 200, trace_id: str | None = None) -> list[dict[str, Any]]:
+        spans = [s for s in self._spans if trace_id is None or s.trace_id == trace_id]
+        return [s.to_dict() for s in spans[-limit:]]
+
+
+class JsonlSpanSink(SpanSink):
+    """Append one JSON object per span to a file (written on the persistence thread)."""
+
+    def __init__(self, path: Path, persistence: PersistenceExecutor | None = None):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.persistence = persistence or get_persistence()
+
+    def export(self, span: Span) -> None:
+        data = span.to_dict()
+        self.persistence.append(self.path, lambda: json.dumps(data, ensure_ascii=False, default=str) + "\n")
+
+
+class OtlpJsonSink(SpanSink):
+    """
+    Write spans as OTLP/JSON ``ExportTraceServiceRequest`` lines.
+
+    The file can be shipped by an OpenTelemetry Collector (``otlpjsonfile``
+    receiver) to Jaeger, Tempo, etc. without adding an OTel SDK dependency.
+    Lines are encoded and written on the persistence thread.
+    """
+
+    def __init__(
+        self, path: Path, service_name: str = "nanobot", persistence: PersistenceExecutor | None = None
+    ):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.service_name = service_name
+        self.persistence = persistence or get_persistence()
+
+    @staticmethod
+    def _attr(key: str, value: Any) -> dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def to_otlp(self, span: Span) -> dict[str, Any]:
+        otlp_span: dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [self._attr(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2 if span.status == "error" else 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": [self._attr("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "nanobot"}, "spans": [otlp_span]}],
+        }]}
+
+    def export(self, span: Span) -> None:
+        request = self.to_otlp(span)
+        self.persistence.append(self.path, lambda: json.dumps(request, ensure_ascii=False) + "\n")
+
+
+class Tracer:
+    """Create nested spans and fan finished spans out to sinks."""
+
+    def __init__(self, sinks: list[SpanSink] | None = None):
+        self.sinks: list[SpanSink] = list(sinks or [])
+
+    @property
+    def ring(self) -> RingBufferSink | None:
+        """The first in-memory sink, used by the dashboard."""
+        return next((s for s in self.sinks if isinstance(s, RingBufferSink)), None)
+
+    @contextmanager
+    def span(self, name: str, /, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span (or a new trace)."""
+        if not self.sinks:
+            yield Span(name, "", "", None, 0, attributes=attributes)
+            return
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+            _t0=time.perf_counter_ns(),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = span.start_ns + (time.perf_counter_ns() - span._t0)
+            for sink in self.sinks:
+                try:
+                    sink.export(span)
+                except Exception as e:
+                    logger.warning("Span sink {} failed: {}", type(sink).__name__, e)
+
+
+def make_tracer(config: ObservabilityConfig | None = None) -> Tracer:
+    """Build a tracer from config; by default only the in-memory ring buffer is on."""
+    if config is None:
+        return Tracer([RingBufferSink()])
+    sinks: list[SpanSink] = []
+    if config.span_buffer_size > 0:
+        sinks.append(RingBufferSink(config.span_buffer_size))
+    if config.spans_jsonl:
+        sinks.append(JsonlSpanSink(Path(config.spans_jsonl).expanduser()))
+    if config.spans_otlp_json:
+        sinks.append(OtlpJsonSink(Path(config.spans_otlp_json).expanduser()))
+    return Tracer(sinks)
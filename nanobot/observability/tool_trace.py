@@ -2,28 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from nanobot.utils.persistence import PersistenceExecutor, get_persistence
+
 
 class ToolTraceStore:
-    """Append-only JSONL trace store."""
+    """
+    Append-only JSONL trace store.
+
+    ``append`` only queues the event; encoding and the write happen on the
+    shared persistence thread.
+    """
 
-    def __init__(self, path: Path | None = None) -> None:
+    def __init__(self, path: Path | None = None, persistence: PersistenceExecutor | None = None) -> None:
         self.path = path or (Path.home() / ".nanobot" / "logs" / "tool_trace.jsonl")
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.persistence = persistence or get_persistence()
 
     def append(self, event: dict[str, Any]) -> None:
         payload = {
             "ts": datetime.now(timezone.utc).isoformat(),
             **event,
         }
-        with self.path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        self.persistence.append(self.path, lambda: json.dumps(payload, ensure_ascii=False) + "\n")
 
     def tail(self, limit: int = 200) -> list[dict[str, Any]]:
+        self.persistence.flush(self.path)
+        return self._read_tail(limit)
+
+    async def atail(self, limit: int = 200) -> list[dict[str, Any]]:
+        """``tail`` for async callers: waits for queued appends and reads off the event loop."""
+        await self.persistence.aflush(self.path)
+        return await asyncio.to_thread(self._read_tail, limit)
+
+    def _read_tail(self, limit: int) -> list[dict[str, Any]]:
         if not self.path.exists():
             return []
         lines = self.path.read_text(encoding="utf-8").splitlines()
@@ -1,8 +1,11 @@
 """Base LLM provider interface."""
 
+import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, AsyncIterator
+
+import json_repair
 
 
 @dataclass
@@ -28,6 +31,80 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class ToolCallDelta:
+    """A fragment of a streamed tool call; fragments with the same index belong together."""
+    index: int
+    id: str | None = None
+    name: str | None = None
+    arguments: str = ""  # Raw JSON fragment
+
+
+@dataclass
+class LLMStreamChunk:
+    """One increment of a streamed completion."""
+    content: str | None = None
+    reasoning_content: str | None = None
+    tool_calls: list[ToolCallDelta] = field(default_factory=list)
+    finish_reason: str | None = None
+    usage: dict[str, int] = field(default_factory=dict)
+
+
+class StreamAccumulator:
+    """
+    Fold LLMStreamChunk increments into a complete LLMResponse.
+
+    A chunk with finish_reason="error" ends the stream: whatever was received
+    before it is discarded, so the response is just the error, as from chat().
+    """
+
+    def __init__(self) -> None:
+        self._content: list[str] = []
+        self._reasoning: list[str] = []
+        self._calls: dict[int, dict[str, Any]] = {}
+        self.finish_reason = "stop"
+        self.usage: dict[str, int] = {}
+
+    def add(self, chunk: LLMStreamChunk) -> None:
+        if chunk.finish_reason == "error":
+            self._content, self._reasoning, self._calls = [], [], {}
+        if chunk.content:
+            self._content.append(chunk.content)
+        if chunk.reasoning_content:
+            self._reasoning.append(chunk.reasoning_content)
+        for delta in chunk.tool_calls:
+            call = self._calls.setdefault(delta.index, {"id": "", "name": "", "arguments": []})
+            if delta.id:
+                call["id"] = delta.id
+            if delta.name:
+                call["name"] = delta.name
+            if delta.arguments:
+                call["arguments"].append(delta.arguments)
+        if chunk.finish_reason:
+            self.finish_reason = chunk.finish_reason
+        if chunk.usage:
+            self.usage = chunk.usage
+
+    def response(self) -> LLMResponse:
+        tool_calls = []
+        for index in sorted(self._calls):
+            call = self._calls[index]
+            raw = "".join(call["arguments"])
+            args = json_repair.loads(raw) if raw else {}
+            tool_calls.append(ToolCallRequest(
+                id=call["id"] or f"call_{index}",
+                name=call["name"],
+                arguments=args if isinstance(args, dict) else {},
+            ))
+        return LLMResponse(
+            content="".join(self._content) or None,
+            tool_calls=tool_calls,
+            finish_reason=self.finish_reason,
+            usage=self.usage,
+            reasoning_content="".join(self._reasoning) or None,
+        )
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -79,6 +156,57 @@ class LLMProvider(ABC):
 
             result.append(msg)
         return result
+
+    @staticmethod
+    def _parse_openai_usage(usage: Any) -> dict[str, int]:
+        """
+        Convert an OpenAI-style usage object into a plain dict.
+
+        ``cached_tokens`` is the part of the prompt served from the provider's
+        prefix cache (OpenAI/vLLM ``prompt_tokens_details.cached_tokens``, or
+        Anthropic's ``cache_read_input_tokens`` as passed through by LiteLLM).
+        """
+        if not usage:
+            return {}
+        out = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        }
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details is not None else None
+        if cached is None:
+            cached = getattr(usage, "cache_read_input_tokens", None)
+        if isinstance(cached, int):
+            out["cached_tokens"] = cached
+        return out
+
+    @staticmethod
+    def _parse_openai_stream_chunk(chunk: Any) -> LLMStreamChunk:
+        """Convert an OpenAI-style streaming chunk (OpenAI SDK / LiteLLM) into an LLMStreamChunk."""
+        out = LLMStreamChunk()
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            out.usage = LLMProvider._parse_openai_usage(usage)
+        if not chunk.choices:
+            return out
+        choice = chunk.choices[0]
+        delta = choice.delta
+        out.content = getattr(delta, "content", None) or None
+        out.reasoning_content = getattr(delta, "reasoning_content", None) or None
+        out.finish_reason = choice.finish_reason or None
+        for tc in getattr(delta, "tool_calls", None) or []:
+            fn = getattr(tc, "function", None)
+            args = getattr(fn, "arguments", None)
+            if args is not None and not isinstance(args, str):
+                args = json.dumps(args, ensure_ascii=False)
+            out.tool_calls.append(ToolCallDelta(
+                index=tc.index or 0,
+                id=tc.id or None,
+                name=getattr(fn, "name", None),
+                arguments=args or "",
+            ))
+        return out
     
     @abstractmethod
     async def chat(
@@ -103,6 +231,37 @@ class LLMProvider(ABC):
             LLMResponse with content and/or tool calls.
         """
         pass
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream a chat completion as content and tool-call deltas.
+
+        Providers without native streaming fall back to a single chunk
+        carrying the complete chat() response. Errors are reported as a
+        chunk with finish_reason="error", mirroring chat().
+        """
+        response = await self.chat(
+            messages=messages, tools=tools, model=model,
+            max_tokens=max_tokens, temperature=temperature,
+        )
+        yield LLMStreamChunk(
+            content=response.content,
+            reasoning_content=response.reasoning_content,
+            tool_calls=[
+                ToolCallDelta(index=i, id=tc.id, name=tc.name,
+                              arguments=json.dumps(tc.arguments, ensure_ascii=False))
+                for i, tc in enumerate(response.tool_calls)
+            ],
+            finish_reason=response.finish_reason,
+            usage=response.usage,
+        )
     
     @abstractmethod
     def get_default_model(self) -> str:
@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
-from typing import Any
+import json
+from typing import Any, AsyncIterator
 
 import httpx
 import json_repair
 
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import (
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+    ToolCallDelta,
+    ToolCallRequest,
+)
 
 
 class OllamaProvider(LLMProvider):
@@ -59,6 +66,63 @@ class OllamaProvider(LLMProvider):
                 finish_reason="error",
             )
 
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream a chat completion from Ollama (newline-delimited JSON)."""
+        payload: dict[str, Any] = {
+            "model": model or self.default_model,
+            "messages": self._sanitize_messages(messages),
+            "stream": True,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": temperature,
+            }
+        }
+        if tools:
+            payload["tools"] = tools
+
+        try:
+            async with self._client.stream("POST", "/api/chat", json=payload) as response:
+                response.raise_for_status()
+                call_index = 0
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    message = data.get("message", {})
+                    chunk = LLMStreamChunk(content=message.get("content") or None)
+                    # Ollama emits each tool call whole rather than as fragments.
+                    for tc in message.get("tool_calls", []):
+                        args = tc["function"]["arguments"]
+                        chunk.tool_calls.append(ToolCallDelta(
+                            index=call_index,
+                            id=tc.get("id") or None,
+                            name=tc["function"]["name"],
+                            arguments=args if isinstance(args, str) else json.dumps(args, ensure_ascii=False),
+                        ))
+                        call_index += 1
+                    if data.get("done"):
+                        chunk.finish_reason = data.get("done_reason", "stop")
+                        chunk.usage = self._parse_usage(data)
+                    yield chunk
+        except Exception as e:
+            yield LLMStreamChunk(content=f"Error calling Ollama: {str(e)}", finish_reason="error")
+
+    @staticmethod
+    def _parse_usage(data: dict[str, Any]) -> dict[str, int]:
+        """Map Ollama's eval counters onto the usual usage keys."""
+        if "prompt_eval_count" not in data and "eval_count" not in data:
+            return {}
+        prompt = data.get("prompt_eval_count", 0)
+        completion = data.get("eval_count", 0)
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
     def _sanitize_messages(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """Remove empty content and non-standard keys."""
         sanitized = []
@@ -97,6 +161,7 @@ class OllamaProvider(LLMProvider):
             content=content,
             tool_calls=tool_calls,
             finish_reason=data.get("done_reason", "stop"),
+            usage=self._parse_usage(data),
         )
 
     def get_default_model(self) -> str:
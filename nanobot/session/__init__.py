@@ -1,5 +1,6 @@
 """Session management module."""
 
+from nanobot.session.base import SessionStore
 from nanobot.session.manager import SessionManager, Session
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "Session", "SessionStore"]
@@ -0,0 +1,230 @@
+"""Session model and the storage backend interface."""
+
+import copy
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator, MutableSequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from loguru import logger
+
+
+class MessageLog(MutableSequence):
+    """
+    A session's message list whose consolidated prefix stays on disk.
+
+    Indexing is absolute, as for a plain list, so ``last_consolidated`` keeps
+    its meaning. Appends and reads at or after ``offset`` only touch the loaded
+    tail; anything that reaches into the prefix (iteration, slicing from 0,
+    edits) loads it once through ``loader``.
+    """
+
+    def __init__(self, tail: list[dict[str, Any]], offset: int, loader: Callable[[int], list[dict[str, Any]]]):
+        self._items = tail
+        self.offset = offset
+        self._loader = loader
+
+    def _materialize(self) -> list[dict[str, Any]]:
+        if self.offset:
+            self._items = self._loader(self.offset) + self._items
+            self.offset = 0
+        return self._items
+
+    def _tail_slice(self, index: slice) -> slice | None:
+        """The equivalent slice of the loaded tail, if ``index`` stays inside it."""
+        start, stop, step = index.indices(len(self))
+        if step != 1 or start < self.offset:
+            return None
+        return slice(start - self.offset, max(stop - self.offset, 0))
+
+    def __len__(self) -> int:
+        return self.offset + len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            tail = self._tail_slice(index)
+            return self._items[tail] if tail is not None else self._materialize()[index]
+        if index < 0:
+            index += len(self)
+        if index >= self.offset:
+            return self._items[index - self.offset]
+        return self._materialize()[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._materialize()[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._materialize()[index]
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self._materialize())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, MessageLog)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageLog(offset={self.offset}, loaded={len(self._items)})"
+
+    def insert(self, index: int, value: dict[str, Any]) -> None:
+        if index >= len(self):
+            self._items.append(value)
+        else:
+            self._materialize().insert(index, value)
+
+    def append(self, value: dict[str, Any]) -> None:
+        self._items.append(value)
+
+    def extend(self, values) -> None:
+        self._items.extend(values)
+
+    def snapshot(self) -> "MessageLog":
+        """Independent copy of the loaded tail (the prefix is still read on demand)."""
+        return MessageLog(list(self._items), self.offset, self._loader)
+
+
+@dataclass
+class Session:
+    """
+    A conversation session.
+
+    Stores messages in JSONL format for easy reading and persistence.
+
+    Important: Messages are append-only for LLM cache efficiency.
+    The consolidation process writes summaries to MEMORY.md/HISTORY.md
+    but does NOT modify the messages list or get_history() output.
+    """
+
+    key: str  # channel:chat_id
+    messages: list[dict[str, Any]] | MessageLog = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    last_consolidated: int = 0  # Number of messages already consolidated to files
+    # Set on snapshots: the live session they were taken from
+    origin: "Session | None" = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def identity(self) -> "Session":
+        """The live session this object stands for (itself, unless it is a snapshot)."""
+        return self.origin or self
+
+    def snapshot(self) -> "Session":
+        """
+        Copy of the session's current state, for persisting on another thread
+        while this one keeps changing. Message dicts are shared: they are never
+        modified once appended.
+        """
+        messages = self.messages
+        snap = Session(
+            key=self.key,
+            messages=messages.snapshot() if isinstance(messages, MessageLog) else list(messages),
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            metadata=copy.deepcopy(self.metadata),
+            last_consolidated=self.last_consolidated,
+        )
+        snap.origin = self.identity
+        return snap
+    
+    def add_message(self, role: str, content: str, **kwargs: Any) -> None:
+        """Add a message to the session."""
+        msg = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            **kwargs
+        }
+        self.messages.append(msg)
+        self.updated_at = datetime.now()
+    
+    def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
+        """Return unconsolidated messages for LLM input, aligned to a user turn."""
+        unconsolidated = self.messages[self.last_consolidated:]
+        sliced = unconsolidated[-max_messages:]
+
+        # Drop leading non-user messages to avoid orphaned tool_result blocks
+        for i, m in enumerate(sliced):
+            if m.get("role") == "user":
+                sliced = sliced[i:]
+                break
+
+        out: list[dict[str, Any]] = []
+        for m in sliced:
+            entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
+            for k in ("tool_calls", "tool_call_id", "name"):
+                if k in m:
+                    entry[k] = m[k]
+            out.append(entry)
+        return out
+    
+    def clear(self) -> None:
+        """Clear all messages and reset session to initial state."""
+        self.messages = []
+        self.last_consolidated = 0
+        self.updated_at = datetime.now()
+
+
+class SessionStore(ABC):
+    """
+    Where sessions are persisted. ``SessionManager`` caches sessions on top of one.
+
+    Stores expect to see the same ``Session`` object across ``load`` and
+    successive ``save`` calls, so they can persist only what was appended
+    since; given any other object (or a cleared session) they rewrite it.
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> tuple[Session, int] | None:
+        """Load a session; also return the approximate bytes of the messages decoded."""
+
+    @abstractmethod
+    def save(self, session: Session) -> int:
+        """Persist changes since the last load/save; return the session's approximate resident bytes."""
+
+    @abstractmethod
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Session info dicts, most recently updated first."""
+
+    @abstractmethod
+    def most_recent(self, channels: Iterable[str]) -> str | None:
+        """Key of the most recently updated session on one of ``channels``."""
+
+    @abstractmethod
+    def keys(self) -> list[str]:
+        """Every stored session key."""
+
+    def forget(self, key: str) -> None:
+        """Drop any per-session bookkeeping (the session left the cache)."""
+
+    def flush(self) -> None:
+        """Wait for background work to finish."""
+
+    def stats(self) -> dict[str, int]:
+        """Backend-specific counters."""
+        return {}
+
+
+def migrate_sessions(source: SessionStore, target: SessionStore, overwrite: bool = False) -> tuple[int, int]:
+    """
+    Copy every session from ``source`` into ``target``.
+
+    Sessions already present in ``target`` are skipped unless ``overwrite``.
+    Returns (imported, skipped).
+    """
+    existing = set(target.keys())
+    imported = skipped = 0
+    for key in source.keys():
+        if key in existing and not overwrite:
+            skipped += 1
+            continue
+        loaded = source.load(key)
+        if loaded is None:
+            logger.warning("Could not read session {}; skipped", key)
+            skipped += 1
+            continue
+        target.save(loaded[0])
+        imported += 1
+    return imported, skipped
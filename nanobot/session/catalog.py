@@ -0,0 +1,114 @@
+"""SQLite catalog of session metadata."""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Iterable
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at);
+CREATE INDEX IF NOT EXISTS sessions_channel_updated ON sessions(channel, updated_at);
+"""
+_COLUMNS = ("key", "created_at", "updated_at", "message_count", "size", "path")
+
+
+class SessionCatalog:
+    """
+    One row per session (key, timestamps, message count, file size), kept in
+    ``sessions/catalog.db`` and updated by every save.
+
+    Listing sessions and finding the most recent one on a channel are then
+    index lookups instead of a scan that opens every session file. Rows are
+    indexed on ``updated_at`` and ``(channel, updated_at)``.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            # WAL keeps the per-save upsert cheap (no rollback journal rewrite).
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _split_key(key: str) -> tuple[str, str]:
+        channel, _, chat_id = key.partition(":")
+        return (channel, chat_id) if chat_id else ("", key)
+
+    def upsert(
+        self,
+        key: str,
+        created_at: str | None,
+        updated_at: str | None,
+        message_count: int,
+        size: int,
+        path: str,
+    ) -> None:
+        """Insert or update one session's row."""
+        self.upsert_many([(key, created_at, updated_at, message_count, size, path)])
+
+    def upsert_many(self, rows: Iterable[tuple[str, str | None, str | None, int, int, str]]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sessions "
+                "(key, channel, chat_id, created_at, updated_at, message_count, size, path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(key, *self._split_key(key), *rest) for key, *rest in rows],
+            )
+
+    def remove(self, key: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def get_flag(self, name: str) -> str | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_flag(self, name: str, value: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (name, value))
+
+    def list(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Sessions, most recently updated first."""
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM sessions ORDER BY updated_at DESC"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql + " LIMIT ?", (limit if limit is not None else -1,)).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def most_recent(self, channels: Iterable[str]) -> dict[str, Any] | None:
+        """The most recently updated session on any of the given channels (with a chat id)."""
+        channels = list(channels)
+        if not channels:
+            return None
+        # One index probe per channel, then pick the newest.
+        sql = (
+            f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE channel = ? AND chat_id != '' "
+            "ORDER BY updated_at DESC LIMIT 1"
+        )
+        best = None
+        with closing(self._connect()) as conn:
+            for channel in channels:
+                row = conn.execute(sql, (channel,)).fetchone()
+                if row and (best is None or (row[2] or "") > (best[2] or "")):
+                    best = row
+        return dict(zip(_COLUMNS, best)) if best else None
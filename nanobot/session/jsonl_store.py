@@ -0,0 +1,430 @@
+"""JSONL session store: one append-only file per session."""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.session.base import MessageLog, Session, SessionStore
+from nanobot.session.catalog import SessionCatalog
+from nanobot.utils.helpers import ensure_dir, safe_filename
+
+# Compact a session file once superseded metadata records make up this share of
+# it, and amount to at least COMPACT_MIN_GARBAGE_BYTES.
+COMPACT_GARBAGE_RATIO = 0.3
+COMPACT_MIN_GARBAGE_BYTES = 16 * 1024
+
+
+@dataclass
+class _FileState:
+    """What the store last wrote to a session file, so the next save can append."""
+    session: Session
+    count: int  # Messages on disk
+    size: int  # File size after our last write
+    meta: dict[str, Any]  # Mutable metadata fields as last persisted
+    meta_bytes: int  # Size of the latest metadata record (superseded by the next one)
+    resident: int = 0  # Bytes of the messages held in memory
+    garbage: int = 0  # Bytes of superseded metadata records
+    generation: int = 0  # Bumped on every full rewrite
+    compacting: bool = False
+
+
+class JsonlSessionStore(SessionStore):
+    """
+    Sessions as JSONL files in the sessions directory: a metadata header, then
+    one line per message.
+
+    Saving appends the new messages plus a small ``metadata_delta`` record, so
+    its cost follows the turn rather than the session. Superseded metadata
+    records are garbage; once they pass ``compact_ratio`` of the file it is
+    compacted on a background thread (write to a temp file, then atomic
+    rename). Full rewrites (``/new``, or a file changed behind our back) use
+    the same temp-and-rename path.
+
+    With ``lazy_load``, only the unconsolidated tail of a file is decoded; the
+    consolidated prefix is read back only if something asks for it.
+
+    ``durability`` (see ``nanobot.utils.persistence``) decides whether appends
+    are fsynced ("fsync") and whether rewrites are ("flush" and "fsync").
+
+    Every save also updates a ``SessionCatalog`` row, which ``list_sessions``
+    and ``most_recent`` read instead of scanning the directory.
+    """
+
+    def __init__(
+        self,
+        sessions_dir: Path,
+        legacy_sessions_dir: Path | None = None,
+        lazy_load: bool = True,
+        compact_ratio: float = COMPACT_GARBAGE_RATIO,
+        compact_min_bytes: int = COMPACT_MIN_GARBAGE_BYTES,
+        durability: str = "flush",
+    ):
+        self.sessions_dir = ensure_dir(sessions_dir)
+        self.legacy_sessions_dir = legacy_sessions_dir
+        self.lazy_load = lazy_load
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.durability = durability
+        self._files: dict[str, _FileState] = {}
+        self._locks: dict[str, threading.RLock] = {}
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-compact")
+        self._compactions: set[Future] = set()
+        self.compactions = 0
+        self.catalog = SessionCatalog(self.sessions_dir / "catalog.db")
+
+    def _get_session_path(self, key: str) -> Path:
+        """Get the file path for a session."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.sessions_dir / f"{safe_key}.jsonl"
+
+    def _get_legacy_session_path(self, key: str) -> Path | None:
+        """Legacy global session path (~/.nanobot/sessions/)."""
+        if self.legacy_sessions_dir is None:
+            return None
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.legacy_sessions_dir / f"{safe_key}.jsonl"
+
+    def _lock_for(self, key: str) -> threading.RLock:
+        lock = self._locks.get(key)
+        if lock is None:
+            # Reentrant: a rewrite may load a lazy prefix while holding it.
+            lock = self._locks.setdefault(key, threading.RLock())
+        return lock
+
+    def load(self, key: str) -> tuple[Session, int] | None:
+        """Load a session from disk."""
+        path = self._get_session_path(key)
+        if not path.exists():
+            legacy_path = self._get_legacy_session_path(key)
+            if legacy_path is not None and legacy_path.exists():
+                try:
+                    shutil.move(str(legacy_path), str(path))
+                    logger.info("Migrated session {} from legacy path", key)
+                except Exception:
+                    logger.exception("Failed to migrate session {}", key)
+
+        if not path.exists():
+            return None
+
+        try:
+            with self._lock_for(key):
+                with open(path, "rb") as f:
+                    data = f.read()
+                header, message_lines, meta_sizes, clean = self._parse_records(data)
+                last_consolidated = header.get("last_consolidated", 0)
+                offset = min(last_consolidated, len(message_lines)) if self.lazy_load else 0
+                tail = message_lines[offset:]
+                messages: list[dict[str, Any]] | MessageLog = [json.loads(line) for line in tail]
+                if offset:
+                    messages = MessageLog(messages, offset, lambda count: self._read_prefix(key, count))
+                session = Session(
+                    key=key,
+                    messages=messages,
+                    created_at=self._parse_time(header.get("created_at")) or datetime.now(),
+                    updated_at=self._parse_time(header.get("updated_at")) or datetime.now(),
+                    metadata=header.get("metadata", {}),
+                    last_consolidated=last_consolidated,
+                )
+                resident = sum(len(line) + 1 for line in tail)
+                if clean and meta_sizes:
+                    self._files[key] = _FileState(
+                        session=session,
+                        count=len(message_lines),
+                        size=len(data),
+                        meta=self._meta_fields(session),
+                        meta_bytes=meta_sizes[-1],
+                        resident=resident,
+                        garbage=sum(meta_sizes[:-1]),
+                    )
+                else:
+                    # No usable header or a torn record: the next save rewrites the file.
+                    self._files.pop(key, None)
+            return session, resident
+        except Exception as e:
+            logger.warning("Failed to load session {}: {}", key, e)
+            return None
+
+    def _read_prefix(self, key: str, count: int) -> list[dict[str, Any]]:
+        """Decode the first ``count`` messages of a session file (lazy-load fallback)."""
+        with self._lock_for(key):
+            data = self._get_session_path(key).read_bytes()
+        _, message_lines, _, _ = self._parse_records(data)
+        if len(message_lines) < count:
+            raise RuntimeError(f"Session file for {key} no longer holds its first {count} messages")
+        return [json.loads(line) for line in message_lines[:count]]
+
+    @staticmethod
+    def _parse_time(value: str | None) -> datetime | None:
+        return datetime.fromisoformat(value) if value else None
+
+    @staticmethod
+    def _parse_records(data: bytes) -> tuple[dict[str, Any], list[bytes], list[int], bool]:
+        """
+        Fold a session file's records.
+
+        Returns the effective header (metadata record with later deltas applied),
+        the raw message lines (not decoded), the byte size of each metadata
+        record, and whether the file ended cleanly.
+        """
+        header: dict[str, Any] = {}
+        messages: list[bytes] = []
+        meta_sizes: list[int] = []
+        lines = data.splitlines(keepends=True)
+        # Every record is written newline-terminated, so a crash mid-append
+        # leaves at most a torn last line without one; skip it.
+        clean = not data or data.endswith(b"\n")
+        if not clean:
+            logger.warning("Skipping torn session record: {!r}", lines.pop()[:80])
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                continue
+            if not line.startswith(b'{"_type"'):
+                messages.append(line)
+                continue
+            record = json.loads(line)
+            kind = record.get("_type")
+            if kind == "metadata":
+                header = record
+                meta_sizes.append(len(raw))
+            elif kind == "metadata_delta":
+                header.update({k: v for k, v in record.items() if k != "_type"})
+                meta_sizes.append(len(raw))
+            else:
+                messages.append(line)
+        return header, messages, meta_sizes, clean
+
+    @staticmethod
+    def _meta_fields(session: Session) -> dict[str, Any]:
+        return {
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": json.loads(json.dumps(session.metadata, ensure_ascii=False)),
+            "last_consolidated": session.last_consolidated,
+        }
+
+    @staticmethod
+    def _encode(record: dict[str, Any]) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def save(self, session: Session) -> int:
+        """
+        Save a session to disk.
+
+        Appends messages added since the last save and, if anything changed, a
+        metadata delta. Falls back to a full rewrite when the session was
+        cleared, is not the object last saved, or its file changed on disk.
+        Safe to call off the event loop: messages appended while it runs are
+        left for the next save.
+        """
+        path = self._get_session_path(session.key)
+        with self._lock_for(session.key):
+            state = self._files.get(session.key)
+            changed = True
+            total = len(session.messages)
+            if not self._can_append(state, session, path):
+                state = self._rewrite(path, session, total)
+            else:
+                changed = False
+                chunks = [self._encode(m) for m in session.messages[state.count:total]]
+                added = len(chunks)
+                meta = self._meta_fields(session)
+                if meta != state.meta:
+                    delta = {"_type": "metadata_delta", "updated_at": meta["updated_at"]}
+                    delta.update({k: v for k, v in meta.items() if state.meta.get(k) != v})
+                    chunks.append(self._encode(delta))
+                    state.garbage += state.meta_bytes
+                    state.meta_bytes = len(chunks[-1])
+                    state.meta = meta
+                if chunks:
+                    with open(path, "ab") as f:
+                        f.write(b"".join(chunks))
+                        if self.durability == "fsync":
+                            f.flush()
+                            os.fsync(f.fileno())
+                    state.size += sum(len(c) for c in chunks)
+                    state.resident += sum(len(c) for c in chunks[:added])
+                    state.count = total
+                    changed = True
+                self._maybe_compact(session.key, path, state)
+            if changed:
+                self._update_catalog(session, path, state.count, state.size)
+            return state.resident
+
+    def _update_catalog(self, session: Session, path: Path, count: int, size: int) -> None:
+        try:
+            self.catalog.upsert(
+                session.key,
+                session.created_at.isoformat(),
+                session.updated_at.isoformat(),
+                count,
+                size,
+                str(path),
+            )
+        except sqlite3.Error as e:
+            # The catalog is only an index over the session files; never fail a save over it.
+            logger.warning("Failed to update session catalog for {}: {}", session.key, e)
+
+    def _can_append(self, state: _FileState | None, session: Session, path: Path) -> bool:
+        if state is None or state.session is not session.identity or len(session.messages) < state.count:
+            return False
+        try:
+            return path.stat().st_size == state.size
+        except OSError:
+            return False
+
+    def _rewrite(self, path: Path, session: Session, total: int) -> _FileState:
+        """Write the first ``total`` messages to a temp file and atomically swap it in."""
+        meta = self._meta_fields(session)
+        header = self._encode({"_type": "metadata", "key": session.key,
+                               "created_at": session.created_at.isoformat(), **meta})
+        lines = [self._encode(m) for m in session.messages[:total]]
+        size = self._write_atomic(path, [header, *lines])
+        previous = self._files.get(session.key)
+        state = self._files[session.key] = _FileState(
+            session=session.identity,
+            count=total,
+            size=size,
+            meta=meta,
+            meta_bytes=len(header),
+            resident=sum(len(line) for line in lines),
+            generation=previous.generation + 1 if previous else 0,
+        )
+        return state
+
+    def _write_atomic(self, path: Path, chunks: list[bytes], suffix: str = ".tmp") -> int:
+        tmp = path.with_name(path.name + suffix)
+        with open(tmp, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            if self.durability != "none":
+                # Without it a crash right after the rename can leave an empty file.
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return sum(len(c) for c in chunks)
+
+    def _maybe_compact(self, key: str, path: Path, state: _FileState) -> None:
+        if (
+            state.compacting
+            or state.garbage < self.compact_min_bytes
+            or state.garbage < state.size * self.compact_ratio
+        ):
+            return
+        state.compacting = True
+        future = self._compactor.submit(self._compact, key, path, state.generation)
+        self._compactions.add(future)
+        future.add_done_callback(self._compactions.discard)
+
+    def _compact(self, key: str, path: Path, generation: int) -> None:
+        """
+        Rewrite a session file without superseded metadata (runs off the event loop).
+
+        The bulk of the file is read and rewritten without holding the session
+        lock; only the final step, copying records appended in the meantime and
+        renaming the temp file over the original, is done under it.
+        """
+        lock = self._lock_for(key)
+        with lock:
+            state = self._files.get(key)
+            if state is None or state.generation != generation:
+                return
+            snapshot = state.size
+        try:
+            with open(path, "rb") as f:
+                data = f.read(snapshot)
+            header, message_lines, _, clean = self._parse_records(data)
+            if not clean or not header:
+                return
+            header["_type"] = "metadata"
+            chunks = [self._encode(header), *(line + b"\n" for line in message_lines)]
+            with lock:
+                state = self._files.get(key)
+                if state is None or state.generation != generation:
+                    return
+                with open(path, "rb") as f:
+                    f.seek(snapshot)
+                    tail = f.read()
+                _, _, tail_meta, _ = self._parse_records(tail)
+                state.size = self._write_atomic(path, [*chunks, tail], suffix=".compact.tmp")
+                if tail_meta:
+                    state.garbage = len(chunks[0]) + sum(tail_meta[:-1])
+                else:
+                    state.garbage = 0
+                    state.meta_bytes = len(chunks[0])
+                self.compactions += 1
+                logger.debug("Compacted session {} ({} -> {} bytes)", key, snapshot + len(tail), state.size)
+        except Exception:
+            logger.exception("Failed to compact session {}", key)
+        finally:
+            with lock:
+                state = self._files.get(key)
+                if state is not None and state.generation == generation:
+                    state.compacting = False
+
+    def forget(self, key: str) -> None:
+        with self._lock_for(key):
+            state = self._files.pop(key, None)
+            if state is None or not state.compacting:
+                self._locks.pop(key, None)
+
+    def flush(self) -> None:
+        """Wait for background compactions to finish."""
+        for future in list(self._compactions):
+            future.result()
+
+    def stats(self) -> dict[str, int]:
+        return {"compactions": self.compactions}
+
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
+        self._ensure_catalog()
+        return self.catalog.list(limit)
+
+    def most_recent(self, channels: Iterable[str]) -> str | None:
+        self._ensure_catalog()
+        row = self.catalog.most_recent(channels)
+        return row["key"] if row else None
+
+    def keys(self) -> list[str]:
+        """Keys of every session file (read from their headers)."""
+        return [row[0] for row in self._scan()]
+
+    def _scan(self) -> list[tuple[str, str | None, str | None, int, int, str]]:
+        """Catalog rows for every session file on disk."""
+        rows = []
+        for path in self.sessions_dir.glob("*.jsonl"):
+            try:
+                data = path.read_bytes()
+                header, message_lines, _, _ = self._parse_records(data)
+                if not header:
+                    continue
+                modified = datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+                rows.append((
+                    header.get("key") or path.stem.replace("_", ":", 1),
+                    header.get("created_at"),
+                    header.get("updated_at") or modified,
+                    len(message_lines),
+                    len(data),
+                    str(path),
+                ))
+            except Exception:
+                continue
+        return rows
+
+    def _ensure_catalog(self) -> None:
+        """Fill the catalog from the session files once (sessions saved before it existed)."""
+        if self.catalog.get_flag("backfilled"):
+            return
+        rows = self._scan()
+        self.catalog.upsert_many(rows)
+        self.catalog.set_flag("backfilled", "1")
+        logger.info("Session catalog built from {} session files", len(rows))
@@ -1,96 +1,88 @@
 """Session management for conversation history."""
 
-import json
-import shutil
+import asyncio
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
-from dataclasses import dataclass, field
-from datetime import datetime
 from typing import Any
 
-from loguru import logger
+from nanobot.session.base import Session, SessionStore
+from nanobot.session.jsonl_store import (
+    COMPACT_GARBAGE_RATIO,
+    COMPACT_MIN_GARBAGE_BYTES,
+    JsonlSessionStore,
+)
+from nanobot.session.sqlite_store import SqliteSessionStore
+from nanobot.utils.persistence import PersistenceExecutor, get_persistence
 
-from nanobot.utils.helpers import ensure_dir, safe_filename
+# Session cache bounds (see SessionsConfig)
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 64 * 1024 * 1024
 
-
-@dataclass
-class Session:
-    """
-    A conversation session.
-
-    Stores messages in JSONL format for easy reading and persistence.
-
-    Important: Messages are append-only for LLM cache efficiency.
-    The consolidation process writes summaries to MEMORY.md/HISTORY.md
-    but does NOT modify the messages list or get_history() output.
-    """
-
-    key: str  # channel:chat_id
-    messages: list[dict[str, Any]] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    metadata: dict[str, Any] = field(default_factory=dict)
-    last_consolidated: int = 0  # Number of messages already consolidated to files
-    
-    def add_message(self, role: str, content: str, **kwargs: Any) -> None:
-        """Add a message to the session."""
-        msg = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            **kwargs
-        }
-        self.messages.append(msg)
-        self.updated_at = datetime.now()
-    
-    def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
-        """Return unconsolidated messages for LLM input, aligned to a user turn."""
-        unconsolidated = self.messages[self.last_consolidated:]
-        sliced = unconsolidated[-max_messages:]
-
-        # Drop leading non-user messages to avoid orphaned tool_result blocks
-        for i, m in enumerate(sliced):
-            if m.get("role") == "user":
-                sliced = sliced[i:]
-                break
-
-        out: list[dict[str, Any]] = []
-        for m in sliced:
-            entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
-            for k in ("tool_calls", "tool_call_id", "name"):
-                if k in m:
-                    entry[k] = m[k]
-            out.append(entry)
-        return out
-    
-    def clear(self) -> None:
-        """Clear all messages and reset session to initial state."""
-        self.messages = []
-        self.last_consolidated = 0
-        self.updated_at = datetime.now()
+BACKENDS = ("jsonl", "sqlite")
 
 
 class SessionManager:
     """
     Manages conversation sessions.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Persistence is delegated to a ``SessionStore``: ``JsonlSessionStore``
+    (default; one append-only file per session) or ``SqliteSessionStore``
+    (``backend="sqlite"``; one WAL-mode database).
+
+    Loaded sessions are kept in an LRU cache bounded by entry count and by an
+    approximate byte size (the JSON size of the messages held in memory).
+    Sessions pinned with ``pinned()`` (turns in flight) are never evicted. With
+    ``lazy_load``, only the unconsolidated tail of a session is decoded on
+    load; the consolidated prefix is read back only if something asks for it.
+
+    ``save_async`` runs the store write on the shared persistence thread, in
+    order per session, so the event loop never waits on disk.
     """
 
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        store: SessionStore | None = None,
+        backend: str = "jsonl",
+        compact_ratio: float = COMPACT_GARBAGE_RATIO,
+        compact_min_bytes: int = COMPACT_MIN_GARBAGE_BYTES,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        lazy_load: bool = True,
+        persistence: PersistenceExecutor | None = None,
+    ):
         self.workspace = workspace
-        self.sessions_dir = ensure_dir(self.workspace / "sessions")
-        self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
-        self._cache: dict[str, Session] = {}
-    
-    def _get_session_path(self, key: str) -> Path:
-        """Get the file path for a session."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.sessions_dir / f"{safe_key}.jsonl"
-
-    def _get_legacy_session_path(self, key: str) -> Path:
-        """Legacy global session path (~/.nanobot/sessions/)."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.legacy_sessions_dir / f"{safe_key}.jsonl"
+        self.sessions_dir = workspace / "sessions"
+        self.persistence = persistence or get_persistence()
+        durability = self.persistence.durability
+        if store is None:
+            if backend == "jsonl":
+                store = JsonlSessionStore(
+                    self.sessions_dir,
+                    legacy_sessions_dir=Path.home() / ".nanobot" / "sessions",
+                    lazy_load=lazy_load,
+                    compact_ratio=compact_ratio,
+                    compact_min_bytes=compact_min_bytes,
+                    durability=durability,
+                )
+            elif backend == "sqlite":
+                store = SqliteSessionStore(
+                    self.sessions_dir / "sessions.db", lazy_load=lazy_load, durability=durability,
+                )
+            else:
+                raise ValueError(f"Unknown session backend: {backend!r} (expected one of {', '.join(BACKENDS)})")
+        self.store = store
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._sizes: dict[str, int] = {}  # Approximate bytes held per cached session
+        self._pins: dict[str, int] = {}
+        self.cache_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
     
     def get_or_create(self, key: str) -> Session:
         """
@@ -102,111 +94,129 @@ class SessionManager:
         Returns:
             The session.
         """
-        if key in self._cache:
-            return self._cache[key]
+        session = self._cache.get(key)
+        if session is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return session
         
-        session = self._load(key)
-        if session is None:
-            session = Session(key=key)
-        
-        self._cache[key] = session
+        self.cache_misses += 1
+        loaded = self.store.load(key)
+        session, size = loaded if loaded is not None else (Session(key=key), 0)
+        self._remember(session, size)
         return session
-    
-    def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
-        path = self._get_session_path(key)
-        if not path.exists():
-            legacy_path = self._get_legacy_session_path(key)
-            if legacy_path.exists():
-                try:
-                    shutil.move(str(legacy_path), str(path))
-                    logger.info("Migrated session {} from legacy path", key)
-                except Exception:
-                    logger.exception("Failed to migrate session {}", key)
-
-        if not path.exists():
-            return None
 
+    def _remember(self, session: Session, size: int) -> None:
+        """Insert or refresh a cache entry, then evict down to the limits."""
+        key = session.key
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        self.cache_bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._cache) > self.max_entries or self.cache_bytes > self.max_bytes:
+            # Oldest unpinned entry; the most recently used one always stays.
+            victim = next((k for k in list(self._cache)[:-1] if not self._pins.get(k)), None)
+            if victim is None:
+                return
+            self._drop(victim)
+            self.cache_evictions += 1
+
+    def _drop(self, key: str) -> None:
+        self._cache.pop(key, None)
+        self.cache_bytes -= self._sizes.pop(key, 0)
+        self.store.forget(key)
+
+    @contextmanager
+    def pinned(self, key: str) -> Iterator[None]:
+        """Keep a session in the cache (not evictable) while the block runs."""
+        self._pins[key] = self._pins.get(key, 0) + 1
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
-
-            with open(path, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    data = json.loads(line)
-
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
-                key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
-            )
-        except Exception as e:
-            logger.warning("Failed to load session {}: {}", key, e)
-            return None
+            yield
+        finally:
+            self._pins[key] -= 1
+            if not self._pins[key]:
+                del self._pins[key]
+            self._evict()
+
+    def stats(self) -> dict[str, Any]:
+        """Cache and persistence counters."""
+        return {
+            "backend": type(self.store).__name__,
+            "entries": len(self._cache),
+            "bytes": self.cache_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "pinned": len(self._pins),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "evictions": self.cache_evictions,
+            **self.store.stats(),
+        }
     
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
-        path = self._get_session_path(session.key)
-
-        with open(path, "w", encoding="utf-8") as f:
-            metadata_line = {
-                "_type": "metadata",
-                "key": session.key,
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line, ensure_ascii=False) + "\n")
-            for msg in session.messages:
-                f.write(json.dumps(msg, ensure_ascii=False) + "\n")
-
-        self._cache[session.key] = session
-    
+        """
+        Persist a session (only what changed since the last save, where the store can).
+
+        Blocks until written, except when called on an event loop: there it only
+        queues a snapshot for the persistence thread, in order with save_async,
+        so the loop never waits on disk.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.persistence.flush(("session", session.key))  # Don't overtake a queued save_async
+            self._remember(session, self.store.save(session))
+            return
+        future = self.persistence.submit(("session", session.key), self.store.save, session.snapshot())
+
+        def _done(f) -> None:
+            if not f.exception() and not loop.is_closed():
+                loop.call_soon_threadsafe(self._saved, session, f.result())
+
+        future.add_done_callback(_done)
+
+    async def save_async(self, session: Session) -> None:
+        """
+        Persist a session on the persistence thread (queued behind earlier saves of it).
+
+        The writer gets a snapshot taken here, so the session can keep changing
+        on the event loop while the save runs.
+        """
+        size = await self.persistence.run(("session", session.key), self.store.save, session.snapshot())
+        self._saved(session, size)
+
+    def _saved(self, session: Session, size: int) -> None:
+        """Bookkeeping after a background save of ``session`` finished."""
+        if self._cache.get(session.key) is session:
+            self._remember(session, size)
+        else:
+            self.store.forget(session.key)  # Evicted while the save was queued
+
+    def flush(self) -> None:
+        """Wait for queued saves and the store's background work (e.g. compactions) to finish."""
+        self.persistence.flush()
+        self.store.flush()
+
     def invalidate(self, key: str) -> None:
         """Remove a session from the in-memory cache."""
-        self._cache.pop(key, None)
+        self._drop(key)
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List all sessions, most recently updated first.
+        
+        Args:
+            limit: Return at most this many sessions.
         
         Returns:
-            List of session info dicts.
+            List of session info dicts ('key', 'created_at', 'updated_at',
+            'message_count', 'size', 'path').
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # Read just the metadata line
-                with open(path, encoding="utf-8") as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            key = data.get("key") or path.stem.replace("_", ":", 1)
-                            sessions.append({
-                                "key": key,
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        return self.store.list_sessions(limit)
+
+    def most_recent_session(self, channels: set[str] | list[str]) -> str | None:
+        """Key of the most recently updated session on one of ``channels``, if any."""
+        return self.store.most_recent(channels)
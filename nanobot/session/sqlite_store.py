@@ -0,0 +1,196 @@
+"""SQLite session store: messages as rows in one WAL-mode database."""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from nanobot.session.base import MessageLog, Session, SessionStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at);
+CREATE INDEX IF NOT EXISTS sessions_channel_updated ON sessions(channel, updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_key, idx)
+) WITHOUT ROWID;
+"""
+_INFO_COLUMNS = ("key", "created_at", "updated_at", "message_count", "size")
+# PRAGMA synchronous per durability mode (see nanobot.utils.persistence)
+_SYNCHRONOUS = {"none": "OFF", "flush": "NORMAL", "fsync": "FULL"}
+
+
+@dataclass
+class _RowState:
+    """What the store last wrote for a session, so the next save can append."""
+    session: Session
+    count: int  # Message rows in the database
+    resident: int  # Bytes of the messages held in memory
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in one SQLite database (``sessions/sessions.db``, WAL mode).
+
+    Each message is a row keyed by (session, index). A save appends the new
+    rows and updates the session row in one transaction; loading reads only
+    rows from ``last_consolidated`` on (the rest is fetched on demand). WAL
+    lets several processes read while one writes, and before appending a
+    save checks the stored message count so a session changed by another
+    process is rewritten rather than corrupted.
+    """
+
+    def __init__(self, db_path: Path, lazy_load: bool = True, durability: str = "flush"):
+        self.db_path = db_path
+        self.lazy_load = lazy_load
+        self._rows: dict[str, _RowState] = {}
+        self._lock = threading.RLock()  # Reentrant: a rewrite may load a lazy prefix while holding it
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={_SYNCHRONOUS[durability]}")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _split_key(key: str) -> tuple[str, str]:
+        channel, _, chat_id = key.partition(":")
+        return (channel, chat_id) if chat_id else ("", key)
+
+    @staticmethod
+    def _encode(message: dict[str, Any]) -> str:
+        return json.dumps(message, ensure_ascii=False)
+
+    def load(self, key: str) -> tuple[Session, int] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, metadata, last_consolidated, message_count "
+                "FROM sessions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            created_at, updated_at, metadata, last_consolidated, count = row
+            offset = min(last_consolidated, count) if self.lazy_load else 0
+            tail = [r[0] for r in self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? AND idx >= ? ORDER BY idx", (key, offset),
+            )]
+        messages: list[dict[str, Any]] | MessageLog = [json.loads(data) for data in tail]
+        if offset:
+            messages = MessageLog(messages, offset, lambda n: self._read_prefix(key, n))
+        session = Session(
+            key=key,
+            messages=messages,
+            created_at=datetime.fromisoformat(created_at) if created_at else datetime.now(),
+            updated_at=datetime.fromisoformat(updated_at) if updated_at else datetime.now(),
+            metadata=json.loads(metadata),
+            last_consolidated=last_consolidated,
+        )
+        resident = sum(len(data) + 1 for data in tail)
+        self._rows[key] = _RowState(session, count, resident)
+        return session, resident
+
+    def _read_prefix(self, key: str, count: int) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? AND idx < ? ORDER BY idx", (key, count),
+            ).fetchall()
+        if len(rows) < count:
+            raise RuntimeError(f"Session store no longer holds the first {count} messages of {key}")
+        return [json.loads(r[0]) for r in rows]
+
+    def save(self, session: Session) -> int:
+        """Append new message rows and update the session row in one transaction."""
+        key = session.key
+        state = self._rows.get(key)
+        total = len(session.messages)  # Messages appended while this runs wait for the next save
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT message_count, size FROM sessions WHERE key = ?", (key,)).fetchone()
+                stored, size = row if row else (0, 0)
+                if (
+                    state is None
+                    or state.session is not session.identity
+                    or total < state.count
+                    or stored != state.count
+                ):
+                    start, size = 0, 0
+                else:
+                    start = state.count
+                # Encode first: a lazily loaded prefix is read back from the rows about to be replaced.
+                new = [self._encode(m) for m in session.messages[start:total]]
+                if start == 0:
+                    self._conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+                self._conn.executemany(
+                    "INSERT INTO messages (session_key, idx, data) VALUES (?, ?, ?)",
+                    [(key, start + i, data) for i, data in enumerate(new)],
+                )
+                added = sum(len(data) + 1 for data in new)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (key, channel, chat_id, created_at, updated_at, "
+                    "metadata, last_consolidated, message_count, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key, *self._split_key(key),
+                        session.created_at.isoformat(), session.updated_at.isoformat(),
+                        json.dumps(session.metadata, ensure_ascii=False), session.last_consolidated,
+                        total, size + added,
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        resident = added if start == 0 else state.resident + added
+        self._rows[key] = _RowState(session.identity, total, resident)
+        return resident
+
+    def forget(self, key: str) -> None:
+        self._rows.pop(key, None)
+
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_INFO_COLUMNS)} FROM sessions ORDER BY updated_at DESC LIMIT ?",
+                (limit if limit is not None else -1,),
+            ).fetchall()
+        return [{**dict(zip(_INFO_COLUMNS, row)), "path": str(self.db_path)} for row in rows]
+
+    def most_recent(self, channels: Iterable[str]) -> str | None:
+        best: tuple[str, str] | None = None
+        with self._lock:
+            for channel in channels:
+                row = self._conn.execute(
+                    "SELECT key, updated_at FROM sessions WHERE channel = ? AND chat_id != '' "
+                    "ORDER BY updated_at DESC LIMIT 1",
+                    (channel,),
+                ).fetchone()
+                if row and (best is None or (row[1] or "") > (best[1] or "")):
+                    best = row
+        return best[0] if best else None
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT key FROM sessions ORDER BY key")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
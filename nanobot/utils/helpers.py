@@ -43,6 +43,15 @@ def get_skills_path(workspace: Path | None = None) -> Path:
     return ensure_dir(ws / "skills")
 
 
+def file_fingerprint(path: Path) -> tuple[int, int] | None:
+    """Return (mtime_ns, size) for a file or directory, or None if it cannot be stat'ed."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def timestamp() -> str:
     """Get current timestamp in ISO format."""
     return datetime.now().isoformat()
@@ -0,0 +1,255 @@
+"""Shared writer thread that keeps file persistence off the asyncio event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from loguru import logger
+
+# none: leave buffering to Python/the OS; flush: push each write to the OS
+# (survives a process crash); fsync: also fsync (survives power loss).
+DURABILITY_MODES = ("none", "flush", "fsync")
+MAX_OPEN_FILES = 32  # Append handles kept open by the writer thread
+
+
+def finish_write(f: IO, durability: str) -> None:
+    """Apply a durability mode to a file that was just written."""
+    if durability == "none":
+        return
+    f.flush()
+    if durability == "fsync":
+        os.fsync(f.fileno())
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple[Any, ...]
+    futures: list[Future] = field(default_factory=list)
+    coalesce: bool = False
+
+
+class PersistenceExecutor:
+    """
+    One dedicated writer thread with an ordered queue per file.
+
+    Jobs are keyed (usually by path). Jobs with the same key run in submission
+    order; different keys are served round-robin, so a busy file can't starve
+    the others. A job submitted with ``coalesce=True`` (a full rewrite such as
+    the cron store) replaces a still-queued coalescing job for the same key,
+    so only the latest state is written.
+
+    ``submit`` returns a ``concurrent.futures.Future``; ``run`` is the awaitable
+    form for asyncio code. ``flush`` waits for queued work (and flushes open
+    append handles); it also runs at interpreter exit.
+    """
+
+    def __init__(self, durability: str = "flush", max_open_files: int = MAX_OPEN_FILES):
+        self.durability = self._check(durability)
+        self.max_open_files = max_open_files
+        self._cv = threading.Condition()
+        self._queues: dict[Hashable, deque[_Job]] = {}
+        self._ready: deque[Hashable] = deque()  # Keys with queued jobs, in service order
+        self._running: Hashable | None = None  # Key of the job being run
+        self._handles: OrderedDict[Path, IO] = OrderedDict()  # Append handles, used by the writer thread
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self.pending = 0
+        self.max_pending = 0  # High-water mark of queued jobs
+        self.submitted = 0
+        self.completed = 0
+        self.coalesced = 0
+        self.errors = 0
+        atexit.register(self.close)
+
+    @staticmethod
+    def _check(durability: str) -> str:
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability!r} (expected one of {', '.join(DURABILITY_MODES)})")
+        return durability
+
+    def set_durability(self, durability: str) -> None:
+        self.durability = self._check(durability)
+
+    # -- Queueing -------------------------------------------------------------
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any, coalesce: bool = False) -> Future:
+        """Queue ``fn(*args)`` behind earlier jobs for ``key``."""
+        future: Future = Future()
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("Persistence executor is closed")
+            queue = self._queues.get(key)
+            if coalesce and queue and queue[-1].coalesce:
+                job = queue[-1]
+                job.fn, job.args = fn, args
+                job.futures.append(future)
+                self.coalesced += 1
+                return future
+            if queue is None:
+                queue = self._queues[key] = deque()
+                self._ready.append(key)
+            queue.append(_Job(fn, args, [future], coalesce))
+            self.pending += 1
+            self.submitted += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="nanobot-persist", daemon=True)
+                self._thread.start()
+            self._cv.notify()
+        return future
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any, coalesce: bool = False) -> Any:
+        """Awaitable ``submit``: resolves with ``fn``'s result once it has run on the writer thread."""
+        return await asyncio.wrap_future(self.submit(key, fn, *args, coalesce=coalesce))
+
+    def _worker(self) -> None:
+        while True:
+            with self._cv:
+                while not self._ready and not self._closed:
+                    self._cv.wait()
+                if not self._ready:
+                    break
+                key = self._ready.popleft()
+                queue = self._queues[key]
+                job = queue.popleft()
+                self._running = key
+                if queue:
+                    self._ready.append(key)
+                else:
+                    del self._queues[key]
+            try:
+                result = job.fn(*job.args)
+            except BaseException as e:
+                self.errors += 1
+                logger.exception("Persistence job for {} failed", key)
+                for future in job.futures:
+                    future.set_exception(e)
+            else:
+                for future in job.futures:
+                    future.set_result(result)
+            with self._cv:
+                self._running = None
+                self.pending -= 1
+                self.completed += 1
+                self._cv.notify_all()
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+    # -- Write helpers (run on the writer thread) -----------------------------
+
+    def append(self, path: Path, text: str | Callable[[], str]) -> Future:
+        """
+        Append to a file through a kept-open handle, in order with other jobs for ``path``.
+
+        ``text`` may be a callable, so that encoding also happens off the loop.
+        """
+        return self.submit(path, self._append, path, text)
+
+    def _append(self, path: Path, text: str | Callable[[], str]) -> None:
+        text = text() if callable(text) else text
+        with self._cv:  # flush() lists the open handles from other threads
+            handle = self._handles.get(path)
+            if handle is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handle = self._handles[path] = open(path, "a", encoding="utf-8")
+                while len(self._handles) > self.max_open_files:
+                    self._handles.popitem(last=False)[1].close()
+            else:
+                self._handles.move_to_end(path)
+        handle.write(text)
+        finish_write(handle, self.durability)
+
+    def write_atomic(self, path: Path, content: str | Callable[[], str]) -> Future:
+        """Replace a file's contents (temp file + rename), coalescing queued rewrites; ``content`` may be a callable."""
+        return self.submit(path, self._write_atomic, path, content, coalesce=True)
+
+    def _write_atomic(self, path: Path, content: str | Callable[[], str]) -> None:
+        text = content() if callable(content) else content
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            finish_write(f, self.durability)
+        os.replace(tmp, path)
+
+    def _flush_handle(self, path: Hashable) -> None:
+        handle = self._handles.get(path)  # type: ignore[arg-type]
+        if handle is not None:
+            handle.flush()
+            if self.durability == "fsync":
+                os.fsync(handle.fileno())
+
+    # -- Draining -------------------------------------------------------------
+
+    def _barriers(self, key: Hashable | None) -> list[Future]:
+        if threading.current_thread() is self._thread or self._closed:
+            return []
+        with self._cv:
+            busy = {*self._queues, *self._handles}
+            if self._running is not None:
+                busy.add(self._running)
+            keys = list(busy) if key is None else [key] if key in busy else []
+        return [self.submit(k, self._flush_handle, k) for k in keys]
+
+    def flush(self, key: Hashable | None = None, timeout: float | None = None) -> None:
+        """Block until queued jobs (for ``key``, or all) have run and open handles are flushed."""
+        for future in self._barriers(key):
+            future.result(timeout=timeout)
+
+    async def aflush(self, key: Hashable | None = None) -> None:
+        """Awaitable ``flush``."""
+        futures = self._barriers(key)
+        if futures:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+    def close(self) -> None:
+        """Drain the queues, close open handles and stop the writer thread."""
+        if self._closed:
+            return
+        self.flush()
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depths and job counters."""
+        with self._cv:
+            depths = sorted(((len(q), str(k)) for k, q in self._queues.items()), reverse=True)
+        return {
+            "durability": self.durability,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "files_pending": len(depths),
+            "deepest": {name: depth for depth, name in depths[:10]},
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "open_files": len(self._handles),
+        }
+
+
+_shared: PersistenceExecutor | None = None
+_shared_lock = threading.Lock()
+
+
+def get_persistence() -> PersistenceExecutor:
+    """The process-wide persistence executor."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PersistenceExecutor()
+        return _shared
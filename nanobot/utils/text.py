@@ -0,0 +1,67 @@
+"""Lightweight lexical text search: tokenizer and BM25 ranking."""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+
+# Latin words/numbers, or runs of CJK ideographs, kana and hangul
+_TOKEN_RE = re.compile(r"[a-z0-9_]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase search terms.
+
+    Latin text is split into words. CJK text has no spaces, so each run is
+    indexed as single characters plus overlapping bigrams, which matches
+    multi-character words without a segmentation dictionary.
+    """
+    tokens: list[str] = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if run[0].isascii():
+            tokens.append(run)
+            continue
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25:
+    """Okapi BM25 over a fixed list of tokenized documents."""
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._tfs = [Counter(doc) for doc in documents]
+        self._lengths = [len(doc) for doc in documents]
+        self._avg_len = sum(self._lengths) / len(documents) if documents else 0.0
+        df: Counter[str] = Counter()
+        for tf in self._tfs:
+            df.update(tf.keys())
+        n = len(documents)
+        self._idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+    def __len__(self) -> int:
+        return len(self._tfs)
+
+    def scores(self, query: list[str]) -> list[float]:
+        """Score every document against the query terms."""
+        terms = [t for t in set(query) if t in self._idf]
+        out = []
+        for tf, length in zip(self._tfs, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_len) if self._avg_len else self.k1
+            out.append(sum(
+                self._idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm)
+                for t in terms if t in tf
+            ))
+        return out
+
+    def top_k(self, query: list[str], k: int) -> list[tuple[int, float]]:
+        """Indices and scores of the ``k`` best-matching documents with a positive score."""
+        ranked = sorted(
+            ((i, s) for i, s in enumerate(self.scores(query)) if s > 0),
+            key=lambda item: -item[1],
+        )
+        return ranked[:k]
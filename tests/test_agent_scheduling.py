@@ -0,0 +1,309 @@
+"""Tests for AgentLoop's per-session scheduling of inbound messages."""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.base import Tool
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+from nanobot.session.manager import SessionManager
+
+
+def _make_loop(tmp_path: Path, **kwargs) -> AgentLoop:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model", **kwargs)
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    return loop
+
+
+def _user_text(messages: list[dict]) -> str:
+    content = messages[-1]["content"]
+    return content if isinstance(content, str) else content[-1]["text"]
+
+
+async def _collect(bus: MessageBus, count: int) -> list[str]:
+    out = []
+    while len(out) < count:
+        msg = await asyncio.wait_for(bus.consume_outbound(), timeout=2.0)
+        if not msg.metadata.get("_progress"):
+            out.append(f"{msg.chat_id}:{msg.content}")
+    return out
+
+
+@pytest.mark.asyncio
+async def test_slow_session_does_not_block_other_sessions(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path, max_concurrent_sessions=4)
+    release = asyncio.Event()
+
+    async def _chat(messages, **_kwargs):
+        text = _user_text(messages)
+        if text == "slow":
+            await release.wait()
+        return LLMResponse(content=f"re:{text}")
+
+    loop.provider.chat = _chat
+    runner = asyncio.create_task(loop.run())
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="slow"))
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="b", content="fast"))
+
+    first = await _collect(loop.bus, 1)
+    assert first == ["b:re:fast"]
+
+    release.set()
+    assert await _collect(loop.bus, 1) == ["a:re:slow"]
+    loop.stop()
+    await runner
+
+
+@pytest.mark.asyncio
+async def test_messages_within_a_session_stay_ordered(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path, max_concurrent_sessions=4)
+    seen: list[str] = []
+
+    async def _chat(messages, **_kwargs):
+        text = _user_text(messages)
+        seen.append(text)
+        # Earlier messages take longer; ordering must still hold.
+        await asyncio.sleep(0.03 if text == "1" else 0)
+        return LLMResponse(content=f"re:{text}")
+
+    loop.provider.chat = _chat
+    runner = asyncio.create_task(loop.run())
+    for i in range(1, 4):
+        await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content=str(i)))
+
+    assert await _collect(loop.bus, 3) == ["a:re:1", "a:re:2", "a:re:3"]
+    assert seen == ["1", "2", "3"]
+    loop.stop()
+    await runner
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_respected(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path, max_concurrent_sessions=2)
+    active = 0
+    peak = 0
+
+    async def _chat(messages, **_kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return LLMResponse(content="ok")
+
+    loop.provider.chat = _chat
+    runner = asyncio.create_task(loop.run())
+    for chat_id in "abcde":
+        await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id=chat_id, content="hi"))
+
+    await _collect(loop.bus, 5)
+    assert peak == 2
+    await asyncio.gather(*list(loop._session_tasks))  # Session writes finish after the replies
+    assert loop._session_locks == {}
+    loop.stop()
+    await runner
+
+
+@pytest.mark.asyncio
+async def test_reply_is_published_before_the_session_is_written(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path)
+    loop.provider.chat = AsyncMock(return_value=LLMResponse(content="ok"))
+    gate = threading.Event()
+    loop.sessions.persistence.submit(("session", "telegram:a"), gate.wait)  # Hold this session's writes
+    runner = asyncio.create_task(loop.run())
+    try:
+        await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="hi"))
+        assert await _collect(loop.bus, 1) == ["a:ok"]
+        assert "telegram:a" in loop._session_locks  # The turn still waits for its write
+    finally:
+        gate.set()
+    await asyncio.gather(*list(loop._session_tasks))
+    fresh = SessionManager(tmp_path, persistence=loop.sessions.persistence).get_or_create("telegram:a")
+    assert [m["content"] for m in fresh.messages] == ["hi", "ok"]
+    loop.stop()
+    await runner
+
+
+class _SleepTool(Tool):
+    def __init__(self, name: str, safe: bool, log: list[str]):
+        self._name, self._safe, self._log = name, safe, log
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep then echo"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"delay": {"type": "number"}}, "required": ["delay"]}
+
+    @property
+    def concurrency_safe(self) -> bool:
+        return self._safe
+
+    async def execute(self, delay: float, **kwargs: Any) -> str:
+        self._log.append(f"start:{self._name}:{delay}")
+        await asyncio.sleep(delay)
+        self._log.append(f"end:{self._name}:{delay}")
+        return f"{self._name}:{delay}"
+
+
+@pytest.mark.asyncio
+async def test_safe_tool_calls_run_concurrently_in_original_order(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path)
+    log: list[str] = []
+    loop.tools.register(_SleepTool("peek", True, log))
+    loop.tools.register(_SleepTool("poke", False, log))
+    calls = [
+        ToolCallRequest(id="c1", name="peek", arguments={"delay": 0.05}),
+        ToolCallRequest(id="c2", name="peek", arguments={"delay": 0.01}),
+        ToolCallRequest(id="c3", name="poke", arguments={"delay": 0.01}),
+        ToolCallRequest(id="c4", name="peek", arguments={"delay": 0.01}),
+    ]
+    responses = iter([LLMResponse(content=None, tool_calls=calls), LLMResponse(content="done")])
+
+    async def _chat(messages, **_kwargs):
+        return next(responses)
+
+    loop.provider.chat = _chat
+    final, tools_used, messages = await loop._run_agent_loop([{"role": "user", "content": "go"}])
+
+    assert final == "done"
+    assert tools_used == ["peek", "peek", "poke", "peek"]
+    tool_msgs = [m for m in messages if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_msgs] == ["c1", "c2", "c3", "c4"]
+    assert [m["content"] for m in tool_msgs] == ["peek:0.05", "peek:0.01", "poke:0.01", "peek:0.01"]
+    # The first two reads overlap; the side-effecting call waits for them and runs alone.
+    assert log[:2] == ["start:peek:0.05", "start:peek:0.01"]
+    assert log.index("start:poke:0.01") > log.index("end:peek:0.05")
+    assert log.index("start:peek:0.01", 2) > log.index("end:poke:0.01")
+
+
+@pytest.mark.asyncio
+async def test_parallel_tool_calls_can_be_disabled(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path, parallel_tool_calls=False)
+    log: list[str] = []
+    loop.tools.register(_SleepTool("peek", True, log))
+    calls = [
+        ToolCallRequest(id="c1", name="peek", arguments={"delay": 0.02}),
+        ToolCallRequest(id="c2", name="peek", arguments={"delay": 0.01}),
+    ]
+    assert loop._plan_tool_batches(calls) == [[calls[0]], [calls[1]]]
+
+
+def test_interrupt_modes_are_validated() -> None:
+    from pydantic import ValidationError
+
+    from nanobot.config.schema import ChannelsConfig
+
+    config = ChannelsConfig.model_validate({"interruptMode": "merge", "interruptModes": {"slack": "cancel"}})
+    assert config.interrupt_mode_for("slack") == "cancel" and config.interrupt_mode_for("telegram") == "merge"
+    with pytest.raises(ValidationError):
+        ChannelsConfig(interrupt_mode="drop")
+    with pytest.raises(ValidationError):
+        ChannelsConfig(interrupt_modes={"telegram": "Merge"})
+
+
+def _interrupt_loop(tmp_path: Path, mode: str) -> AgentLoop:
+    from nanobot.config.schema import ChannelsConfig
+
+    loop = _make_loop(tmp_path, channels_config=ChannelsConfig(interrupt_modes={"telegram": mode}))
+    loop.tools.register(_SleepTool("peek", True, []))
+    return loop
+
+
+@pytest.mark.asyncio
+async def test_cancel_mode_abandons_running_turn_at_iteration_boundary(tmp_path: Path) -> None:
+    loop = _interrupt_loop(tmp_path, "cancel")
+    in_tool = asyncio.Event()
+    calls: list[str] = []
+
+    async def _chat(messages, **_kwargs):
+        text = _user_text(messages) if messages[-1]["role"] == "user" else "tool"
+        calls.append(text)
+        if text == "long":
+            in_tool.set()
+            return LLMResponse(content=None, tool_calls=[ToolCallRequest(id="c1", name="peek", arguments={"delay": 0.05})])
+        return LLMResponse(content=f"re:{text}")
+
+    loop.provider.chat = _chat
+    runner = asyncio.create_task(loop.run())
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="long"))
+    await in_tool.wait()
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="fix"))
+
+    assert await _collect(loop.bus, 1) == ["a:re:fix"]
+    # The stale turn never made its second LLM call.
+    assert calls == ["long", "fix"]
+    session = loop.sessions.get_or_create("telegram:a")
+    # The abandoned turn's tool work stays in history ahead of the newer message.
+    assert [(m["role"], m["content"]) for m in session.messages][:4] == [
+        ("user", "long"), ("assistant", None), ("tool", "peek:0.05"), ("user", "fix"),
+    ]
+    loop.stop()
+    await runner
+
+
+@pytest.mark.asyncio
+async def test_merge_mode_injects_message_into_running_turn(tmp_path: Path) -> None:
+    loop = _interrupt_loop(tmp_path, "merge")
+    in_tool = asyncio.Event()
+    seen: list[list[str]] = []
+
+    async def _chat(messages, **_kwargs):
+        seen.append([m["content"] for m in messages if m["role"] == "user"])
+        if len(seen) == 1:
+            in_tool.set()
+            return LLMResponse(content=None, tool_calls=[ToolCallRequest(id="c1", name="peek", arguments={"delay": 0.05})])
+        return LLMResponse(content="merged answer")
+
+    loop.provider.chat = _chat
+    runner = asyncio.create_task(loop.run())
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="first"))
+    await in_tool.wait()
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="also this"))
+
+    assert await _collect(loop.bus, 1) == ["a:merged answer"]
+    assert seen[-1] == ["first", "also this"]
+    assert len(seen) == 2
+    loop.stop()
+    await runner
+
+
+@pytest.mark.asyncio
+async def test_stop_command_cancels_running_and_queued_turns(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path)
+    started = asyncio.Event()
+
+    async def _chat(messages, **_kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    loop.provider.chat = _chat
+    runner = asyncio.create_task(loop.run())
+    for text in ("one", "two"):
+        await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content=text))
+    await started.wait()
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="/stop"))
+
+    assert await _collect(loop.bus, 1) == ["a:⏹ Stopped the current task."]
+    await asyncio.sleep(0)
+    assert loop._tasks_by_key == {}
+    assert loop._active_turns == {}
+
+    await loop.bus.publish_inbound(InboundMessage(channel="telegram", sender_id="u", chat_id="a", content="/stop"))
+    assert await _collect(loop.bus, 1) == ["a:No active task to stop."]
+    loop.stop()
+    await runner
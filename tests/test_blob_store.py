@@ -0,0 +1,64 @@
+"""Tests for the tool output blob store."""
+
+import asyncio
+import base64
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from nanobot.agent.blobs import BlobStore
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.session.manager import Session
+
+
+def test_blobs_are_deduplicated_compressed_and_read_back(tmp_path: Path) -> None:
+    store = BlobStore(tmp_path)
+    text = "line of output\n" * 2000
+    ref = store.put(text)
+    assert store.put(text) == ref
+    assert store.get_text(ref) == text
+
+    files = list((tmp_path / "blobs").rglob("*.z"))
+    assert len(files) == 1 and files[0].stat().st_size < len(text) // 10
+    assert BlobStore(tmp_path).get(ref) == text.encode()
+    assert store.get("0" * 64) is None and store.get("../etc/passwd") is None
+    assert asyncio.run(store.aget(ref)) == text.encode() and asyncio.run(store.aget("../x")) is None
+
+
+def test_failed_write_is_retried_by_the_next_put(tmp_path: Path) -> None:
+    (tmp_path / "blobs").write_text("not a directory")  # Every write fails
+    store = BlobStore(tmp_path)
+    ref = store.put(b"payload")
+    assert store.get(ref) is None
+
+    (tmp_path / "blobs").unlink()
+    assert store.put(b"payload") == ref
+    assert store.get(ref) == b"payload"
+
+
+def test_save_turn_keeps_full_tool_output_and_images_in_blobs(tmp_path: Path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model")
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+    output = "x" * 3000 + "END"
+    session = Session(key="cli:direct")
+    loop._save_turn(session, [
+        {"role": "user", "content": [
+            {"type": "image_url", "image_url": {"url": "data:image/png;base64," + base64.b64encode(png).decode()}},
+            {"type": "text", "text": "what is this?"},
+        ]},
+        {"role": "tool", "tool_call_id": "c1", "name": "exec", "content": output},
+    ], skip=0)
+
+    user, tool = session.messages
+    image_ref = loop.blobs.put(png)
+    assert user["content"][0] == {"type": "text", "text": f"[image image/png blob={image_ref}]"}
+    assert loop.blobs.get(image_ref) == png
+    assert len(tool["content"]) < 700 and f"blob={tool['blob']}" in tool["content"]
+    assert "blob" not in session.get_history()[-1]
+
+    recall = loop.tools.get("recall_tool_output")
+    assert asyncio.run(recall.execute(blob=tool["blob"])) == output
+    page = asyncio.run(recall.execute(blob=tool["blob"], offset=2990))
+    assert page == "xxxxxxxxxxEND"
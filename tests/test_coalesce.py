@@ -0,0 +1,81 @@
+"""Tests for burst coalescing of inbound messages."""
+
+import asyncio
+
+import pytest
+
+from nanobot.bus.coalesce import Debouncer, InboundCoalescer
+from nanobot.bus.events import InboundMessage
+
+
+def _msg(content: str, chat_id: str = "c1", sender_id: str = "u1") -> InboundMessage:
+    return InboundMessage(channel="telegram", sender_id=sender_id, chat_id=chat_id, content=content)
+
+
+@pytest.mark.asyncio
+async def test_burst_from_one_chat_becomes_one_message() -> None:
+    published: list[InboundMessage] = []
+
+    async def _publish(msg: InboundMessage) -> None:
+        published.append(msg)
+
+    coalescer = InboundCoalescer(_publish, window_s=0.05)
+    for text in ("hi", "can you", "check the report?"):
+        await coalescer.submit(_msg(text))
+    await coalescer.submit(_msg("other chat", chat_id="c2"))
+    assert published == []
+
+    await asyncio.sleep(0.1)
+    assert [(m.chat_id, m.content) for m in published] == [
+        ("c1", "hi\ncan you\ncheck the report?"),
+        ("c2", "other chat"),
+    ]
+    assert published[0].metadata["coalesced_count"] == 3
+    assert "coalesced_count" not in published[1].metadata
+
+
+@pytest.mark.asyncio
+async def test_group_bursts_label_senders() -> None:
+    published: list[InboundMessage] = []
+
+    async def _publish(msg: InboundMessage) -> None:
+        published.append(msg)
+
+    coalescer = InboundCoalescer(_publish, window_s=10)
+    await coalescer.submit(_msg("lunch?", sender_id="alice"))
+    await coalescer.submit(_msg("yes", sender_id="bob"))
+    await coalescer.flush_all()
+    assert published[0].content == "alice: lunch?\nbob: yes"
+    assert published[0].sender_id == "bob"
+
+
+@pytest.mark.asyncio
+async def test_commands_flush_pending_and_are_never_merged() -> None:
+    published: list[str] = []
+
+    async def _publish(msg: InboundMessage) -> None:
+        published.append(msg.content)
+
+    coalescer = InboundCoalescer(_publish, window_s=10)
+    await coalescer.submit(_msg("one"))
+    await coalescer.submit(_msg("two"))
+    await coalescer.submit(_msg("/new"))
+    assert published == ["one\ntwo", "/new"]
+
+
+@pytest.mark.asyncio
+async def test_debouncer_flushes_when_burst_hits_max_items() -> None:
+    flushed: list[tuple[str, list[int], str]] = []
+
+    async def _on_flush(key: str, items: list[int], reason: str) -> None:
+        flushed.append((key, items, reason))
+
+    debouncer: Debouncer[int] = Debouncer(10, _on_flush, max_items=3)
+    for i in range(4):
+        await debouncer.add("k", i)
+    assert flushed == [("k", [0, 1, 2], "limit")]
+    assert debouncer.pending("k") == 1
+
+    await debouncer.flush("k", 4, reason="mention")
+    assert flushed[-1] == ("k", [3, 4], "mention")
+    debouncer.cancel_all()
@@ -0,0 +1,27 @@
+"""Tests for config values that must come from a closed set."""
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.config.schema import Config
+
+
+@pytest.mark.parametrize("section, values", [
+    ("agents", {"defaults": {"promptLayout": "stabel"}}),
+    ("agents", {"defaults": {"memoryMode": "patch"}}),
+    ("sessions", {"backend": "sqlite3"}),
+    ("persistence", {"durability": "always"}),
+])
+def test_unknown_values_fail_when_the_config_loads(section: str, values: dict) -> None:
+    with pytest.raises(ValidationError):
+        Config.model_validate({section: values})
+
+
+def test_known_values_load() -> None:
+    config = Config.model_validate({
+        "agents": {"defaults": {"promptLayout": "stable", "memoryMode": "structured"}},
+        "sessions": {"backend": "sqlite"},
+        "persistence": {"durability": "fsync"},
+    })
+    assert (config.agents.defaults.prompt_layout, config.agents.defaults.memory_mode) == ("stable", "structured")
+    assert (config.sessions.backend, config.persistence.durability) == ("sqlite", "fsync")
@@ -0,0 +1,112 @@
+"""Tests for token budgeting of LLM prompts."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.budget import ContextBudget, estimate_tokens
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMResponse
+
+
+def _turn(i: int, size: int = 400) -> list[dict]:
+    return [
+        {"role": "user", "content": f"q{i} " + "x" * size},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": f"c{i}", "type": "function", "function": {"name": "read_file", "arguments": "{}"}},
+        ]},
+        {"role": "tool", "tool_call_id": f"c{i}", "name": "read_file", "content": "y" * size},
+        {"role": "assistant", "content": f"a{i}"},
+    ]
+
+
+def test_estimate_counts_cjk_per_character() -> None:
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("周报生成") == 4
+    assert estimate_tokens("") == 0
+
+
+def test_fit_is_a_no_op_within_budget() -> None:
+    budget = ContextBudget(context_window=10_000, reserve_tokens=1_000)
+    messages = [{"role": "system", "content": "sys"}, *_turn(1), {"role": "user", "content": "now"}]
+    fitted, report = budget.fit(messages)
+    assert fitted == messages
+    assert report.prompt_tokens <= report.budget
+    assert report.dropped_messages == 0
+
+
+def test_fit_drops_oldest_whole_turns_and_keeps_current_turn() -> None:
+    budget = ContextBudget(context_window=800, reserve_tokens=200, tool_result_max_tokens=10_000)
+    messages = [{"role": "system", "content": "sys"}, *_turn(1), *_turn(2), *_turn(3), {"role": "user", "content": "now"}]
+    fitted, report = budget.fit(messages)
+
+    assert not report.over_budget
+    assert fitted[0]["content"] == "sys"
+    assert fitted[-1]["content"] == "now"
+    # History starts on a user message, so no tool result is orphaned.
+    assert fitted[1]["role"] == "user"
+    assert report.dropped_messages % 4 == 0 and report.dropped_messages > 0
+    assert messages[1]["content"].startswith("q1")  # The original list is untouched
+
+
+def test_fit_truncates_oversized_tool_results_first() -> None:
+    budget = ContextBudget(context_window=3_000, reserve_tokens=1_000, tool_result_max_tokens=200)
+    messages = [{"role": "system", "content": "sys"}, *_turn(1, size=20), {"role": "user", "content": "now"}]
+    messages.append({"role": "assistant", "content": None, "tool_calls": [
+        {"id": "big", "type": "function", "function": {"name": "read_file", "arguments": "{}"}},
+    ]})
+    messages.append({"role": "tool", "tool_call_id": "big", "name": "read_file", "content": "z" * 20_000})
+
+    fitted, report = budget.fit(messages, turn_start=5)
+    assert report.truncated_tool_results == 1
+    assert report.dropped_messages == 0
+    assert fitted[-1]["content"].endswith("(truncated to fit the context window)")
+    assert len(messages[-1]["content"]) == 20_000
+
+
+def test_builder_drops_optional_sections_in_priority_order(tmp_path: Path) -> None:
+    memory_dir = tmp_path / "memory"
+    memory_dir.mkdir()
+    (memory_dir / "MEMORY.md").write_text("fact " * 50, encoding="utf-8")
+    builder = ContextBuilder(tmp_path)
+    sections = dict(builder.build_system_sections())
+    assert "memory" in sections
+
+    without_memory = sum(estimate_tokens(c) for n, c in sections.items() if n not in builder.OPTIONAL_SECTIONS)
+    builder.budget = ContextBudget(context_window=without_memory + 40, reserve_tokens=0)
+    messages = builder.build_messages(history=[], current_message="hi")
+
+    assert "fact fact" not in messages[0]["content"]
+    assert "# nanobot" in messages[0]["content"]
+    assert messages[-1] == {"role": "user", "content": "hi"}
+
+    # History that no longer fits next to the memory gets the room back once it is dropped.
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(4)]
+    messages = builder.build_messages(history=history, current_message="hi")
+    assert "fact fact" not in messages[0]["content"]
+    assert messages[1:] == [*history, {"role": "user", "content": "hi"}]
+
+
+@pytest.mark.asyncio
+async def test_turn_is_saved_when_history_is_trimmed_to_fit(tmp_path: Path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model",
+                     context_window=6000, max_tokens=1000)
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    session = loop.sessions.get_or_create("cli:direct")
+    for i in range(10):
+        session.messages.extend(_turn(i, size=2000))
+
+    async def _chat(**_kwargs):
+        return LLMResponse(content="final answer")
+
+    loop.provider.chat = _chat
+    assert await loop.process_direct("NEW QUESTION") == "final answer"
+
+    saved = loop.sessions.get_or_create("cli:direct").messages
+    assert len(saved) == 42
+    assert [m["content"] for m in saved[-2:]] == ["NEW QUESTION", "final answer"]
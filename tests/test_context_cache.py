@@ -0,0 +1,77 @@
+"""Tests for fingerprint-memoized system prompt sections."""
+
+import os
+from pathlib import Path
+
+from nanobot.agent import skills as skills_module
+from nanobot.agent.context import ContextBuilder
+
+
+def _skill(root: Path, name: str, description: str) -> Path:
+    skill_dir = root / "skills" / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    path = skill_dir / "SKILL.md"
+    path.write_text(f"---\ndescription: {description}\n---\n\n# {name}\n", encoding="utf-8")
+    return path
+
+
+def _bump(path: Path, text: str) -> None:
+    """Rewrite a file and move its mtime forward so coarse timestamps still differ."""
+    st = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_unchanged_files_are_not_reread(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "AGENTS.md").write_text("be nice", encoding="utf-8")
+    _skill(tmp_path, "weather", "Check the weather")
+    builder = ContextBuilder(tmp_path)
+    first = builder.build_system_sections()[1:]  # Identity carries the clock
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("section should have been served from cache")
+
+    monkeypatch.setattr(builder.skills, "build_skills_summary", _fail)
+    monkeypatch.setattr(builder, "_load_bootstrap_files", _fail)
+    monkeypatch.setattr(builder.memory, "get_memory_context", _fail)
+    assert builder.build_system_sections()[1:] == first
+    assert builder.section_cache_hits == 3
+
+
+def test_only_changed_sections_are_rebuilt(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(skills_module, "SKILL_STAT_TTL_S", 0.0)  # See in-place SKILL.md edits at once
+    memory_file = tmp_path / "memory" / "MEMORY.md"
+    memory_file.parent.mkdir()
+    memory_file.write_text("likes tea", encoding="utf-8")
+    skill_file = _skill(tmp_path, "weather", "Check the weather")
+    builder = ContextBuilder(tmp_path)
+    assert "likes tea" in builder.build_system_prompt()
+    misses = builder.section_cache_misses
+
+    _bump(memory_file, "likes coffee")
+    prompt = builder.build_system_prompt()
+    assert "likes coffee" in prompt and "likes tea" not in prompt
+    assert builder.section_cache_misses == misses + 1
+
+    _bump(skill_file, "---\ndescription: Forecasts and alerts\n---\n")
+    assert "Forecasts and alerts" in builder.build_system_prompt()
+
+    _skill(tmp_path, "calendar", "Manage events")
+    assert "Manage events" in builder.build_system_prompt()
+
+
+def test_stable_layout_keeps_the_prefix_identical_across_chats(tmp_path: Path) -> None:
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "MEMORY.md").write_text("likes tea", encoding="utf-8")
+    _skill(tmp_path, "weather", "Check the weather")
+    builder = ContextBuilder(tmp_path, layout="stable")
+
+    a = builder.build_messages(history=[], current_message="hi", channel="telegram", chat_id="1")
+    b = builder.build_messages(history=[], current_message="yo", channel="feishu", chat_id="2")
+    assert a[0] == b[0]
+    assert "Current Time" not in a[0]["content"]
+    assert a[0]["content"].index("# Skills") < a[0]["content"].index("likes tea")
+
+    user = a[-1]["content"]
+    assert user.startswith("[Runtime Context]") and "Chat ID: 1" in user and user.endswith("hi")
+    assert builder.strip_runtime_context(user) == "hi"
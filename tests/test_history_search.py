@@ -0,0 +1,75 @@
+"""Tests for the HISTORY.md full-text index and the history_search tool."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.history_index import HistoryIndex
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.history import HistorySearchTool
+
+
+def _store(tmp_path: Path) -> MemoryStore:
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-05 09:00] Discussed the Q1 budget with Alice. Deadline is March.")
+    store.append_history("[2026-02-10 14:30] 用户要求每周五生成周报，并发送给项目组。")
+    store.append_history("[2026-03-01 18:00] Fixed the deploy script.\n\nRollback plan agreed with Bob.")
+    return store
+
+
+def test_append_history_indexes_incrementally(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    hits = store.history_index.search("budget deadline")
+    assert [h.ts for h in hits] == ["2026-01-05 09:00"]
+
+    # Multi-paragraph entries stay whole; CJK matches without word boundaries.
+    assert "Rollback plan" in store.history_index.search("deploy")[0].content
+    assert store.history_index.search("周报")[0].ts == "2026-02-10 14:30"
+    assert store.history_index.sync() == 0
+
+
+def test_index_catches_up_and_rebuilds_after_rewrite(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    with open(store.history_file, "a", encoding="utf-8") as f:
+        f.write("[2026-03-02 10:00] Written by another process: grafana dashboard.\n\n")
+    assert store.history_index.search("grafana")
+
+    store.history_file.write_text("[2026-04-01 08:00] Fresh log about kubernetes.\n\n", encoding="utf-8")
+    assert store.history_index.search("budget") == []
+    assert store.history_index.search("kubernetes")[0].ts == "2026-04-01 08:00"
+
+
+@pytest.mark.asyncio
+async def test_history_search_tool_filters_by_date(tmp_path: Path) -> None:
+    tool = HistorySearchTool(_store(tmp_path))
+    result = await tool.execute(query="budget deploy", since="2026-02-01")
+    assert "deploy script" in result and "budget" not in result
+
+    newest = await tool.execute(until="2026-02-28", limit=1)
+    assert newest.startswith("[2026-02-10")
+    assert (await tool.execute(query="x", since="yesterday")).startswith("Error")
+
+
+def test_concurrent_syncs_index_each_entry_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    history = tmp_path / "HISTORY.md"
+    history.write_text("".join(f"[2026-01-{d:02d} 09:00] entry {d}\n\n" for d in range(1, 29)), encoding="utf-8")
+    indexes = [HistoryIndex(history) for _ in range(4)]
+    for index in indexes:
+        index._connect().close()  # Schema first, so the threads only race on sync itself
+    parse = HistoryIndex._complete_entries_end
+    # Widen the window between reading the offset and writing the entries.
+    monkeypatch.setattr(HistoryIndex, "_complete_entries_end", staticmethod(lambda data: (time.sleep(0.05), parse(data))[1]))
+    barrier = threading.Barrier(len(indexes))
+
+    def _sync(index: HistoryIndex) -> None:
+        barrier.wait()
+        index.sync()
+
+    threads = [threading.Thread(target=_sync, args=(index,)) for index in indexes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(indexes[0].search("", since="2026-01-01", limit=100)) == 28
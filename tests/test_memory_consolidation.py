@@ -0,0 +1,138 @@
+"""Tests for chunked (map-reduce) memory consolidation."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.budget import estimate_tokens
+from nanobot.agent.memory import MemoryDocument, MemoryStore
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+from nanobot.session.manager import Session
+
+
+def _session(count: int) -> Session:
+    session = Session(key="telegram:42")
+    for i in range(count):
+        session.add_message("user", f"message {i} " + "word " * 40)
+    return session
+
+
+def _provider(fail_parts: set[int] | None = None, fact_words: int = 0) -> tuple[MagicMock, list[str]]:
+    """Fake provider answering each consolidation tool; records which tool each call asked for."""
+    calls: list[str] = []
+    prompts: list[str] = []
+    fail_parts = fail_parts or set()
+
+    async def _chat(messages, tools, model, **kwargs):
+        name = tools[0]["function"]["name"]
+        calls.append(name)
+        prompt = messages[-1]["content"]
+        prompts.append(prompt)
+        if name == "save_chunk_summary":
+            part = int(prompt.split("This is part ")[1].split(" ")[0])
+            if part in fail_parts:
+                raise RuntimeError("model crashed")
+            args = {"history_entry": f"[2026-01-01 00:00] part {part}", "facts": f"- fact {part}" + " detail" * fact_words}
+        elif name == "save_memory_update":
+            facts = [line.split(" detail")[0] for line in prompt.splitlines() if line.startswith("- fact")]
+            args = {"memory_update": "merged: " + ", ".join(facts)}
+        elif "memory_ops" in tools[0]["function"]["parameters"]["properties"]:
+            args = {"history_entry": "[2026-01-01 00:00] single", "memory_ops": [
+                {"op": "replace", "key": "editor", "text": "Prefers Neovim"},
+                {"op": "add", "key": "lead", "section": "People", "text": "Alice leads the project"},
+                {"op": "delete", "key": "old-office"},
+            ]}
+        else:
+            args = {"history_entry": "[2026-01-01 00:00] single", "memory_update": "single"}
+        return LLMResponse(content=None, tool_calls=[ToolCallRequest(id="c", name=name, arguments=args)])
+
+    provider = MagicMock()
+    provider.chat = _chat
+    provider.prompts = prompts
+    return provider, calls
+
+
+@pytest.mark.asyncio
+async def test_small_backlog_uses_one_call(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    provider, calls = _provider()
+    assert await store.consolidate(_session(4), provider, "m", archive_all=True)
+    assert calls == ["save_memory"]
+    assert store.read_long_term() == "single"
+
+
+@pytest.mark.asyncio
+async def test_large_backlog_is_map_reduced_in_order(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    provider, calls = _provider()
+    session = _session(20)
+    assert await store.consolidate(session, provider, "m", archive_all=True, chunk_tokens=200)
+
+    parts = calls.count("save_chunk_summary")
+    assert parts > 2 and calls[-1] == "save_memory_update"
+    history = store.history_file.read_text(encoding="utf-8")
+    assert [f"part {i}" in history for i in range(1, parts + 1)] == [True] * parts
+    assert history.index("part 1\n") < history.index(f"part {parts}\n")
+    assert store.read_long_term().startswith("merged: - fact 1")
+    assert session.last_consolidated == 0
+    assert not store._checkpoint_file(session.key).exists()
+
+
+@pytest.mark.asyncio
+async def test_reduce_merges_facts_in_batches_that_fit_the_chunk_budget(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    provider, calls = _provider(fact_words=60)
+    assert await store.consolidate(_session(20), provider, "m", archive_all=True, chunk_tokens=200)
+
+    parts = calls.count("save_chunk_summary")
+    merges = [p for name, p in zip(calls, provider.prompts) if name == "save_memory_update"]
+    assert 1 < len(merges) <= parts
+    assert all(estimate_tokens(p.split("## New Facts")[1]) <= 260 for p in merges)
+    # Each batch is merged into the memory the previous batch produced.
+    assert "merged: - fact 1" in merges[1]
+    assert store.read_long_term() == f"merged: - fact {parts}"
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_is_retried_without_redoing_finished_ones(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    session = _session(20)
+    session.last_consolidated = 5
+    provider, calls = _provider(fail_parts={2})
+    assert not await store.consolidate(session, provider, "m", archive_all=True, chunk_tokens=200)
+    assert session.last_consolidated == 5
+    assert not store.history_file.exists() or store.history_file.read_text(encoding="utf-8") == ""
+    parts = calls.count("save_chunk_summary")
+
+    provider, calls = _provider()
+    assert await store.consolidate(session, provider, "m", archive_all=True, chunk_tokens=200)
+    assert calls == ["save_chunk_summary", "save_memory_update"]
+    assert store.history_file.read_text(encoding="utf-8").count("part ") == parts
+
+
+def test_memory_document_patches_entries_and_keeps_free_text() -> None:
+    text = "# Memory\n\n## Preferences\n- [editor] Prefers Vim\nLikes short answers.\n\n## Places\n- [old-office] Works in Building 3\n"
+    doc = MemoryDocument.parse(text)
+    assert doc.render() == text
+    assert doc.apply([
+        {"op": "add", "key": "editor", "text": "Prefers Vim"},  # Unchanged: not counted
+        {"op": "replace", "key": "editor", "text": "Prefers Neovim"},
+        {"op": "delete", "key": "old-office"},
+        {"op": "add", "key": "tz", "text": "Lives in UTC+8"},
+        {"op": "rename", "key": "x"},
+    ]) == 3
+    assert doc.render() == (
+        "# Memory\n\n## Preferences\n- [editor] Prefers Neovim\nLikes short answers.\n\n## General\n- [tz] Lives in UTC+8\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_structured_consolidation_applies_operations(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    store.write_long_term("## Preferences\n- [editor] Prefers Vim\n\n## Places\n- [old-office] Building 3\n")
+    provider, calls = _provider()
+    assert await store.consolidate(_session(4), provider, "m", archive_all=True, structured=True)
+    assert store.read_long_term() == (
+        "## Preferences\n- [editor] Prefers Neovim\n\n## People\n- [lead] Alice leads the project\n"
+    )
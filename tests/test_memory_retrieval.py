@@ -0,0 +1,56 @@
+"""Tests for query-relevant long-term memory retrieval."""
+
+from pathlib import Path
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.memory_retrieval import MemoryRetriever, split_memory
+
+MEMORY = """# About the user
+
+## Core
+- [name] The user is called Mei.
+
+## Preferences
+- [editor] Prefers Neovim with a dark theme.
+- [lang] Writes reports in Chinese.
+
+## Projects
+- [deploy] The billing service deploys via Argo CD on Fridays.
+- [report] 每周五需要生成项目周报。
+Free-form note about the office move
+spanning two lines.
+"""
+
+
+def test_split_pins_preamble_and_core_sections() -> None:
+    pinned, entries = split_memory(MEMORY)
+    assert pinned == "# About the user\n\n## Core\n- [name] The user is called Mei."
+    assert [e.section for e in entries] == ["Preferences", "Preferences", "Projects", "Projects", "Projects"]
+    assert entries[-1].text == "Free-form note about the office move\nspanning two lines."
+
+
+def test_retriever_ranks_and_updates_incrementally() -> None:
+    _, entries = split_memory(MEMORY)
+    retriever = MemoryRetriever()
+    retriever.sync(entries)
+    assert retriever.top_k("how do we deploy billing?", 1)[0].text.startswith("- [deploy]")
+    assert retriever.top_k("写周报", 1)[0].text.startswith("- [report]")
+
+    _, entries = split_memory(MEMORY + "- [ci] Kubernetes cluster upgrade planned.\n")
+    retriever.sync(entries)
+    assert len(retriever) == 6
+    assert retriever.top_k("kubernetes upgrade", 1)[0].text.startswith("- [ci]")
+
+
+def test_builder_injects_pinned_and_top_k_entries(tmp_path: Path) -> None:
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "MEMORY.md").write_text(MEMORY, encoding="utf-8")
+    builder = ContextBuilder(tmp_path, memory_top_k=1)
+
+    prompt = builder.build_messages(history=[], current_message="which editor do I use?")[0]["content"]
+    assert "Mei" in prompt and "Neovim" in prompt
+    assert "Argo CD" not in prompt
+    assert "4 less relevant entries omitted" in prompt
+
+    full = ContextBuilder(tmp_path).build_messages(history=[], current_message="which editor do I use?")[0]["content"]
+    assert "Argo CD" in full
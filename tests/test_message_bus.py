@@ -0,0 +1,55 @@
+"""Tests for the message bus priority lanes."""
+
+import pytest
+
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import MessageBus, PriorityLanes
+
+
+def _inbound(channel: str, chat_id: str, content: str, **metadata) -> InboundMessage:
+    return InboundMessage(channel=channel, sender_id="u", chat_id=chat_id, content=content, metadata=metadata)
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_dequeue_never_starves_a_lane() -> None:
+    lanes: PriorityLanes[str] = PriorityLanes({"fast": 3, "slow": 1})
+    for i in range(8):
+        await lanes.put(f"f{i}", "fast")
+        await lanes.put(f"s{i}", "slow")
+    assert lanes.sizes() == {"fast": 8, "slow": 8}
+
+    order = [await lanes.get() for _ in range(8)]
+    assert sum(item.startswith("s") for item in order) == 2  # One in every 4
+    assert [i for i in order if i.startswith("f")] == ["f0", "f1", "f2", "f3", "f4", "f5"]
+    with pytest.raises(ValueError, match="Unknown lane"):
+        lanes.put_nowait("x", "urgent")
+
+
+@pytest.mark.asyncio
+async def test_inbound_users_go_ahead_of_a_system_flood() -> None:
+    bus = MessageBus()
+    for i in range(20):
+        await bus.publish_inbound(_inbound("system", "telegram:1", f"announce {i}"))
+    for i in range(10):
+        await bus.publish_inbound(_inbound("telegram", "2", f"hello {i}"))
+    assert bus.lane_sizes()["inbound"] == {"interactive": 10, "system": 20}
+    assert bus.inbound_size == 30
+
+    first = [await bus.consume_inbound() for _ in range(10)]
+    assert sum(m.channel == "system" for m in first) == 2  # Two in every ten while users wait
+    assert [m.content for m in first if m.channel != "system"] == [f"hello {i}" for i in range(8)]
+
+
+@pytest.mark.asyncio
+async def test_replies_overtake_other_chats_progress_but_not_their_own() -> None:
+    bus = MessageBus()
+    for i in range(5):
+        await bus.publish_outbound(OutboundMessage("telegram", "a", f"a-progress {i}", metadata={"_progress": True}))
+    await bus.publish_outbound(OutboundMessage("telegram", "b", "b-progress", metadata={"_progress": True}))
+    await bus.publish_outbound(OutboundMessage("telegram", "b", "b-reply"))
+    await bus.publish_outbound(OutboundMessage("telegram", "c", "c-reply"))
+
+    order = [(await bus.consume_outbound()).content for _ in range(bus.outbound_size)]
+    assert order.index("b-progress") < order.index("b-reply") < order.index("a-progress 2")
+    assert order.index("c-reply") < order.index("a-progress 2")
+    assert [c for c in order if c.startswith("a-")] == [f"a-progress {i}" for i in range(5)]
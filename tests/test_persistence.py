@@ -0,0 +1,94 @@
+"""Tests for the background persistence executor."""
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from nanobot.observability.tool_trace import ToolTraceStore
+from nanobot.session.manager import SessionManager
+from nanobot.utils.persistence import PersistenceExecutor
+
+
+def test_jobs_for_one_key_run_in_order_and_rewrites_coalesce(tmp_path: Path) -> None:
+    executor = PersistenceExecutor()
+    gate = threading.Event()
+    executor.submit("block", gate.wait)  # Hold the writer thread so the rest queues up
+
+    log = tmp_path / "log.txt"
+    for i in range(5):
+        executor.append(log, f"{i}\n")
+    store = tmp_path / "jobs.json"
+    futures = [executor.write_atomic(store, f"v{i}") for i in range(4)]
+    gate.set()
+    executor.flush()
+
+    assert log.read_text() == "0\n1\n2\n3\n4\n"
+    assert store.read_text() == "v3"
+    assert all(f.done() for f in futures)
+    stats = executor.stats()
+    assert stats["coalesced"] == 3 and stats["pending"] == 0 and stats["errors"] == 0
+    executor.close()
+
+
+def test_failed_job_reaches_its_caller(tmp_path: Path) -> None:
+    executor = PersistenceExecutor()
+
+    def boom() -> None:
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(executor.run("k", boom))
+    assert executor.stats()["errors"] == 1
+    with pytest.raises(ValueError, match="Unknown durability"):
+        executor.set_durability("sometimes")
+    executor.close()
+
+
+def test_save_async_and_trace_appends_are_visible_after_flush(tmp_path: Path) -> None:
+    executor = PersistenceExecutor(durability="fsync")
+    manager = SessionManager(tmp_path, persistence=executor)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hi")
+    asyncio.run(manager.save_async(session))
+    session.add_message("assistant", "hello")
+    manager.save(session)  # Sync saves wait for queued ones
+
+    trace = ToolTraceStore(tmp_path / "trace.jsonl", persistence=executor)
+    trace.append({"tool": "exec"})
+    assert trace.tail(1)[0]["tool"] == "exec"
+    trace.append({"tool": "read_file"})
+    assert [e["tool"] for e in asyncio.run(trace.atail(2))] == ["exec", "read_file"]
+
+    fresh = SessionManager(tmp_path, persistence=executor)
+    assert [m["content"] for m in fresh.get_or_create("telegram:1").messages] == ["hi", "hello"]
+    executor.close()
+
+
+@pytest.mark.asyncio
+async def test_save_async_persists_the_session_as_it_was_when_called(tmp_path: Path) -> None:
+    executor = PersistenceExecutor()
+    gate = threading.Event()
+    manager = SessionManager(tmp_path, persistence=executor)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hi")
+    session.metadata["topic"] = "greeting"
+    executor.submit(("session", session.key), gate.wait)  # Hold the writer
+
+    pending = asyncio.ensure_future(manager.save_async(session))
+    await asyncio.sleep(0)
+    session.add_message("assistant", "hello")
+    session.metadata["topic"] = "changed"
+    gate.set()
+    await pending
+
+    fresh = SessionManager(tmp_path, persistence=executor).get_or_create("telegram:1")
+    assert [m["content"] for m in fresh.messages] == ["hi"]
+    assert fresh.metadata["topic"] == "greeting"
+
+    manager.save(session)  # On the event loop this only queues the write
+    await executor.aflush()
+    fresh = SessionManager(tmp_path, persistence=executor).get_or_create("telegram:1")
+    assert [m["content"] for m in fresh.messages] == ["hi", "hello"]
+    executor.close()
@@ -0,0 +1,97 @@
+"""Tests for repeated-tool-call detection."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.repeat_guard import ToolRepeatGuard
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+
+
+def test_guard_reuses_reads_until_a_write_and_hints_on_repeats() -> None:
+    guard = ToolRepeatGuard(hint_after=3, abort_cycles=0)
+    read = guard.fingerprint("read_file", {"path": "a.txt"})
+    assert read == guard.fingerprint("read_file", {"path": "a.txt"})
+
+    guard.record("read_file", read, "v1", read_only=True, reused=False)
+    assert guard.reuse(read) == "v1"
+    write = guard.fingerprint("write_file", {"path": "a.txt", "content": "v2"})
+    guard.record("write_file", write, "ok", read_only=False, reused=False)
+    assert guard.reuse(read) is None  # The write may have changed what the read returns
+
+    assert guard.record("read_file", read, "v2", read_only=True, reused=False) == "v2"
+    assert guard.record("read_file", read, "v2", read_only=True, reused=True) == "v2"  # v1 -> v2 was progress
+    hinted = guard.record("read_file", read, "v2", read_only=True, reused=True)
+    assert hinted.startswith("v2\n\n[Note: this is call #4 to read_file")
+    assert guard.stats()["repeated_calls"] == 3 and guard.stats()["repeat_hints"] == 1
+
+
+@pytest.mark.parametrize("pattern, aborts_at", [("AAAA", 4), ("ABABABAB", 8), ("ABCABC", None)])
+def test_guard_detects_oscillation(pattern: str, aborts_at: int | None) -> None:
+    guard = ToolRepeatGuard(hint_after=0, abort_cycles=4)
+    aborted = None
+    for i, name in enumerate(pattern, 1):
+        key = guard.fingerprint(name, {})
+        guard.record(name, key, "r", read_only=False, reused=False)
+        if guard.end_iteration([key]):
+            aborted = i
+            break
+    assert aborted == aborts_at
+
+
+def test_guard_does_not_flag_polls_whose_results_change() -> None:
+    guard = ToolRepeatGuard(hint_after=3, abort_cycles=4)
+    poll = guard.fingerprint("exec", {"command": "check job status"})
+    for i in range(8):
+        result = guard.record("exec", poll, f"running ({i * 10}%)", read_only=False, reused=False)
+        assert result == f"running ({i * 10}%)"
+        assert not guard.end_iteration([poll])
+    assert guard.stats()["repeat_hints"] == 0 and guard.stats()["wasted_iterations"] == 0
+
+    # Once the output stops changing, the repeats count again.
+    for i in range(1, 4):
+        result = guard.record("exec", poll, "done", read_only=False, reused=False)
+        assert result.startswith("done\n\n[Note:") == (i == 3)
+        assert not guard.end_iteration([poll])
+    guard.record("exec", poll, "done", read_only=False, reused=False)
+    assert guard.end_iteration([poll]) and guard.aborted
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_serves_repeated_reads_and_aborts_a_loop(tmp_path: Path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model",
+        repeat_hint_after=3, oscillation_abort_cycles=4,
+    )
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    loop.trace_store = MagicMock()
+    (tmp_path / "notes.txt").write_text("hello", encoding="utf-8")
+    executed: list[str] = []
+    execute = loop._execute_tool_call
+
+    async def _counting(tc):
+        executed.append(tc.name)
+        return await execute(tc)
+
+    loop._execute_tool_call = _counting
+
+    async def _chat(**_kwargs):
+        return LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="c", name="read_file", arguments={"path": str(tmp_path / "notes.txt")}),
+        ])
+
+    loop.provider.chat = _chat
+    answer = await loop.process_direct("read it")
+
+    assert answer.startswith("I stopped because I kept repeating the same tool calls")
+    assert executed == ["read_file"]  # Three repeats served from the turn
+    events = [c.args[0] for c in loop.trace_store.append.call_args_list]
+    summary = next(e for e in events if e["event"] == "tool_repeats")
+    assert summary["repeated_calls"] == 3 and summary["reused_results"] == 3
+    assert summary["wasted_iterations"] == 3 and summary["oscillation_aborted"] is True
+    assert [e["repeat"] for e in events if e["event"] == "tool_call"] == [1, 2, 3, 4]
@@ -0,0 +1,141 @@
+"""Tests for append-only session files, background compaction, the session cache and catalog."""
+
+from pathlib import Path
+
+from nanobot.session.base import MessageLog
+from nanobot.session.manager import SessionManager
+
+
+def _lines(manager: SessionManager, key: str) -> list[str]:
+    return manager.store._get_session_path(key).read_text(encoding="utf-8").splitlines()
+
+
+def test_save_appends_only_the_new_turn(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hello")
+    manager.save(session)
+    path = manager.store._get_session_path(session.key)
+    before = path.read_bytes()
+
+    session.add_message("assistant", "hi there")
+    session.last_consolidated = 1
+    manager.save(session)
+    after = path.read_bytes()
+    assert after.startswith(before)
+    assert b'"_type": "metadata_delta"' in after[len(before):]
+
+    manager.invalidate(session.key)
+    reloaded = manager.get_or_create(session.key)
+    assert [m["content"] for m in reloaded.messages] == ["hello", "hi there"]
+    assert reloaded.last_consolidated == 1
+    assert reloaded.updated_at == session.updated_at
+
+
+def test_clear_rewrites_and_torn_tail_is_skipped(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("cli:direct")
+    session.add_message("user", "one")
+    manager.save(session)
+    session.clear()
+    manager.save(session)
+    assert [line for line in _lines(manager, session.key) if '"role"' in line] == []
+
+    session.add_message("user", "two")
+    manager.save(session)
+    path = manager.store._get_session_path(session.key)
+    with open(path, "ab") as f:
+        f.write(b'{"role": "assistant", "cont')  # Crash mid-append
+
+    fresh = SessionManager(tmp_path)
+    reloaded = fresh.get_or_create(session.key)
+    assert [m["content"] for m in reloaded.messages] == ["two"]
+    reloaded.add_message("assistant", "three")
+    fresh.save(reloaded)  # Rewritten rather than appended after the torn line
+    assert len(_lines(fresh, session.key)) == 3
+
+
+def test_garbage_triggers_background_compaction(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, compact_ratio=0.5, compact_min_bytes=0)
+    session = manager.get_or_create("slack:c1")
+    session.add_message("user", "keep me")
+    manager.save(session)
+    for i in range(20):
+        session.metadata["counter"] = i
+        manager.save(session)
+    manager.flush()
+
+    assert manager.store.compactions >= 1
+    assert len(_lines(manager, session.key)) <= 3
+    manager.invalidate(session.key)
+    reloaded = manager.get_or_create(session.key)
+    assert reloaded.metadata == {"counter": 19}
+    assert [m["content"] for m in reloaded.messages] == ["keep me"]
+
+
+def test_lru_cache_evicts_unpinned_sessions(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, max_entries=2)
+    with manager.pinned("a:1"):
+        first = manager.get_or_create("a:1")
+        first.add_message("user", "pinned")
+        manager.save(first)
+        manager.get_or_create("b:1")
+        manager.get_or_create("c:1")
+        assert manager.get_or_create("a:1") is first
+    stats = manager.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+    manager = SessionManager(tmp_path, max_bytes=1)
+    big = manager.get_or_create("a:1")
+    manager.get_or_create("b:1")
+    assert manager.stats()["entries"] == 1 and manager.cache_bytes == 0
+    assert manager.get_or_create("a:1") is not big
+
+
+def test_lazy_load_decodes_only_the_unconsolidated_tail(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("cli:lazy")
+    for i in range(10):
+        session.add_message("user", f"msg{i}")
+    session.last_consolidated = 8
+    manager.save(session)
+
+    fresh = SessionManager(tmp_path)
+    loaded = fresh.get_or_create("cli:lazy")
+    assert isinstance(loaded.messages, MessageLog) and loaded.messages.offset == 8
+    assert len(loaded.messages) == 10
+    assert [m["content"] for m in loaded.get_history()] == ["msg8", "msg9"]
+
+    loaded.add_message("assistant", "reply")
+    fresh.save(loaded)
+    assert loaded.messages.offset == 8  # Appending didn't touch the prefix
+    assert loaded.messages[0]["content"] == "msg0"  # Reaching into it loads it once
+    assert loaded.messages.offset == 0 and len(loaded.messages) == 11
+
+
+def test_catalog_answers_listing_without_scanning(tmp_path: Path, monkeypatch) -> None:
+    legacy = SessionManager(tmp_path)
+    old = legacy.get_or_create("telegram:42")
+    old.add_message("user", "from before the catalog")
+    legacy.save(old)
+    (tmp_path / "sessions" / "catalog.db").unlink()  # As if saved by an older version
+
+    manager = SessionManager(tmp_path)
+    assert [s["key"] for s in manager.list_sessions()] == ["telegram:42"]  # Backfilled once
+
+    for key in ("slack:c1", "cli:direct", "telegram:7"):
+        session = manager.get_or_create(key)
+        session.add_message("user", "hi")
+        manager.save(session)
+
+    def _no_scan(*args, **kwargs):
+        raise AssertionError("list_sessions should not scan the sessions directory")
+
+    monkeypatch.setattr(Path, "glob", _no_scan)
+    listed = manager.list_sessions()
+    assert [s["key"] for s in listed][:2] == ["telegram:7", "cli:direct"]
+    assert listed[0]["message_count"] == 1 and listed[0]["size"] > 0
+    assert manager.most_recent_session({"slack", "telegram"}) == "telegram:7"
+    assert manager.most_recent_session({"slack"}) == "slack:c1"
+    assert manager.most_recent_session({"discord"}) is None
@@ -0,0 +1,109 @@
+"""Tests for the indexed, memoized SkillsLoader."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent import skills as skills_module
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.skills import SkillsLoader
+from nanobot.agent.tools.skills import ListSkillsTool
+
+
+def _skill(root: Path, name: str, description: str, meta: dict | None = None) -> Path:
+    skill_dir = root / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    front = f"description: {description}\n"
+    if meta is not None:
+        front += f"metadata: {json.dumps({'nanobot': meta})}\n"
+    path = skill_dir / "SKILL.md"
+    path.write_text(f"---\n{front}---\n\n# {name}\n", encoding="utf-8")
+    return path
+
+
+def test_each_skill_is_read_once_until_it_changes(tmp_path: Path, monkeypatch) -> None:
+    builtin = tmp_path / "builtin"
+    _skill(builtin, "weather", "Check the weather", {"always": True})
+    path = _skill(builtin, "github", "Use gh", {"requires": {"bins": ["gh"]}})
+    loader = SkillsLoader(tmp_path / "ws", builtin_skills_dir=builtin)
+
+    reads: list[Path] = []
+    real_read = Path.read_text
+
+    def _counting_read(self: Path, *args, **kwargs) -> str:
+        reads.append(self)
+        return real_read(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", _counting_read)
+    for _ in range(3):
+        loader.build_skills_summary()
+        loader.get_always_skills()
+        loader.list_skills()
+    assert sorted(p.parent.name for p in reads) == ["github", "weather"]
+
+    st = path.stat()
+    path.write_text("---\ndescription: GitHub CLI\n---\n", encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    # The roots didn't change, so the SKILL.md files aren't stat'ed again until the TTL passes.
+    assert "GitHub CLI" not in loader.build_skills_summary()
+    monkeypatch.setattr(skills_module, "SKILL_STAT_TTL_S", 0.0)
+    assert "GitHub CLI" in loader.build_skills_summary()
+    assert len(reads) == 3
+
+    _skill(builtin, "slack", "Post to Slack")  # A new skill dir changes the root: seen at once
+    monkeypatch.setattr(skills_module, "SKILL_STAT_TTL_S", 3600.0)
+    assert [s["name"] for s in loader.list_skills(filter_unavailable=False)] == ["github", "slack", "weather"]
+
+
+def test_workspace_skills_override_builtin_and_which_is_memoized(tmp_path: Path, monkeypatch) -> None:
+    builtin = tmp_path / "builtin"
+    _skill(builtin, "weather", "Builtin weather", {"requires": {"bins": ["curl"]}})
+    _skill(tmp_path / "ws" / "skills", "weather", "Workspace weather", {"requires": {"bins": ["curl"]}})
+    loader = SkillsLoader(tmp_path / "ws", builtin_skills_dir=builtin)
+
+    probes: list[str] = []
+    monkeypatch.setattr(skills_module.shutil, "which", lambda b: probes.append(b) or None)
+    assert loader.list_skills() == []
+    skills = loader.list_skills(filter_unavailable=False)
+    assert [(s["name"], s["source"]) for s in skills] == [("weather", "workspace")]
+    assert "<requires>CLI: curl</requires>" in loader.build_skills_summary()
+    assert probes == ["curl"]
+
+    before = loader.fingerprint()
+    loader._which_cache.clear()  # As if the TTL expired after the binary was installed
+    monkeypatch.setattr(skills_module.shutil, "which", lambda b: f"/usr/bin/{b}")
+    assert loader.fingerprint() != before
+    assert loader.get_skill_metadata("weather")["description"] == "Workspace weather"
+
+
+def test_rank_matches_names_descriptions_and_cjk(tmp_path: Path) -> None:
+    builtin = tmp_path / "builtin"
+    _skill(builtin, "weather", "Check the weather forecast")
+    _skill(builtin, "github", "Work with pull requests and issues")
+    _skill(builtin, "daily-report", "生成每日周报和日报")
+    loader = SkillsLoader(tmp_path / "ws", builtin_skills_dir=builtin)
+
+    assert loader.rank("any open pull requests?", 2) == ["github"]
+    assert loader.rank("帮我写一份周报", 2) == ["daily-report"]
+    assert loader.rank("hello there", 2) == []
+
+
+@pytest.mark.asyncio
+async def test_builder_lists_top_k_and_always_skills(tmp_path: Path) -> None:
+    skills_root = tmp_path / "skills"
+    _skill(skills_root, "weather", "Check the weather forecast")
+    _skill(skills_root, "github", "Work with pull requests")
+    _skill(skills_root, "notes", "Take notes", {"always": True})
+    builder = ContextBuilder(tmp_path, skills_top_k=1)
+    builder.skills.builtin_skills = None
+
+    prompt = builder.build_messages(history=[], current_message="will it rain? weather please")[0]["content"]
+    assert "<name>weather</name>" in prompt and "<name>notes</name>" in prompt
+    assert "<name>github</name>" not in prompt
+    assert "list_skills" in prompt
+
+    tool = ListSkillsTool(builder.skills)
+    assert "<name>github</name>" in await tool.execute()
+    assert "<name>github</name>" in await tool.execute(query="pull request")
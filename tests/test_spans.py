@@ -0,0 +1,102 @@
+"""Tests for phase-timing spans."""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.observability.spans import OtlpJsonSink, RingBufferSink, Tracer
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+
+
+def test_spans_nest_and_record_errors() -> None:
+    ring = RingBufferSink(max_spans=10)
+    tracer = Tracer([ring])
+    with tracer.span("turn") as root:
+        with tracer.span("tool", tool="read_file") as child:
+            child.set(result_chars=3)
+        with pytest.raises(ValueError):
+            with tracer.span("llm.chat"):
+                raise ValueError("boom")
+
+    spans = {s["name"]: s for s in ring.recent()}
+    assert spans["tool"]["parent_id"] == root.span_id
+    assert spans["tool"]["trace_id"] == root.trace_id
+    assert spans["tool"]["attributes"] == {"tool": "read_file", "result_chars": 3}
+    assert spans["llm.chat"]["status"] == "error"
+    assert spans["turn"]["parent_id"] is None
+    assert spans["turn"]["duration_ms"] >= spans["tool"]["duration_ms"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_keep_separate_traces() -> None:
+    ring = RingBufferSink()
+    tracer = Tracer([ring])
+
+    async def _turn(name: str) -> None:
+        with tracer.span("turn", who=name):
+            await asyncio.sleep(0.01)
+            with tracer.span("tool", who=name):
+                await asyncio.sleep(0)
+
+    await asyncio.gather(_turn("a"), _turn("b"))
+    by_trace: dict[str, set[str]] = {}
+    for s in ring.recent():
+        by_trace.setdefault(s["trace_id"], set()).add(s["attributes"]["who"])
+    assert sorted(by_trace.values(), key=sorted) == [{"a"}, {"b"}]
+
+
+def test_ring_buffer_is_bounded() -> None:
+    ring = RingBufferSink(max_spans=3)
+    tracer = Tracer([ring])
+    for i in range(5):
+        with tracer.span(f"s{i}"):
+            pass
+    assert [s["name"] for s in ring.recent()] == ["s2", "s3", "s4"]
+
+
+def test_otlp_json_sink_writes_export_requests(tmp_path: Path) -> None:
+    path = tmp_path / "spans.otlp.jsonl"
+    sink = OtlpJsonSink(path)
+    tracer = Tracer([sink])
+    with tracer.span("llm.chat", prompt_tokens=12, model="qwen"):
+        pass
+
+    sink.persistence.flush(path)
+    request = json.loads(path.read_text(encoding="utf-8"))
+    span = request["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "llm.chat"
+    assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+    assert {"key": "prompt_tokens", "value": {"intValue": "12"}} in span["attributes"]
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_agent_turn_emits_phase_spans(tmp_path: Path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    ring = RingBufferSink()
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model", tracer=Tracer([ring]))
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    responses = iter([
+        LLMResponse(content=None, tool_calls=[ToolCallRequest(id="c1", name="list_dir", arguments={"path": "."})]),
+        LLMResponse(content="done", usage={"prompt_tokens": 50, "completion_tokens": 5, "total_tokens": 55}),
+    ])
+
+    async def _chat(**_kwargs):
+        return next(responses)
+
+    loop.provider.chat = _chat
+    assert await loop.process_direct("hi") == "done"
+
+    spans = ring.recent()
+    names = [s["name"] for s in spans]
+    assert names == ["build_messages", "llm.chat", "tool", "llm.chat", "session.save", "turn"]
+    root = spans[-1]
+    assert all(s["trace_id"] == root["trace_id"] for s in spans)
+    assert spans[3]["attributes"]["prompt_tokens"] == 50
+    assert spans[2]["attributes"]["tool"] == "list_dir"
@@ -0,0 +1,147 @@
+"""Tests for streamed LLM responses and their delivery as progress deltas."""
+
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop, _ThinkFilter
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import (
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+    StreamAccumulator,
+    ToolCallDelta,
+)
+
+
+def _make_loop(tmp_path: Path, chunks: list[list[LLMStreamChunk]]) -> AgentLoop:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    turns = iter(chunks)
+
+    async def _chat_stream(**_kwargs):
+        for chunk in next(turns):
+            yield chunk
+
+    provider.chat_stream = _chat_stream
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model", stream=True)
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    return loop
+
+
+def test_accumulator_joins_fragmented_tool_call_arguments() -> None:
+    acc = StreamAccumulator()
+    acc.add(LLMStreamChunk(content="Let me "))
+    acc.add(LLMStreamChunk(content="check.", tool_calls=[ToolCallDelta(index=0, id="c1", name="read_file", arguments='{"pa')]))
+    acc.add(LLMStreamChunk(tool_calls=[ToolCallDelta(index=0, arguments='th": "a.md"}')]))
+    acc.add(LLMStreamChunk(tool_calls=[ToolCallDelta(index=1, name="list_dir", arguments='{"path": "."')]))
+    acc.add(LLMStreamChunk(finish_reason="tool_calls", usage={"total_tokens": 7}))
+
+    response = acc.response()
+    assert response.content == "Let me check."
+    assert [(tc.id, tc.name, tc.arguments) for tc in response.tool_calls] == [
+        ("c1", "read_file", {"path": "a.md"}),
+        ("call_1", "list_dir", {"path": "."}),  # Missing id and a truncated object are repaired
+    ]
+    assert response.finish_reason == "tool_calls"
+    assert response.usage == {"total_tokens": 7}
+
+
+def test_stream_printer_only_claims_the_reply_it_actually_streamed() -> None:
+    from nanobot.cli.commands import _StreamPrinter
+
+    printer = _StreamPrinter()
+    assert not printer.shows("hi")
+    printer.delta("The answer")
+    printer.delta(" is 4.")
+    assert printer.shows("The answer is 4.\n")
+    assert not printer.shows("Error calling LLM: connection reset")
+    printer.reset()
+    assert not printer.shows("The answer is 4.")
+
+
+def test_accumulator_drops_partial_output_when_the_stream_fails() -> None:
+    acc = StreamAccumulator()
+    acc.add(LLMStreamChunk(content="The answer is", reasoning_content="hmm"))
+    acc.add(LLMStreamChunk(tool_calls=[ToolCallDelta(index=0, id="c1", name="exec", arguments='{"comm')]))
+    acc.add(LLMStreamChunk(content="Error calling Ollama: connection reset", finish_reason="error"))
+
+    response = acc.response()
+    assert response.content == "Error calling Ollama: connection reset"
+    assert response.tool_calls == [] and response.reasoning_content is None
+    assert response.finish_reason == "error"
+
+
+def test_parse_openai_stream_chunk() -> None:
+    fn = SimpleNamespace(name="exec", arguments='{"cmd"')
+    delta = SimpleNamespace(content="hi", tool_calls=[SimpleNamespace(index=0, id="x", function=fn)])
+    chunk = SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+
+    out = LLMProvider._parse_openai_stream_chunk(chunk)
+    assert out.content == "hi"
+    assert out.tool_calls == [ToolCallDelta(index=0, id="x", name="exec", arguments='{"cmd"')]
+
+
+def test_think_filter_handles_tags_split_across_chunks() -> None:
+    f = _ThinkFilter()
+    pieces = ["Hel", "lo <th", "ink>secret", " stuff</thi", "nk> world", " <"]
+    out = "".join(f.feed(p) for p in pieces) + f.flush()
+    assert out == "Hello  world <"
+
+
+@pytest.mark.asyncio
+async def test_stream_deltas_are_forwarded_as_progress(tmp_path: Path) -> None:
+    loop = _make_loop(tmp_path, [
+        [
+            LLMStreamChunk(content="Reading"),
+            LLMStreamChunk(tool_calls=[ToolCallDelta(index=0, id="c1", name="missing_tool", arguments="{}")]),
+        ],
+        [LLMStreamChunk(content="<think>hmm</think>"), LLMStreamChunk(content="Done"), LLMStreamChunk(content=".")],
+    ])
+    progress: list[tuple[str, dict]] = []
+
+    async def _on_progress(content: str, **kwargs) -> None:
+        progress.append((content, kwargs))
+
+    final, tools_used, _ = await loop._run_agent_loop([{"role": "user", "content": "go"}], on_progress=_on_progress)
+
+    assert final == "Done."
+    assert tools_used == ["missing_tool"]
+    assert progress == [
+        ("Reading", {"stream_delta": True}),
+        # Already streamed text is not repeated before the tool hint.
+        ("missing_tool", {"tool_hint": True}),
+        ("Done", {"stream_delta": True}),
+        (".", {"stream_delta": True}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_default_chat_stream_falls_back_to_chat() -> None:
+    class _Plain(LLMProvider):
+        async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+            return LLMResponse(content="whole")
+
+        def get_default_model(self) -> str:
+            return "m"
+
+    acc = StreamAccumulator()
+    async for chunk in _Plain().chat_stream(messages=[]):
+        acc.add(chunk)
+    assert acc.response().content == "whole"
+
+
+def test_usage_reports_prefix_cache_hits() -> None:
+    openai_style = SimpleNamespace(
+        prompt_tokens=1200, completion_tokens=30, total_tokens=1230,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+    )
+    assert LLMProvider._parse_openai_usage(openai_style)["cached_tokens"] == 1024
+    assert AgentLoop._cache_usage({"prompt_tokens": 1200, "cached_tokens": 1024}) == {
+        "usage_prompt_tokens": 1200, "cached_prompt_tokens": 1024, "uncached_prompt_tokens": 176,
+    }
+    plain = SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12, prompt_tokens_details=None)
+    assert "cached_tokens" not in LLMProvider._parse_openai_usage(plain)
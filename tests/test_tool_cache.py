@@ -0,0 +1,123 @@
+"""Tests for the read-only tool result cache."""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.cache import ToolResultCache
+from nanobot.agent.tools.filesystem import ListDirTool, ReadFileTool
+from nanobot.agent.tools.registry import ToolRegistry
+
+
+class _CountingRead(ReadFileTool):
+    def __init__(self, workspace: Path):
+        super().__init__(workspace=workspace)
+        self.calls = 0
+
+    async def execute(self, path: str, **kwargs: Any) -> str:
+        self.calls += 1
+        return await super().execute(path, **kwargs)
+
+
+class _Remote(Tool):
+    def __init__(self, ttl: float | None):
+        self.ttl, self.calls = ttl, 0
+
+    @property
+    def name(self) -> str:
+        return "remote"
+
+    @property
+    def description(self) -> str:
+        return "remote read"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"q": {"type": "string"}}}
+
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+    @property
+    def cache_ttl(self) -> float | None:
+        return self.ttl
+
+    async def execute(self, **kwargs: Any) -> str:
+        self.calls += 1
+        return f"v{self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_file_reads_are_cached_until_the_file_changes(tmp_path: Path) -> None:
+    registry = ToolRegistry(cache=ToolResultCache())
+    tool = _CountingRead(tmp_path)
+    registry.register(tool)
+    target = tmp_path / "SKILL.md"
+    target.write_text("v1", encoding="utf-8")
+
+    assert await registry.execute("read_file", {"path": "SKILL.md"}) == "v1"
+    assert await registry.execute("read_file", {"path": "SKILL.md"}) == "v1"
+    assert tool.calls == 1
+
+    target.write_text("v2 longer", encoding="utf-8")
+    os.utime(target, ns=(0, target.stat().st_mtime_ns + 1_000_000))
+    assert await registry.execute("read_file", {"path": "SKILL.md"}) == "v2 longer"
+    assert tool.calls == 2
+    assert registry.cache.stats()["hits"] == 1
+    assert registry.cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(tmp_path: Path) -> None:
+    registry = ToolRegistry(cache=ToolResultCache())
+    tool = _CountingRead(tmp_path)
+    registry.register(tool)
+
+    for _ in range(2):
+        assert (await registry.execute("read_file", {"path": "missing.md"})).startswith("Error")
+    assert tool.calls == 2
+    assert len(registry.cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_dir_sees_new_entries(tmp_path: Path) -> None:
+    registry = ToolRegistry(cache=ToolResultCache())
+    registry.register(ListDirTool(workspace=tmp_path))
+    (tmp_path / "a.md").write_text("a")
+    assert "a.md" in await registry.execute("list_dir", {"path": "."})
+
+    (tmp_path / "b.md").write_text("b")
+    os.utime(tmp_path, ns=(0, tmp_path.stat().st_mtime_ns + 1_000_000))
+    assert "b.md" in await registry.execute("list_dir", {"path": "."})
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_invalidation_for_remote_tools() -> None:
+    cache = ToolResultCache()
+    registry = ToolRegistry(cache=cache)
+    tool = _Remote(ttl=0.01)
+    registry.register(tool)
+
+    assert await registry.execute("remote", {"q": "x"}) == "v1"
+    assert await registry.execute("remote", {"q": "x"}) == "v1"
+    await asyncio.sleep(0.02)
+    assert await registry.execute("remote", {"q": "x"}) == "v2"
+    assert cache.invalidate("remote") == 1
+    assert await registry.execute("remote", {"q": "x"}) == "v3"
+
+
+def test_lru_bound_and_canonical_keys() -> None:
+    cache = ToolResultCache(max_entries=2)
+    cache.put("t", {"a": 1, "b": 2}, "", "first")
+    assert cache.get("t", {"b": 2, "a": 1}, "") == "first"
+    cache.put("t", {"a": 2}, "", "second")
+    cache.get("t", {"a": 1, "b": 2}, "")  # Touch so {"a": 2} becomes least recent
+    cache.put("t", {"a": 3}, "", "third")
+    assert cache.get("t", {"a": 2}, "") is None
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
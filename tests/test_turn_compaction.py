@@ -0,0 +1,71 @@
+"""Tests for in-turn compaction of older tool results."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.blobs import BlobStore
+from nanobot.agent.compaction import TurnCompactor
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+
+
+def _tool(i: int, content: str) -> dict:
+    return {"role": "tool", "tool_call_id": f"c{i}", "name": "exec", "content": content}
+
+
+def test_compacts_older_results_once_over_threshold(tmp_path: Path) -> None:
+    blobs = BlobStore(tmp_path)
+    compactor = TurnCompactor(blobs, threshold_tokens=2000, keep_recent=2)
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "go"}]
+    messages += [_tool(i, f"output {i}\n" + "z" * 3000) for i in range(4)]
+    assert TurnCompactor(blobs, threshold_tokens=0).compact(messages, 1) is None
+
+    report = compactor.compact(messages, turn_start=1)
+    assert report is not None and report.compacted == 2
+    assert report.turn_tokens_after < report.turn_tokens_before
+    digest = messages[2]["content"]
+    assert digest.startswith("[exec output compacted: 3009 chars, 2 lines]\noutput 0")
+    ref = digest.rsplit("blob=", 1)[1].rstrip(")")
+    assert blobs.get_text(ref) == "output 0\n" + "z" * 3000
+    assert messages[4]["content"].startswith("output 2") and messages[5]["content"].startswith("output 3")
+    # Digests are not compacted again.
+    assert compactor.compact(messages, turn_start=1) is None
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_compacts_between_iterations_and_traces_it(tmp_path: Path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model",
+        turn_compact_tokens=1500, turn_compact_keep=1,
+    )
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    loop.trace_store = MagicMock()
+
+    async def _execute(tc):
+        return f"{tc.id}\n" + "y" * 4000
+
+    loop._execute_tool_call = _execute
+    sent: list[list[dict]] = []
+    responses = iter([
+        *(LLMResponse(content=None, tool_calls=[ToolCallRequest(id=f"c{i}", name="exec", arguments={})])
+          for i in range(3)),
+        LLMResponse(content="done"),
+    ])
+
+    async def _chat(messages, **_kwargs):
+        sent.append(messages)
+        return next(responses)
+
+    loop.provider.chat = _chat
+    assert await loop.process_direct("run it") == "done"
+
+    last_tools = [m["content"] for m in sent[-1] if m["role"] == "tool"]
+    assert [c.startswith("[exec output compacted") for c in last_tools] == [True, True, False]
+    events = [c.args[0] for c in loop.trace_store.append.call_args_list]
+    compactions = [e for e in events if e["event"] == "turn_compacted"]
+    assert compactions and compactions[0]["compacted"] == 1